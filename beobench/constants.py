@@ -24,6 +24,15 @@ AVAILABLE_WRAPPERS = [
     "energym",
 ]
 
+# dotted paths of config values that are never used to identify a config (e.g. in
+# fingerprints)
+CONFIG_FINGERPRINT_EXCLUDED_KEYS = [
+    "autogen",
+    "general.wandb_api_key",
+    # set to 1 for each sample by the scheduler, samples must share a fingerprint
+    "general.num_samples",
+]
+
 # read-only dir in container
 CONTAINER_RO_DIR = pathlib.Path("/root/beobench_configs")
 
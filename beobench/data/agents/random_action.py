@@ -3,7 +3,7 @@
 import wandb
 import numpy as np
 
-from beobench.experiment.provider import config, create_env
+from beobench.experiment.provider import config, create_env, create_metrics_sink
 
 # Setting up experiment tracking via wandb
 wandb_used = config["general"]["wandb_project"] is not None
@@ -16,6 +16,12 @@ if wandb_used:
         name="random_agent_" + wandb.util.generate_id(),
     )
 
+# Metrics are logged to wandb (if used) or to a local file-backed sink
+if wandb_used or config["general"]["metrics_sink"] != "wandb":
+    metrics_sink = create_metrics_sink()
+else:
+    metrics_sink = None
+
 # Determining length of experiment (if set)
 try:
     num_timesteps = config["agent"]["config"]["stop"]["timesteps_total"]
@@ -66,13 +72,17 @@ for _ in range(num_timesteps):
 
     if done or num_steps_per_ep >= horizon:
 
-        if wandb_used:
-            wandb.log({"episode_reward_mean": np.sum(ep_rewards), "step": episode})
+        if metrics_sink is not None:
+            metrics_sink.log(
+                {"episode_reward_mean": np.sum(ep_rewards), "step": episode}
+            )
 
         num_steps_per_ep = 0
         ep_rewards = []
         if done:
             observation = env.reset()
 env.close()
+if metrics_sink is not None:
+    metrics_sink.close()
 
 print("Random agent: completed test.")
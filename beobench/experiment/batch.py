@@ -0,0 +1,135 @@
+"""Take multiple steps in (wrapped) environments with a single call.
+
+Environments and wrappers can process a sequence of actions natively by
+implementing a `step_many(actions)` method with the same return values as
+step_many() below. Wrappers that do not override step(), and action or observation
+wrappers that only implement action() or observation(), pass the whole sequence on
+to the wrapped env, such that native implementations further down are still used.
+All other layers are stepped one action at a time.
+"""
+
+import gym
+import numpy as np
+
+
+def step_many(env, actions) -> tuple:
+    """Take steps in environment for sequence of actions.
+
+    Stepping stops early if the environment is done, so the returned values may
+    be shorter than the sequence of actions.
+
+    Args:
+        env (gym.Env): (wrapped) environment.
+        actions: sequence of actions.
+
+    Returns:
+        tuple: stacked observations, array of rewards, array of dones and list of
+            infos.
+    """
+    # Looked up on class, as gym wrappers forward unknown attributes to the wrapped
+    # env (which would skip the wrapper's own step() logic).
+    env_type = type(env)
+    native_step_many = getattr(env_type, "step_many", None)
+    if callable(native_step_many):
+        return native_step_many(env, actions)
+
+    if isinstance(env, gym.Wrapper):
+        if env_type.step is gym.Wrapper.step:
+            return step_many(env.env, actions)
+        elif env_type.step is gym.ActionWrapper.step:
+            return step_many(
+                env.env, [copy_values(env.action(action)) for action in actions]
+            )
+        elif env_type.step is gym.ObservationWrapper.step:
+            obs, rewards, dones, infos = step_many(env.env, actions)
+            return (
+                stack_obs(
+                    [
+                        copy_values(env.observation(o))
+                        for o in unstack_obs(obs, len(rewards))
+                    ]
+                )
+                if len(rewards)
+                else obs,
+                rewards,
+                dones,
+                infos,
+            )
+
+    steps = []
+    for action in actions:
+        obs, reward, done, info = env.step(action)
+        steps.append((copy_values(obs), reward, done, info))
+        if done:
+            break
+    return stack_steps(steps)
+
+
+def stack_steps(steps: list) -> tuple:
+    """Stack list of return values of env.step() calls.
+
+    Args:
+        steps (list): list of (obs, reward, done, info) tuples.
+
+    Returns:
+        tuple: stacked observations, array of rewards, array of dones and list of
+            infos.
+    """
+    if not steps:
+        return np.empty(0), np.empty(0), np.empty(0, dtype=bool), []
+
+    obs, rewards, dones, infos = zip(*steps)
+    return (
+        stack_obs(obs),
+        np.asarray(rewards, dtype=np.float64),
+        np.asarray(dones, dtype=bool),
+        list(infos),
+    )
+
+
+def stack_obs(obs: list):
+    """Stack list of observations.
+
+    Args:
+        obs (list): list of observations (arrays, scalars or dicts of these).
+
+    Returns:
+        stacked array, or dict of stacked arrays for dict observations.
+    """
+    if isinstance(obs[0], dict):
+        return {key: np.stack([np.asarray(o[key]) for o in obs]) for key in obs[0]}
+    return np.stack([np.asarray(o) for o in obs])
+
+
+def copy_values(values):
+    """Copy observation or action (array, scalar or dict of these).
+
+    Wrappers may return (opt-in) buffers that are overwritten by later steps, so
+    values that are kept for multiple steps are copied.
+
+    Args:
+        values: observation or action.
+
+    Returns:
+        values with all arrays copied.
+    """
+    if isinstance(values, dict):
+        return {key: copy_values(value) for key, value in values.items()}
+    if isinstance(values, np.ndarray):
+        return values.copy()
+    return values
+
+
+def unstack_obs(obs, num: int) -> list:
+    """Split stacked observations into list of single observations.
+
+    Args:
+        obs: stacked array, or dict of stacked arrays, as returned by stack_obs().
+        num (int): number of stacked observations.
+
+    Returns:
+        list: list of single observations.
+    """
+    if isinstance(obs, dict):
+        return [{key: values[i] for key, values in obs.items()} for i in range(num)]
+    return list(obs[:num])
@@ -8,12 +8,15 @@ import ast
 import sys
 import random
 import os
+import json
+import math
+import hashlib
 from beobench.logging import logger
 
 import beobench
 import beobench.utils
 
-from beobench.constants import USER_CONFIG_PATH
+from beobench.constants import USER_CONFIG_PATH, CONFIG_FINGERPRINT_EXCLUDED_KEYS
 
 # To enable compatiblity with Python<=3.8 (e.g. for sinergym dockerfile)
 if sys.version_info[1] >= 9:
@@ -225,3 +228,77 @@ def get_high_level_config(method: str, gym: str, env: str) -> dict:
         config["env"]["name"] = env
 
     return config
+
+
+def fingerprint(config: dict) -> str:
+    """Get stable fingerprint (hash) of Beobench config.
+
+    The fingerprint is independent of key order and of the way numbers are formatted
+    in the original yaml or json config (e.g. `1.`, `1.0` and `1` all result in the
+    same fingerprint). Automatically generated parts of the config (`autogen`),
+    secrets (e.g. `wandb_api_key`) and run bookkeeping (`num_samples`) are excluded,
+    such that all samples of an experiment share the same fingerprint.
+
+    Args:
+        config (dict): Beobench config.
+
+    Returns:
+        str: hex digest of the canonical config.
+    """
+
+    canonical_str = json.dumps(
+        _canonicalise(config),
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=True,
+        default=str,
+    )
+    return hashlib.sha256(canonical_str.encode("utf-8")).hexdigest()
+
+
+def diff(a: dict, b: dict) -> list:
+    """Get dotted paths of all values that differ between two Beobench configs.
+
+    Keys that are excluded from config fingerprints (e.g. `autogen`) are ignored.
+
+    Args:
+        a (dict): a Beobench config
+        b (dict): another Beobench config
+
+    Returns:
+        list: sorted list of dotted paths (e.g. `env.config.days`) of values that
+            are changed, added or removed in b compared to a.
+    """
+
+    flat_a = beobench.utils.flatten_dict(_canonicalise(a))
+    flat_b = beobench.utils.flatten_dict(_canonicalise(b))
+    missing = object()
+
+    return sorted(
+        key
+        for key in flat_a.keys() | flat_b.keys()
+        if flat_a.get(key, missing) != flat_b.get(key, missing)
+    )
+
+
+def _canonicalise(value, path: str = ""):
+    """Convert config value into canonical form used by fingerprint() and diff().
+
+    Values at the dotted paths in CONFIG_FINGERPRINT_EXCLUDED_KEYS are removed.
+    """
+
+    if isinstance(value, dict):
+        canonical = {}
+        for key, val in value.items():
+            key_path = f"{path}.{key}" if path else str(key)
+            if key_path not in CONFIG_FINGERPRINT_EXCLUDED_KEYS:
+                canonical[str(key)] = _canonicalise(val, path=key_path)
+        return canonical
+    elif isinstance(value, (list, tuple)):
+        return [_canonicalise(val, path=f"{path}.{i}") for i, val in enumerate(value)]
+    elif isinstance(value, float):
+        if math.isnan(value) or math.isinf(value):
+            return str(value)
+        elif value.is_integer():
+            return int(value)
+    return value
@@ -0,0 +1,146 @@
+"""Pool of environment instances that can be reused inside an experiment container."""
+
+import threading
+import time
+
+import gym
+
+import beobench.experiment.config_parser
+
+
+class PooledEnv(gym.Wrapper):
+    """Wrapper that returns environment to its pool instead of closing it."""
+
+    def __init__(self, env: gym.Env, pool: "EnvPool", key: str):
+        """Wrapper that returns environment to its pool instead of closing it.
+
+        Args:
+            env (gym.Env): environment to wrap.
+            pool (EnvPool): pool the environment belongs to.
+            key (str): pool key of environment.
+        """
+        super().__init__(env)
+        self.pool = pool
+        self.pool_key = key
+        self.released = False
+
+    def close(self):
+        if not self.released:
+            self.released = True
+            self.pool.release(self.env, self.pool_key)
+
+
+class EnvPool:
+    """Pool of initialised environment instances, keyed by env config fingerprint."""
+
+    def __init__(
+        self,
+        create_fn,
+        max_size: int = 1,
+        idle_timeout: float = 600,
+        reset_on_release: bool = True,
+    ):
+        """Pool of initialised environment instances, keyed by env config fingerprint.
+
+        Args:
+            create_fn (callable): function creating a new environment from an
+                env config (e.g. `env_creator.create_env`).
+            max_size (int, optional): maximum number of idle environments kept in
+                pool. Defaults to 1.
+            idle_timeout (float, optional): seconds after which idle environments are
+                closed and removed from the pool. Defaults to 600.
+            reset_on_release (bool, optional): whether to reset environments when
+                they are returned to the pool, such that they are handed out at the
+                start of an episode. Defaults to True.
+        """
+        self.create_fn = create_fn
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.reset_on_release = reset_on_release
+
+        self._idle_envs = {}  # key -> list of (env, time of release)
+        self._lock = threading.Lock()
+
+    def acquire(self, env_config: dict) -> PooledEnv:
+        """Get environment for env config, reusing an idle instance if available.
+
+        Args:
+            env_config (dict): env configuration.
+
+        Returns:
+            PooledEnv: environment that returns to pool when closed.
+        """
+        key = beobench.experiment.config_parser.fingerprint(env_config)
+        self.evict_idle()
+
+        with self._lock:
+            idle_envs = self._idle_envs.get(key, [])
+            env = idle_envs.pop()[0] if idle_envs else None
+
+        if env is None:
+            env = self.create_fn(env_config)
+
+        return PooledEnv(env, pool=self, key=key)
+
+    def release(self, env: gym.Env, key: str) -> None:
+        """Return environment to pool.
+
+        Args:
+            env (gym.Env): unwrapped pool environment.
+            key (str): pool key of environment.
+        """
+        if self.reset_on_release:
+            try:
+                env.reset()
+            except Exception:  # pylint: disable=broad-except
+                # Environments that can't be reset are not reused.
+                env.close()
+                return
+
+        with self._lock:
+            self._idle_envs.setdefault(key, []).append((env, time.monotonic()))
+            evicted_envs = self._pop_oldest(self._num_idle() - self.max_size)
+
+        for evicted_env in evicted_envs:
+            evicted_env.close()
+
+    def evict_idle(self) -> None:
+        """Close all environments that have been idle longer than idle timeout."""
+        cutoff = time.monotonic() - self.idle_timeout
+        evicted_envs = []
+        with self._lock:
+            for key, idle_envs in self._idle_envs.items():
+                evicted_envs += [env for env, t in idle_envs if t < cutoff]
+                self._idle_envs[key] = [(env, t) for env, t in idle_envs if t >= cutoff]
+
+        for env in evicted_envs:
+            env.close()
+
+    def clear(self) -> None:
+        """Close all idle environments in pool."""
+        with self._lock:
+            evicted_envs = self._pop_oldest(self._num_idle())
+
+        for env in evicted_envs:
+            env.close()
+
+    def _num_idle(self) -> int:
+        return sum(len(idle_envs) for idle_envs in self._idle_envs.values())
+
+    def _pop_oldest(self, num: int) -> list:
+        """Remove num least recently released envs from pool (lock must be held)."""
+        entries = sorted(
+            (
+                (t, key, env)
+                for key, idle_envs in self._idle_envs.items()
+                for env, t in idle_envs
+            ),
+            key=lambda entry: entry[0],
+        )
+        popped_envs = []
+        for _, key, env in entries[: max(num, 0)]:
+            self._idle_envs[key] = [
+                entry for entry in self._idle_envs[key] if entry[0] is not env
+            ]
+            popped_envs.append(env)
+        return popped_envs
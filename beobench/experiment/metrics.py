@@ -0,0 +1,255 @@
+"""Live experiment metrics in Prometheus/OpenMetrics text format.
+
+The scheduler keeps counters of queued, running, finished and failed experiments
+and of image build durations in an ExperimentMetrics instance, which can be
+exposed via a local HTTP endpoint and/or written to a textfile (e.g. for the node
+exporter's textfile collector).
+
+Inside experiment containers, the StepCounter wrapper (see
+beobench.experiment.step_counter) writes cheap per-process counters (env steps and
+simulated seconds) as small JSON files to the mounted results directory
+(`<local_dir>/metrics/live/`), from which the host computes steps per second and
+simulated seconds per wall-clock second of each run.
+"""
+
+import http.server
+import json
+import os
+import pathlib
+import threading
+import time
+
+LIVE_METRICS_DIR = pathlib.Path("metrics") / "live"
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# counter files not updated for this many seconds are considered inactive
+_ACTIVE_TIMEOUT = 60
+
+
+class ExperimentMetrics:
+    """Thread-safe counters of experiments run by the scheduler."""
+
+    def __init__(self, local_dir: str = None):
+        """Thread-safe counters of experiments run by the scheduler.
+
+        Args:
+            local_dir (str, optional): results directory of experiments, from which
+                the live counters written by StepCounter wrappers are read.
+                Defaults to None.
+        """
+        self.local_dir = pathlib.Path(local_dir) if local_dir is not None else None
+        self.num_queued = 0
+        self.num_running = 0
+        self.num_finished = 0
+        self.num_failed = 0
+        self.build_seconds_sum = 0.0
+        self.num_builds = 0
+        self.num_build_failures = 0
+        self.run_ids = set()
+        self._lock = threading.Lock()
+        self._server = None
+        self._textfile_thread = None
+        self._stop_event = threading.Event()
+
+    def queue(self, num: int = 1) -> None:
+        with self._lock:
+            self.num_queued += num
+
+    def start(self, run_id: str) -> None:
+        with self._lock:
+            self.num_queued -= 1
+            self.num_running += 1
+            self.run_ids.add(run_id)
+
+    def finish(self, success: bool = True) -> None:
+        with self._lock:
+            self.num_running -= 1
+            if success:
+                self.num_finished += 1
+            else:
+                self.num_failed += 1
+
+    def add_build(self, duration: float, success: bool = True) -> None:
+        with self._lock:
+            self.build_seconds_sum += duration
+            self.num_builds += 1
+            if not success:
+                self.num_build_failures += 1
+
+    def render(self) -> str:
+        """Render all metrics in OpenMetrics text format.
+
+        Returns:
+            str: metrics text.
+        """
+        with self._lock:
+            lines = []
+            _add_metric(
+                lines,
+                "beobench_experiments",
+                "gauge",
+                "Number of experiments by state.",
+                [
+                    ({"state": "queued"}, self.num_queued),
+                    ({"state": "running"}, self.num_running),
+                ],
+            )
+            _add_metric(
+                lines,
+                "beobench_experiments_completed",
+                "counter",
+                "Number of completed experiments by result.",
+                [
+                    ({"result": "finished"}, self.num_finished),
+                    ({"result": "failed"}, self.num_failed),
+                ],
+            )
+            lines += [
+                "# TYPE beobench_image_build_seconds summary",
+                "# HELP beobench_image_build_seconds Duration of image builds.",
+                f"beobench_image_build_seconds_sum {self.build_seconds_sum}",
+                f"beobench_image_build_seconds_count {self.num_builds}",
+            ]
+            _add_metric(
+                lines,
+                "beobench_image_build_failures",
+                "counter",
+                "Number of failed image builds.",
+                [({}, self.num_build_failures)],
+            )
+
+        run_samples = self._get_run_samples()
+        for name, metric_type, help_text in [
+            ("beobench_run_env_steps", "counter", "Env steps taken in run."),
+            ("beobench_run_env_steps_per_second", "gauge", "Env steps per second."),
+            (
+                "beobench_run_sim_seconds_per_second",
+                "gauge",
+                "Simulated seconds per wall-clock second.",
+            ),
+        ]:
+            samples = [
+                ({"run_id": run_id}, values[name])
+                for run_id, values in run_samples.items()
+                if values.get(name) is not None
+            ]
+            _add_metric(lines, name, metric_type, help_text, samples)
+
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str) -> None:
+        """Write metrics to textfile (atomically).
+
+        Args:
+            path (str): path of textfile, e.g. `<dir>/beobench.prom`.
+        """
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as text_file:
+            text_file.write(self.render())
+        os.replace(tmp_path, path)
+
+    def start_textfile_writer(self, path: str, interval: float = 5.0) -> None:
+        """Rewrite textfile every interval seconds in a background thread.
+
+        Args:
+            path (str): path of textfile.
+            interval (float, optional): seconds between writes. Defaults to 5.0.
+        """
+
+        def write_loop():
+            while not self._stop_event.wait(interval):
+                self.write_textfile(path)
+            self.write_textfile(path)
+
+        self.write_textfile(path)
+        self._textfile_thread = threading.Thread(target=write_loop, daemon=True)
+        self._textfile_thread.start()
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> None:
+        """Serve metrics via HTTP in a background thread.
+
+        Args:
+            port (int): port to serve on.
+            host (str, optional): host to serve on. Defaults to "127.0.0.1".
+        """
+        metrics = self
+
+        class MetricsHandler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):  # pylint: disable=invalid-name
+                body = metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", OPENMETRICS_CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):  # pylint: disable=arguments-differ
+                pass
+
+        self._server = http.server.ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def stop(self) -> None:
+        """Stop HTTP server and textfile writer (after a final write)."""
+        self._stop_event.set()
+        if self._textfile_thread is not None:
+            self._textfile_thread.join()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def _get_run_samples(self) -> dict:
+        """Aggregate live counters of all processes of each started run."""
+        if self.local_dir is None:
+            return {}
+        with self._lock:
+            run_ids = set(self.run_ids)
+        runs = {}
+        now = time.time()
+        for path in (self.local_dir / LIVE_METRICS_DIR).glob("*.json"):
+            try:
+                with open(path, encoding="utf-8") as json_file:
+                    counters = json.load(json_file)
+            except (OSError, ValueError):
+                continue  # file may be removed or replaced while reading
+            if counters["run_id"] not in run_ids:
+                continue  # written by earlier runs in same local_dir
+            run = runs.setdefault(
+                counters["run_id"],
+                {
+                    "beobench_run_env_steps": 0,
+                    "beobench_run_env_steps_per_second": 0.0,
+                    "beobench_run_sim_seconds_per_second": None,
+                },
+            )
+            run["beobench_run_env_steps"] += counters["env_steps"]
+            duration = counters["update_time"] - counters["start_time"]
+            if duration <= 0 or now - counters["update_time"] > _ACTIVE_TIMEOUT:
+                continue
+            run["beobench_run_env_steps_per_second"] += counters["env_steps"] / duration
+            if counters["sim_seconds"] is not None:
+                run["beobench_run_sim_seconds_per_second"] = (
+                    run["beobench_run_sim_seconds_per_second"] or 0.0
+                ) + counters["sim_seconds"] / duration
+        return runs
+
+
+def _add_metric(
+    lines: list, name: str, metric_type: str, help_text: str, samples: list
+) -> None:
+    lines.append(f"# TYPE {name} {metric_type}")
+    lines.append(f"# HELP {name} {help_text}")
+    suffix = "_total" if metric_type == "counter" else ""
+    for labels, value in samples:
+        label_str = ",".join(
+            f'{key}="{_escape_label(label)}"' for key, label in labels.items()
+        )
+        label_str = f"{{{label_str}}}" if label_str else ""
+        lines.append(f"{name}{suffix}{label_str} {value}")
+
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,194 @@
+"""Profiler measuring the step and reset latency of each wrapper layer.
+
+A timer layer is interposed around the integration's environment and around each
+wrapper. Each timer measures the latency of its layer including all layers below,
+such that the time spent in a layer itself is the difference to the timer below.
+"""
+
+import json
+import pathlib
+import time
+
+import gym
+
+import beobench.experiment.batch
+
+# Python<=3.6 does not have nanosecond timers
+if hasattr(time, "perf_counter_ns"):
+    _perf_counter_ns = time.perf_counter_ns
+else:
+
+    def _perf_counter_ns():
+        return int(time.perf_counter() * 1e9)
+
+
+PROFILED_METHODS = ["step", "reset", "step_many"]
+
+
+class LatencyHistogram:
+    """Histogram of latencies with one bucket per power of two nanoseconds."""
+
+    NUM_BUCKETS = 64
+
+    def __init__(self):
+        self.counts = [0] * self.NUM_BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = None
+        self.max_ns = 0
+
+    def add(self, latency_ns: int) -> None:
+        """Add single latency measurement.
+
+        Args:
+            latency_ns (int): latency in nanoseconds.
+        """
+        self.counts[min(latency_ns.bit_length(), self.NUM_BUCKETS - 1)] += 1
+        self.count += 1
+        self.total_ns += latency_ns
+        if self.min_ns is None or latency_ns < self.min_ns:
+            self.min_ns = latency_ns
+        if latency_ns > self.max_ns:
+            self.max_ns = latency_ns
+
+    def mean_us(self) -> float:
+        return self.total_ns / self.count / 1e3 if self.count else 0.0
+
+    def quantile_us(self, q: float) -> float:
+        """Get (upper bound of) latency quantile.
+
+        Args:
+            q (float): quantile between 0 and 1.
+
+        Returns:
+            float: upper bound of bucket containing quantile in microseconds.
+        """
+        threshold = q * self.count
+        cum_count = 0
+        for bucket, count in enumerate(self.counts):
+            cum_count += count
+            if count and cum_count >= threshold:
+                return min(2**bucket, self.max_ns) / 1e3
+        return 0.0
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "total_s": self.total_ns / 1e9,
+            "mean_us": self.mean_us(),
+            "min_us": (self.min_ns or 0) / 1e3,
+            "max_us": self.max_ns / 1e3,
+            "p50_us": self.quantile_us(0.5),
+            "p90_us": self.quantile_us(0.9),
+            "p99_us": self.quantile_us(0.99),
+            "histogram_log2_ns": {
+                str(bucket): count for bucket, count in enumerate(self.counts) if count
+            },
+        }
+
+
+class TimedLayer(gym.Wrapper):
+    """Wrapper measuring latency of the wrapped layer (incl. all layers below)."""
+
+    def __init__(self, env: gym.Env, histograms: dict, dump_fn=None):
+        """Wrapper measuring latency of the wrapped layer (incl. all layers below).
+
+        Args:
+            env (gym.Env): environment to wrap.
+            histograms (dict): histograms for each of the PROFILED_METHODS.
+            dump_fn (callable, optional): function called after closing the env, to
+                dump the profiling results. Defaults to None.
+        """
+        super().__init__(env)
+        self.histograms = histograms
+        self.dump_fn = dump_fn
+
+    def step(self, action):
+        start = _perf_counter_ns()
+        result = self.env.step(action)
+        self.histograms["step"].add(_perf_counter_ns() - start)
+        return result
+
+    def reset(self, **kwargs):
+        start = _perf_counter_ns()
+        result = self.env.reset(**kwargs)
+        self.histograms["reset"].add(_perf_counter_ns() - start)
+        return result
+
+    def step_many(self, actions):
+        start = _perf_counter_ns()
+        result = beobench.experiment.batch.step_many(self.env, actions)
+        self.histograms["step_many"].add(_perf_counter_ns() - start)
+        return result
+
+    def close(self):
+        self.env.close()
+        if self.dump_fn is not None:
+            self.dump_fn()
+
+
+class WrapperProfiler:
+    """Profiler measuring the step and reset latency of each wrapper layer."""
+
+    def __init__(self):
+        self.layer_names = []  # from innermost to outermost layer
+        self.histograms = []
+
+    def wrap(self, env: gym.Env) -> TimedLayer:
+        """Add timer around env, which is the next (outer) layer to be profiled.
+
+        Args:
+            env (gym.Env): environment or wrapper.
+
+        Returns:
+            TimedLayer: env wrapped in timer.
+        """
+        self.layer_names.append(f"{len(self.layer_names)}_{type(env).__name__}")
+        histograms = {method: LatencyHistogram() for method in PROFILED_METHODS}
+        self.histograms.append(histograms)
+        return TimedLayer(env, histograms)
+
+    def add_dump_on_close(self, env: TimedLayer, path: pathlib.Path) -> None:
+        """Dump summary to path when env (outermost timer) is closed.
+
+        Args:
+            env (TimedLayer): outermost timer layer.
+            path (pathlib.Path): path of json file to dump summary to.
+        """
+        env.dump_fn = lambda: self.dump(path)
+
+    def summary(self) -> list:
+        """Get summary of latencies of all layers.
+
+        The `exclusive_mean_us` value of each method is the mean latency spent in
+        the layer itself (excl. all layers below).
+
+        Returns:
+            list: summary dict for each layer, from outermost to innermost layer.
+        """
+        summary = []
+        for i, (name, histograms) in enumerate(zip(self.layer_names, self.histograms)):
+            layer_summary = {"layer": name}
+            for method, histogram in histograms.items():
+                if not histogram.count:
+                    continue
+                method_summary = histogram.summary()
+                method_summary["exclusive_mean_us"] = method_summary["mean_us"]
+                if i > 0 and self.histograms[i - 1][method].count == histogram.count:
+                    method_summary["exclusive_mean_us"] -= self.histograms[i - 1][
+                        method
+                    ].mean_us()
+                layer_summary[method] = method_summary
+            summary.append(layer_summary)
+        return summary[::-1]
+
+    def dump(self, path: pathlib.Path) -> None:
+        """Dump summary of latencies to json file.
+
+        Args:
+            path (pathlib.Path): path of json file.
+        """
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as json_file:
+            json.dump(self.summary(), json_file, indent=2)
@@ -1,27 +1,91 @@
 """ The experiment provider provides access to environments inside containers."""
 
+import beobench.experiment.batch
 import beobench.experiment.config_parser
-import importlib
-from beobench.constants import CONTAINER_RO_DIR, AVAILABLE_WRAPPERS
+import beobench.experiment.env_pool
+import beobench.experiment.metrics
+import beobench.experiment.profiler
+import beobench.experiment.remote
+import beobench.experiment.replay
+import beobench.experiment.snapshot
+import beobench.experiment.step_counter
+import beobench.experiment.transition_cache
+import beobench.experiment.vector_env
+import beobench.integration.sinks
+import beobench.wrappers.registry
+import atexit
+import functools
+import itertools
+import os
+from beobench.constants import CONTAINER_RO_DIR, CONTAINER_DATA_DIR
+
+CONFIG_PATH = CONTAINER_RO_DIR / "config.yaml"
 
 try:
     import env_creator  # pylint: disable=import-outside-toplevel,import-error
 except ImportError as e:
-    raise ImportError(
-        (
-            "Cannot import env_creator module. Is Beobench being executed"
-            "inside a Beobench experiment container?"
+    # Containers that only access a remote environment (via env.remote_address)
+    # or replay a recorded trajectory (via env.replay_path) do not need to provide
+    # an env_creator module.
+    _env_config = (
+        beobench.experiment.config_parser.parse(CONFIG_PATH)["env"]
+        if CONFIG_PATH.is_file()
+        else {}
+    )
+    if not (_env_config.get("remote_address") or _env_config.get("replay_path")):
+        raise ImportError(
+            (
+                "Cannot import env_creator module. Is Beobench being executed"
+                "inside a Beobench experiment container?"
+            )
+        ) from e
+    env_creator = None
+
+config = beobench.experiment.config_parser.parse(CONFIG_PATH)
+
+# Pool of env instances that allows reusing already initialised simulations
+# (not used if env is remote or replayed, in which case no env_creator may exist)
+if config["general"]["env_pool_size"] > 0 and not (
+    config["env"]["remote_address"] or config["env"]["replay_path"]
+):
+    if config["general"]["transition_cache_size"] > 0:
+        # transition cache requires freshly created envs for simulator catch-up
+        raise ValueError(
+            "general.env_pool_size and general.transition_cache_size cannot both be set."
         )
-    ) from e
+    env_pool = beobench.experiment.env_pool.EnvPool(
+        create_fn=env_creator.create_env,
+        max_size=config["general"]["env_pool_size"],
+        idle_timeout=config["general"]["env_pool_idle_timeout"],
+    )
+    atexit.register(env_pool.clear)
+else:
+    env_pool = None
 
-config = beobench.experiment.config_parser.parse(CONTAINER_RO_DIR / "config.yaml")
+# Counter to give profiles of multiple envs in same process unique names
+_profile_counter = itertools.count()
+# Counter to give live metrics files of multiple envs in same process unique names
+_live_metrics_counter = itertools.count()
 
 
 def create_env(env_config: dict = None) -> object:
     """Create environment.
 
     Create environment from Beobench integration currently being used.
-    This only works INSIDE a beobench experiment container.
+    This only works INSIDE a beobench experiment container. If
+    `general.env_pool_size` is set, idle environment instances with the same env
+    config are reused, and closing the returned environment returns its simulation
+    to the pool. If `env.remote_address` is set, the environment served by
+    serve_env() in another container is used instead. If `env.replay_path` is set,
+    the trajectory recorded there (by the RecordTrajectory wrapper) is replayed from
+    memory-mapped files instead of running the simulation. If
+    `general.transition_cache_size` is set, transitions of the (deterministic)
+    environment are cached on disk and served without stepping the simulator when
+    the same actions are taken again. If `general.profile_wrappers` is set, the
+    step and reset latency of each wrapper layer is measured and saved to
+    `local_dir` when the environment is closed. If `general.metrics_port` or
+    `general.metrics_textfile` is set, env step counters are written to
+    `local_dir` for the live metrics of the scheduler.
 
     Args:
         env_config (dict, optional): env configuration. Defaults to None.
@@ -35,26 +99,190 @@ def create_env(env_config: dict = None) -> object:
     if env_config is None:
         env_config = config["env"]["config"]
 
-    env = env_creator.create_env(env_config)
+    if config["env"]["remote_address"]:
+        env = beobench.experiment.remote.RemoteEnv(config["env"]["remote_address"])
+    elif config["env"]["replay_path"]:
+        env = beobench.experiment.replay.ReplayEnv(config["env"]["replay_path"])
+    elif env_pool is not None:
+        env = env_pool.acquire(env_config)
+    else:
+        env = env_creator.create_env(env_config)
+
+    if config["general"]["transition_cache_size"] > 0:
+        env_key = beobench.experiment.config_parser.fingerprint(
+            {
+                "gym": config["env"]["gym"],
+                "config": env_config,
+                "version": config["general"]["version"],
+            }
+        )
+        store = beobench.experiment.transition_cache.TransitionStore(
+            CONTAINER_DATA_DIR / "cache" / "transitions.sqlite",
+            max_size=config["general"]["transition_cache_size"] * 2**20,
+        )
+        env = beobench.experiment.transition_cache.TransitionCache(
+            env, store=store, env_key=env_key
+        )
 
-    for wrapper_dict in config["wrappers"]:
-        wrapper = _get_wrapper(wrapper_dict)
-        if "config" in wrapper_dict.keys():
-            wrapper_config = wrapper_dict["config"]
-        else:
-            wrapper_config = {}
+    # enable snapshots via action replay if not natively supported by integration.
+    # Added below the step counter, such that replayed steps are not counted.
+    if config["general"]["env_snapshots"] and not (
+        beobench.experiment.snapshot.supports_state(env.unwrapped)
+    ):
+        env = beobench.experiment.snapshot.ActionReplay(env)
+
+    if config["general"]["metrics_port"] or config["general"]["metrics_textfile"]:
+        live_metrics_name = (
+            f"{config['autogen']['run_id']}_{os.getpid()}_"
+            f"{next(_live_metrics_counter)}.json"
+        )
+        env = beobench.experiment.step_counter.StepCounter(
+            env,
+            path=CONTAINER_DATA_DIR
+            / beobench.experiment.metrics.LIVE_METRICS_DIR
+            / live_metrics_name,
+            run_id=config["autogen"]["run_id"],
+            sim_seconds_per_step=config["env"]["sim_seconds_per_step"],
+        )
+
+    if config["general"]["profile_wrappers"]:
+        profiler = beobench.experiment.profiler.WrapperProfiler()
+        env = profiler.wrap(env)
+    else:
+        profiler = None
+
+    for wrapper, wrapper_config in _get_wrappers():
         env = wrapper(env, **wrapper_config)
+        if profiler is not None:
+            env = profiler.wrap(env)
+
+    if profiler is not None:
+        profile_name = (
+            f"wrapper_latency_{config['autogen']['run_id']}_"
+            f"{os.getpid()}_{next(_profile_counter)}.json"
+        )
+        profiler.add_dump_on_close(env, CONTAINER_DATA_DIR / "profiles" / profile_name)
 
     return env
 
 
-def _get_wrapper(wrapper_dict):
-    origin = wrapper_dict["origin"]
+def create_vector_env(n: int, env_config: dict = None) -> object:
+    """Create vectorised environment.
+
+    Creates n environment instances (incl. all configured wrappers) from the Beobench
+    integration currently being used, each in its own subprocess. Each instance is
+    seeded with `autogen.random_seed` plus its index. Observations are flattened and
+    returned as stacked arrays. This only works INSIDE a beobench experiment
+    container.
 
-    if origin in AVAILABLE_WRAPPERS:
-        wrapper_module_str = "beobench.wrappers." + origin
-        wrapper_module = importlib.import_module(wrapper_module_str)
-        wrapper_class = getattr(wrapper_module, wrapper_dict["class"])
-        return wrapper_class
+    Args:
+        n (int): number of environment instances.
+        env_config (dict, optional): env configuration. Defaults to None.
+
+    Returns:
+        object: vectorised environment instance
+    """
+
+    base_seed = config.get("autogen", {}).get("random_seed")
+    if base_seed is None:
+        seeds = None
     else:
-        raise NotImplementedError("Non-standard wrappers are currently not supported.")
+        seeds = [base_seed + i for i in range(n)]
+
+    env_fns = [functools.partial(create_env, env_config) for _ in range(n)]
+
+    return beobench.experiment.vector_env.VectorEnv(env_fns=env_fns, seeds=seeds)
+
+
+def serve_env(address: str = None, env_config: dict = None) -> None:
+    """Serve environment to agent in another container.
+
+    The served environment is created without wrappers, as wrappers are applied by
+    create_env() in the agent container. This function returns once the agent
+    closes the environment.
+
+    Args:
+        address (str, optional): address to serve environment on, either
+            `unix:///path/to/socket` or `tcp://host:port`. Defaults to None, in which
+            case `env.remote_address` from the config is used.
+        env_config (dict, optional): env configuration. Defaults to None.
+    """
+    if address is None:
+        address = config["env"]["remote_address"]
+    if env_config is None:
+        env_config = config["env"]["config"]
+
+    env = env_creator.create_env(env_config)
+    beobench.experiment.remote.serve_env(env, address)
+
+
+def step_many(env: object, actions) -> tuple:
+    """Take steps in environment created by create_env() for sequence of actions.
+
+    This is useful for open-loop evaluation (e.g. schedule-based controllers), as
+    wrappers and integrations that can process multiple actions at once do so
+    natively. Stepping stops early once the environment is done.
+
+    Args:
+        env (object): environment instance.
+        actions: sequence of actions.
+
+    Returns:
+        tuple: stacked observations, array of rewards, array of dones and list of
+            infos.
+    """
+    return beobench.experiment.batch.step_many(env, actions)
+
+
+def snapshot(env: object) -> list:
+    """Take snapshot of state of environment created by create_env().
+
+    Args:
+        env (object): environment instance.
+
+    Returns:
+        list: snapshot of environment and wrapper states.
+    """
+    return beobench.experiment.snapshot.snapshot(env)
+
+
+def restore(env: object, state: list) -> None:
+    """Restore environment created by create_env() to snapshot.
+
+    This allows evaluating multiple policies from the same (e.g. mid-year)
+    simulation state without simulating the warm-up period each time.
+
+    Args:
+        env (object): environment instance with same wrappers as snapshot env.
+        state (list): snapshot as returned by snapshot().
+    """
+    beobench.experiment.snapshot.restore(env, state)
+
+
+def create_metrics_sink(name: str = None) -> object:
+    """Create metrics sink to log records (dicts of metrics) to.
+
+    File-backed sinks write to `<local_dir>/metrics/<run_id>.<name>`, from where
+    they can later be exported with the functions in beobench.integration.sinks.
+
+    Args:
+        name (str, optional): name of sink, e.g. `wandb` or `sqlite`. Defaults to
+            None, in which case `general.metrics_sink` from the config is used.
+
+    Returns:
+        object: metrics sink with log(), log_many() and close() methods.
+    """
+    if name is None:
+        name = config["general"]["metrics_sink"]
+    path = CONTAINER_DATA_DIR / "metrics" / f"{config['autogen']['run_id']}.{name}"
+    return beobench.integration.sinks.create_sink(name, path=path)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_wrappers() -> list:
+    """Get (cached) list of wrapper classes and their configs.
+
+    Wrappers are resolved and their configs validated only once per process,
+    on the first call of create_env().
+    """
+    return beobench.wrappers.registry.register_wrappers(config["wrappers"])
@@ -0,0 +1,268 @@
+"""Low-latency transport to access environments in another container.
+
+An environment container serves its environment via serve_env(), and the agent
+container accesses it through the gym-compatible RemoteEnv proxy. Both communicate
+via a Unix domain socket (e.g. on a volume shared by both containers) or TCP.
+
+Messages are pickled with protocol 5 where available, such that numpy arrays are
+sent as raw out-of-band buffers without additional copies. Note that unpickling
+data allows arbitrary code execution: only serve environments on sockets that
+are accessible to trusted containers.
+"""
+
+import os
+import pickle
+import socket
+import struct
+import time
+import traceback
+
+import gym
+
+import beobench.experiment.batch
+
+# methods of the served env that can be called remotely
+ALLOWED_METHODS = [
+    "reset",
+    "step",
+    "close",
+    "seed",
+    "render",
+    "get_state",
+    "set_state",
+]
+
+# messages below this size are sent in a single system call
+_MAX_JOINED_MESSAGE_SIZE = 2**16
+
+_HEADER = struct.Struct("!QI")  # pickle size, number of out-of-band buffers
+_BUFFER_SIZE = struct.Struct("!Q")
+_PICKLE_PROTOCOL = min(5, pickle.HIGHEST_PROTOCOL)
+
+
+class RemoteEnvError(Exception):
+    pass
+
+
+class RemoteEnv(gym.Env):
+    """Gym-compatible proxy of an environment served by serve_env()."""
+
+    def __init__(
+        self,
+        address: str,
+        connect_timeout: float = 60,
+        close_remote: bool = True,
+    ):
+        """Gym-compatible proxy of an environment served by serve_env().
+
+        Args:
+            address (str): address of environment server, either
+                `unix:///path/to/socket` or `tcp://host:port`.
+            connect_timeout (float, optional): seconds to wait for the environment
+                server to become available. Defaults to 60.
+            close_remote (bool, optional): whether closing this proxy also closes
+                the remote environment and stops its server. Defaults to True.
+        """
+        self.address = address
+        self.close_remote = close_remote
+        self._sock = _connect(address, connect_timeout)
+        self.observation_space, self.action_space = self._call("get_spaces")
+
+    def reset(self, **kwargs):
+        return self._call("reset", **kwargs)
+
+    def step(self, action):
+        return self._call("step", action)
+
+    def step_many(self, actions):
+        return self._call("step_many", actions)
+
+    def seed(self, seed=None):
+        return self._call("seed", seed)
+
+    def render(self, mode="human"):
+        return self._call("render", mode=mode)
+
+    def close(self):
+        if self._sock is None:
+            return
+        if self.close_remote:
+            self._call("close")
+        self._sock.close()
+        self._sock = None
+
+    def _call(self, method: str, *args, **kwargs):
+        if self._sock is None:
+            raise RemoteEnvError("Remote environment connection is closed.")
+        send_message(self._sock, (method, args, kwargs))
+        status, result = recv_message(self._sock)
+        if status == "error":
+            raise RemoteEnvError(f"Error in remote environment:\n{result}")
+        return result
+
+
+def serve_env(env: gym.Env, address: str) -> None:
+    """Serve environment to RemoteEnv proxies, one connection at a time.
+
+    This function returns once a client closes the environment.
+
+    Args:
+        env (gym.Env): environment to serve.
+        address (str): address to serve on, either `unix:///path/to/socket` or
+            `tcp://host:port`.
+    """
+    family, sock_address = _parse_address(address)
+    server = socket.socket(family, socket.SOCK_STREAM)
+    if family == socket.AF_UNIX:
+        if os.path.exists(sock_address):
+            os.remove(sock_address)
+    else:
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+
+    try:
+        server.bind(sock_address)
+        server.listen(1)
+        env_closed = False
+        while not env_closed:
+            conn, _ = server.accept()
+            _set_socket_options(conn)
+            with conn:
+                env_closed = _serve_connection(env, conn)
+    finally:
+        server.close()
+        if family == socket.AF_UNIX and os.path.exists(sock_address):
+            os.remove(sock_address)
+
+
+def send_message(sock: socket.socket, obj: object) -> None:
+    """Send python object via socket.
+
+    Args:
+        sock (socket.socket): connected socket.
+        obj (object): picklable object.
+    """
+    buffers = []
+    if _PICKLE_PROTOCOL >= 5:
+        payload = pickle.dumps(
+            obj, protocol=_PICKLE_PROTOCOL, buffer_callback=buffers.append
+        )
+    else:
+        payload = pickle.dumps(obj, protocol=_PICKLE_PROTOCOL)
+    raw_buffers = [buffer.raw() for buffer in buffers]
+
+    parts = [
+        _HEADER.pack(len(payload), len(raw_buffers)),
+        *[_BUFFER_SIZE.pack(raw.nbytes) for raw in raw_buffers],
+        payload,
+        *raw_buffers,
+    ]
+    if sum(len(part) for part in parts) <= _MAX_JOINED_MESSAGE_SIZE:
+        sock.sendall(b"".join(parts))
+    else:
+        for part in parts:
+            sock.sendall(part)
+
+
+def recv_message(sock: socket.socket) -> object:
+    """Receive python object sent via send_message().
+
+    Args:
+        sock (socket.socket): connected socket.
+
+    Raises:
+        EOFError: if the connection was closed by the other side.
+
+    Returns:
+        object: received object.
+    """
+    payload_size, num_buffers = _HEADER.unpack(_recv_exactly(sock, _HEADER.size))
+    buffer_sizes = [
+        _BUFFER_SIZE.unpack(_recv_exactly(sock, _BUFFER_SIZE.size))[0]
+        for _ in range(num_buffers)
+    ]
+    payload = _recv_exactly(sock, payload_size)
+    buffers = [_recv_exactly(sock, size) for size in buffer_sizes]
+    if buffers:
+        return pickle.loads(payload, buffers=buffers)
+    return pickle.loads(payload)
+
+
+def _serve_connection(env: gym.Env, conn: socket.socket) -> bool:
+    """Serve requests of single connection.
+
+    Returns:
+        bool: whether the environment was closed by the client.
+    """
+    while True:
+        try:
+            method, args, kwargs = recv_message(conn)
+        except EOFError:
+            return False
+
+        try:
+            if method == "get_spaces":
+                result = (env.observation_space, env.action_space)
+            elif method == "step_many":
+                result = beobench.experiment.batch.step_many(env, *args)
+            elif method in ALLOWED_METHODS:
+                result = getattr(env, method)(*args, **kwargs)
+            else:
+                raise NotImplementedError(f"Remote method {method} not supported.")
+            response = ("ok", result)
+        except Exception:  # pylint: disable=broad-except
+            response = ("error", traceback.format_exc())
+
+        send_message(conn, response)
+        if method == "close" and response[0] == "ok":
+            return True
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytearray:
+    data = bytearray(size)
+    view = memoryview(data)
+    received = 0
+    while received < size:
+        num_bytes = sock.recv_into(view[received:], size - received)
+        if num_bytes == 0:
+            raise EOFError("Connection closed.")
+        received += num_bytes
+    return data
+
+
+def _parse_address(address: str) -> tuple:
+    """Parse address into socket family and socket address."""
+    if address.startswith("unix://"):
+        return socket.AF_UNIX, address[len("unix://") :]
+    elif address.startswith("tcp://"):
+        host, port = address[len("tcp://") :].rsplit(":", 1)
+        return socket.AF_INET, (host, int(port))
+    else:
+        raise ValueError(
+            (
+                f"Remote env address {address} not supported. Use "
+                "unix:///path/to/socket or tcp://host:port."
+            )
+        )
+
+
+def _connect(address: str, timeout: float) -> socket.socket:
+    """Connect to address, retrying until timeout (e.g. while server starts up)."""
+    family, sock_address = _parse_address(address)
+    deadline = time.monotonic() + timeout
+    while True:
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        try:
+            sock.connect(sock_address)
+            _set_socket_options(sock)
+            return sock
+        except (ConnectionRefusedError, FileNotFoundError):
+            sock.close()
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def _set_socket_options(sock: socket.socket) -> None:
+    if sock.family == socket.AF_INET:
+        # disable Nagle's algorithm, as we always wait for a response
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
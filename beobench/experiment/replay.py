@@ -0,0 +1,304 @@
+"""Offline replay of trajectories recorded by the RecordTrajectory wrapper.
+
+On first use, the chunk files of a trajectory are consolidated into one .npy file
+per column (in the `columns` subdirectory of the trajectory), which are then
+memory-mapped. Replaying therefore neither requires the simulator nor loading the
+full trajectory into memory. The columns are consolidated again once more chunks
+have been recorded.
+"""
+
+import json
+import os
+import pathlib
+import shutil
+
+import gym
+import numpy as np
+
+import beobench.experiment.trajectories
+
+COLUMNS_DIR = "columns"
+# file in columns dir with number of chunks the columns were consolidated from
+COLUMNS_INFO_FILE = "columns.json"
+
+
+class ReplayEnv(gym.Env):
+    """Environment replaying recorded episodes, ignoring the actions taken."""
+
+    def __init__(self, path: str, random_episodes: bool = False, seed: int = None):
+        """Environment replaying recorded episodes, ignoring the actions taken.
+
+        Args:
+            path (str): trajectory directory written by RecordTrajectory.
+            random_episodes (bool, optional): whether reset() starts a random
+                episode. Defaults to False, in which case episodes are replayed in
+                order of recording.
+            seed (int, optional): seed of random episode selection. Defaults to
+                None.
+        """
+        self.path = pathlib.Path(path)
+        (
+            self.observation_space,
+            self.action_space,
+        ) = beobench.experiment.trajectories.load_spaces(self.path)
+        self.columns = load_columns(self.path)
+        self.random_episodes = random_episodes
+        self.rng = np.random.default_rng(seed)
+
+        self.obs_keys = sorted(
+            key for key in self.columns if key == "obs" or key.startswith("obs.")
+        )
+        self.info_keys = sorted(key for key in self.columns if key.startswith("info."))
+        self.episode_starts = np.flatnonzero(self.columns["reset"])
+        self.episode_ends = np.append(
+            self.episode_starts[1:], len(self.columns["reset"])
+        )
+        self.num_episodes = len(self.episode_starts)
+        if self.num_episodes == 0:
+            raise ValueError(f"No recorded episodes found in {self.path}.")
+
+        self.episode = -1
+        self._pos = None
+        self._end = None
+
+    def reset(self, episode: int = None, start_step: int = 0, **kwargs):
+        """Reset environment to recorded episode.
+
+        Args:
+            episode (int, optional): index of episode to replay. Defaults to None, in
+                which case the next (or a random) episode is selected.
+            start_step (int, optional): number of steps of episode to skip, for
+                starting from the middle of an episode. Defaults to 0.
+
+        Returns:
+            observation at start (step) of episode.
+        """
+        if episode is None:
+            if self.random_episodes:
+                episode = int(self.rng.integers(self.num_episodes))
+            else:
+                episode = (self.episode + 1) % self.num_episodes
+        self.episode = episode
+        self._pos = self.episode_starts[episode] + start_step
+        self._end = self.episode_ends[episode]
+        if self._pos >= self._end:
+            raise ValueError(
+                f"Episode {episode} has fewer than {start_step + 1} observations."
+            )
+        return self._get_obs(self._pos)
+
+    def step(self, action):
+        self._pos += 1
+        self._check_not_done()
+        pos = self._pos
+        return (
+            self._get_obs(pos),
+            float(self.columns["reward"][pos]),
+            bool(self.columns["done"][pos]),
+            self._get_info(pos),
+        )
+
+    def step_many(self, actions):
+        self._pos += 1
+        self._check_not_done()
+        start = self._pos
+        stop = min(start + len(actions), self._end)
+        done_indices = np.flatnonzero(self.columns["done"][start:stop])
+        if len(done_indices):
+            stop = start + done_indices[0] + 1
+        self._pos = stop - 1
+
+        if self.obs_keys == ["obs"]:
+            obs = np.array(self.columns["obs"][start:stop])
+        else:
+            obs = _unflatten(
+                {
+                    key[4:]: np.array(self.columns[key][start:stop])
+                    for key in self.obs_keys
+                }
+            )
+        info_values = {
+            key: self.columns[key][start:stop].tolist() for key in self.info_keys
+        }
+        infos = [
+            _unflatten({key[5:]: values[i] for key, values in info_values.items()})
+            for i in range(stop - start)
+        ]
+        return (
+            obs,
+            np.array(self.columns["reward"][start:stop], dtype=np.float64),
+            np.array(self.columns["done"][start:stop], dtype=bool),
+            infos,
+        )
+
+    def get_episode(self, episode: int) -> dict:
+        """Get all recorded columns of episode, e.g. for offline RL.
+
+        Args:
+            episode (int): index of episode.
+
+        Returns:
+            dict: memory-mapped array of each column, with the reset row first.
+        """
+        start, end = self.episode_starts[episode], self.episode_ends[episode]
+        return {key: values[start:end] for key, values in self.columns.items()}
+
+    def get_state(self) -> dict:
+        return {"episode": self.episode, "pos": self._pos, "end": self._end}
+
+    def set_state(self, state: dict) -> None:
+        self.episode = state["episode"]
+        self._pos = state["pos"]
+        self._end = state["end"]
+
+    def _check_not_done(self) -> None:
+        if self._pos is None or self._pos >= self._end:
+            raise RuntimeError(
+                "No recorded steps left in episode. Call reset() to start next episode."
+            )
+
+    def _get_obs(self, pos: int):
+        if self.obs_keys == ["obs"]:
+            return np.array(self.columns["obs"][pos])
+        return _unflatten(
+            {key[4:]: np.array(self.columns[key][pos]) for key in self.obs_keys}
+        )
+
+    def _get_info(self, pos: int) -> dict:
+        return _unflatten(
+            {key[5:]: self.columns[key][pos].tolist() for key in self.info_keys}
+        )
+
+
+def load_columns(path: str) -> dict:
+    """Load memory-mapped columns of trajectory, consolidating chunks if necessary.
+
+    Args:
+        path (str): trajectory directory.
+
+    Returns:
+        dict: read-only memory-mapped array for each column.
+    """
+    path = pathlib.Path(path)
+    columns_path = path / COLUMNS_DIR
+    num_chunks = len(beobench.experiment.trajectories.get_chunk_paths(path))
+    if _get_num_consolidated_chunks(columns_path) != num_chunks:
+        consolidate(path)
+    return {
+        column_path.stem: np.load(column_path, mmap_mode="r")
+        for column_path in columns_path.glob("*.npy")
+    }
+
+
+def consolidate(path: str) -> None:
+    """Consolidate chunk files of trajectory into one .npy file per column.
+
+    Chunks are streamed into preallocated memory-mapped .npy files one column at a
+    time, such that the trajectory is never fully loaded into memory. Columns
+    missing in some chunks are filled with NaN for float columns and zeros
+    otherwise, as in beobench.experiment.trajectories.concatenate_chunks().
+
+    Args:
+        path (str): trajectory directory.
+    """
+    path = pathlib.Path(path)
+    chunk_paths = beobench.experiment.trajectories.get_chunk_paths(path)
+
+    # dtype and shape of columns are read from array headers, without loading them
+    chunk_headers = []
+    for chunk_path in chunk_paths:
+        with np.load(chunk_path) as chunk:
+            chunk_headers.append(
+                {key: _read_array_header(chunk, key) for key in chunk.files}
+            )
+    num_rows = [headers["reset"][0][0] for headers in chunk_headers]
+    templates = {}  # key: (shape of row, dtype of first chunk, dtype of column)
+    for headers in chunk_headers:
+        for key, (shape, dtype) in headers.items():
+            if key in templates:
+                row_shape, first_dtype, column_dtype = templates[key]
+                templates[key] = (
+                    row_shape,
+                    first_dtype,
+                    np.result_type(column_dtype, dtype),
+                )
+            else:
+                templates[key] = (shape[1:], dtype, dtype)
+
+    # write to temporary directory first, as other processes may consolidate the
+    # same trajectory at the same time
+    tmp_path = path / f"{COLUMNS_DIR}.tmp-{os.getpid()}"
+    tmp_path.mkdir(parents=True, exist_ok=True)
+    columns = {
+        key: np.lib.format.open_memmap(
+            tmp_path / f"{key}.npy",
+            mode="w+",
+            dtype=column_dtype,
+            shape=(sum(num_rows),) + row_shape,
+        )
+        for key, (row_shape, _, column_dtype) in templates.items()
+    }
+    start = 0
+    for chunk_path, chunk_rows in zip(chunk_paths, num_rows):
+        stop = start + chunk_rows
+        with np.load(chunk_path) as chunk:
+            for key, values in columns.items():
+                if key in chunk.files:
+                    values[start:stop] = chunk[key]
+                else:
+                    first_dtype = templates[key][1]
+                    values[start:stop] = np.nan if first_dtype.kind == "f" else 0
+        start = stop
+    for values in columns.values():
+        values.flush()
+    del columns
+    with open(tmp_path / COLUMNS_INFO_FILE, "w", encoding="utf-8") as info_file:
+        json.dump({"num_chunks": len(chunk_paths)}, info_file)
+
+    # replace outdated columns, which may still be memory-mapped by other processes
+    columns_path = path / COLUMNS_DIR
+    old_path = path / f"{COLUMNS_DIR}.old-{os.getpid()}"
+    try:
+        columns_path.rename(old_path)
+    except FileNotFoundError:
+        pass
+    try:
+        tmp_path.rename(columns_path)
+    except OSError:
+        shutil.rmtree(tmp_path)
+        if not columns_path.is_dir():
+            raise
+    finally:
+        shutil.rmtree(old_path, ignore_errors=True)
+
+
+def _get_num_consolidated_chunks(columns_path: pathlib.Path) -> int:
+    """Get number of chunks that columns were consolidated from, or None."""
+    try:
+        with open(columns_path / COLUMNS_INFO_FILE, encoding="utf-8") as info_file:
+            return json.load(info_file)["num_chunks"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _read_array_header(npz_file, key: str) -> tuple:
+    """Read shape and dtype of array in .npz file without loading the array."""
+    with npz_file.zip.open(f"{key}.npy") as npy_file:
+        version = np.lib.format.read_magic(npy_file)
+        if version == (1, 0):
+            shape, _, dtype = np.lib.format.read_array_header_1_0(npy_file)
+        else:
+            shape, _, dtype = np.lib.format.read_array_header_2_0(npy_file)
+    return shape, dtype
+
+
+def _unflatten(flat_dict: dict) -> dict:
+    """Unflatten dict with keys separated by dots, as created by flatten_dict()."""
+    nested = {}
+    for key, value in flat_dict.items():
+        sub_dict = nested
+        *parent_keys, last_key = key.split(".")
+        for parent_key in parent_keys:
+            sub_dict = sub_dict.setdefault(parent_key, {})
+        sub_dict[last_key] = value
+    return nested
@@ -0,0 +1,126 @@
+"""Offline re-scoring of recorded trajectories with CustomReward-style rewards.
+
+As the trajectory of a fixed policy does not depend on the reward weights, reward
+studies can recompute the rewards of many weightings from the recorded info['obs']
+values without rerunning the simulation.
+"""
+
+import numpy as np
+
+from beobench.wrappers.energym import get_weight_matrix
+
+
+def rescore(
+    infos,
+    info_obs_weights,
+    dones=None,
+    chunk_size: int = 256,
+) -> dict:
+    """Compute summary metrics of rewards for many weightings at once.
+
+    Sums, means and standard deviations are computed from sums and covariances of
+    the info['obs'] values (as rewards are linear in them), so that the full
+    matrix of per-step rewards is only needed for the minimum and maximum reward,
+    which are computed for chunks of weightings.
+
+    Args:
+        infos (list or dict): recorded trajectory, either a list of info dicts with
+            an `obs` dict (as returned by `get_cross_episodes_data()`), or a dict
+            with an array of values for each info['obs'] key.
+        info_obs_weights (dict or list): dict of weights of info['obs'] values, or
+            list of such dicts, as used by the CustomReward wrapper.
+        dones (array, optional): done flag of each step, used to split the
+            trajectory into episodes. Defaults to None, in which case the whole
+            trajectory is treated as a single episode.
+        chunk_size (int, optional): number of weightings for which per-step rewards
+            are computed at once. Defaults to 256.
+
+    Raises:
+        ValueError: if the trajectory is empty, or info['obs'] values of weight keys
+            are missing.
+
+    Returns:
+        dict: arrays of summary metrics with one entry per weighting, and matrix of
+            episode returns with one row per episode.
+    """
+    obs_keys, weight_matrix = get_weight_matrix(info_obs_weights)
+    _check_infos(infos, obs_keys)
+    obs_values = get_info_obs_array(infos, obs_keys)
+    num_steps = obs_values.shape[0]
+
+    # Episode returns are the weighted sums of the per-episode sums of obs values
+    if dones is None:
+        episode_starts = np.array([0])
+    else:
+        episode_ends = np.flatnonzero(np.asarray(dones, dtype=bool)[:-1]) + 1
+        episode_starts = np.concatenate([[0], episode_ends])
+    episode_obs_sums = np.add.reduceat(obs_values, episode_starts, axis=0)
+    episode_returns = episode_obs_sums @ weight_matrix.T
+
+    total_reward = episode_returns.sum(axis=0)
+    mean_reward = total_reward / num_steps
+    obs_cov = np.atleast_2d(np.cov(obs_values, rowvar=False, bias=True))
+    std_reward = np.sqrt(
+        np.maximum(np.sum((weight_matrix @ obs_cov) * weight_matrix, axis=1), 0)
+    )
+
+    min_reward = np.empty(len(weight_matrix))
+    max_reward = np.empty(len(weight_matrix))
+    for start in range(0, len(weight_matrix), chunk_size):
+        rewards = obs_values @ weight_matrix[start : start + chunk_size].T
+        min_reward[start : start + chunk_size] = rewards.min(axis=0)
+        max_reward[start : start + chunk_size] = rewards.max(axis=0)
+
+    return {
+        "total_reward": total_reward,
+        "mean_reward": mean_reward,
+        "std_reward": std_reward,
+        "min_reward": min_reward,
+        "max_reward": max_reward,
+        "episode_returns": episode_returns,
+        "mean_episode_return": episode_returns.mean(axis=0),
+    }
+
+
+def get_info_obs_array(infos, obs_keys: list) -> np.ndarray:
+    """Get array of info['obs'] values of recorded trajectory.
+
+    Args:
+        infos (list or dict): list of info dicts with an `obs` dict, or dict with
+            an array of values for each info['obs'] key.
+        obs_keys (list): keys of info['obs'] values.
+
+    Returns:
+        np.ndarray: array with one row per step and one column per key.
+    """
+    if isinstance(infos, dict):
+        columns = [np.asarray(infos[key], dtype=np.float64) for key in obs_keys]
+        return np.stack(columns, axis=1)
+
+    obs_values = np.empty((len(infos), len(obs_keys)))
+    for i, info in enumerate(infos):
+        obs_values[i] = [info["obs"][key] for key in obs_keys]
+    return obs_values
+
+
+def _check_infos(infos, obs_keys: list) -> None:
+    """Check that trajectory is not empty and has values of all obs_keys."""
+    if isinstance(infos, dict):
+        missing_keys = [key for key in obs_keys if key not in infos]
+        num_steps = max((len(values) for values in infos.values()), default=0)
+    else:
+        num_steps = len(infos)
+        missing_keys = [
+            key
+            for key in obs_keys
+            if any(key not in info.get("obs", {}) for info in infos)
+        ]
+    if num_steps == 0:
+        raise ValueError("Unable to rescore empty trajectory.")
+    if missing_keys:
+        raise ValueError(
+            (
+                f"Weight keys {missing_keys} are missing from info['obs'] values of "
+                "trajectory."
+            )
+        )
@@ -0,0 +1,247 @@
+"""Sampling of resource usage of experiment containers via Docker stats.
+
+While an experiment container runs, a background thread reads the Docker stats of
+the container and appends a row with CPU, memory, shared memory, block I/O,
+network I/O and process counts to a CSV timeline at a configurable interval. Once
+the container has stopped, a summary with peak and mean values is written next to
+the timeline. These can be used to size `general.docker_shm_size` and the number
+of experiments run concurrently.
+"""
+
+import csv
+import json
+import pathlib
+import threading
+import time
+
+import docker
+from loguru import logger
+
+# columns of CSV timeline
+GAUGE_COLUMNS = ["cpu_percent", "mem_bytes", "shm_bytes", "pids"]
+COUNTER_COLUMNS = ["blk_read_bytes", "blk_write_bytes", "net_rx_bytes", "net_tx_bytes"]
+COLUMNS = ["time", "mem_limit_bytes"] + GAUGE_COLUMNS + COUNTER_COLUMNS
+
+
+class ContainerStatsSampler:
+    """Sampler writing the Docker stats of a container to a CSV timeline."""
+
+    def __init__(
+        self,
+        container_name: str,
+        timeline_path: str,
+        summary_path: str,
+        interval: float = 5.0,
+        start_timeout: float = 600.0,
+    ):
+        """Sampler writing the Docker stats of a container to a CSV timeline.
+
+        Shared memory usage is taken from the `shmem` memory statistic of the
+        container's cgroup, which includes /dev/shm. Block and network I/O are
+        cumulative byte counts since the container started.
+
+        Args:
+            container_name (str): name of container to sample.
+            timeline_path (str): path of CSV file with one row per sample.
+            summary_path (str): path of JSON file with peak and mean values, written
+                when sampling stops.
+            interval (float, optional): minimum seconds between samples. Defaults to
+                5.0.
+            start_timeout (float, optional): maximum seconds to wait for the
+                container to be started (e.g. while `docker run` pulls the image).
+                Defaults to 600.0.
+        """
+        self.container_name = container_name
+        self.timeline_path = pathlib.Path(timeline_path)
+        self.summary_path = pathlib.Path(summary_path)
+        self.interval = interval
+        self.start_timeout = start_timeout
+
+        self.num_samples = 0
+        self.start_time = None
+        self._sums = dict.fromkeys(GAUGE_COLUMNS, 0.0)
+        self._peaks = dict.fromkeys(GAUGE_COLUMNS, 0.0)
+        self._last_row = None
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._sample_loop, daemon=True)
+
+    def start(self) -> "ContainerStatsSampler":
+        """Start sampling in background thread.
+
+        Returns:
+            ContainerStatsSampler: this sampler.
+        """
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop sampling and write summary.
+
+        Args:
+            timeout (float, optional): maximum seconds to wait for the sampling
+                thread, which may be blocked reading the next stats. Defaults to 10.0.
+        """
+        self._stop_event.set()
+        self._thread.join(timeout)
+        if self.num_samples > 0:
+            self.write_summary()
+
+    def add_sample(self, row: dict, writer: csv.DictWriter) -> None:
+        """Add sample to timeline and running statistics.
+
+        Args:
+            row (dict): sample with values of COLUMNS.
+            writer (csv.DictWriter): writer of timeline file.
+        """
+        writer.writerow(row)
+        self.num_samples += 1
+        for column in GAUGE_COLUMNS:
+            self._sums[column] += row[column]
+            self._peaks[column] = max(self._peaks[column], row[column])
+        self._last_row = row
+
+    def get_summary(self) -> dict:
+        """Get summary of samples taken so far.
+
+        Returns:
+            dict: peak and mean of CPU, memory, shared memory and process counts, and
+                total block and network I/O.
+        """
+        summary = {
+            "container_name": self.container_name,
+            "start_time": self.start_time,
+            "duration": self._last_row["time"] if self._last_row else 0.0,
+            "num_samples": self.num_samples,
+            "interval": self.interval,
+            "mem_limit_bytes": self._last_row["mem_limit_bytes"]
+            if self._last_row
+            else None,
+        }
+        for column in GAUGE_COLUMNS:
+            summary[f"peak_{column}"] = self._peaks[column]
+            summary[f"mean_{column}"] = (
+                round(self._sums[column] / self.num_samples, 2)
+                if self.num_samples
+                else None
+            )
+        for column in COUNTER_COLUMNS:
+            summary[f"total_{column}"] = (
+                self._last_row[column] if self._last_row else None
+            )
+        return summary
+
+    def write_summary(self) -> None:
+        """Write summary to JSON file."""
+        self.summary_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.summary_path, "w", encoding="utf-8") as summary_file:
+            json.dump(self.get_summary(), summary_file, indent=2)
+
+    def _sample_loop(self) -> None:
+        # sampling must never interfere with the experiment itself
+        try:
+            container = self._wait_for_container()
+            if container is not None:
+                self._sample(container)
+        except Exception as e:  # pylint: disable=broad-except
+            logger.warning(f"Sampling stats of {self.container_name} failed: {e}")
+
+    def _wait_for_container(self):
+        client = docker.from_env()
+        deadline = time.monotonic() + self.start_timeout
+        while not self._stop_event.is_set() and time.monotonic() < deadline:
+            try:
+                return client.containers.get(self.container_name)
+            except docker.errors.NotFound:
+                self._stop_event.wait(0.5)
+        return None
+
+    def _sample(self, container) -> None:
+        self.timeline_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.timeline_path, "w", encoding="utf-8", newline="") as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=COLUMNS)
+            writer.writeheader()
+            self.start_time = time.time()
+            last_sample_time = None
+            prev_stats = None
+            # stream yields stats about every second until container stops
+            for stats in container.stats(stream=True, decode=True):
+                if self._stop_event.is_set():
+                    break
+                now = time.monotonic()
+                if last_sample_time is not None and (
+                    now - last_sample_time < self.interval
+                ):
+                    continue
+                last_sample_time = now
+                row = parse_stats(stats, prev_stats)
+                if row is None:
+                    break  # container has stopped
+                row["time"] = round(time.time() - self.start_time, 1)
+                self.add_sample(row, writer)
+                csv_file.flush()
+                prev_stats = stats
+
+
+def parse_stats(stats: dict, prev_stats: dict = None) -> dict:
+    """Parse Docker stats of container into row of CSV timeline.
+
+    Args:
+        stats (dict): decoded stats as returned by the Docker API.
+        prev_stats (dict, optional): stats of previous sample, over which the CPU
+            usage is averaged. Defaults to None, in which case the `precpu_stats`
+            of the given stats are used.
+
+    Returns:
+        dict: values of COLUMNS (except time), or None if the stats are empty
+            because the container has stopped.
+    """
+    memory_stats = stats.get("memory_stats") or {}
+    if "usage" not in memory_stats:
+        return None
+    memory_details = memory_stats.get("stats") or {}
+    # page cache is excluded as in `docker stats` (cgroup v2 and v1 key names)
+    cache = memory_details.get(
+        "inactive_file", memory_details.get("total_inactive_file", 0)
+    )
+
+    blk_read_bytes = blk_write_bytes = 0
+    blkio_stats = stats.get("blkio_stats") or {}
+    for entry in blkio_stats.get("io_service_bytes_recursive") or []:
+        if entry["op"].lower() == "read":
+            blk_read_bytes += entry["value"]
+        elif entry["op"].lower() == "write":
+            blk_write_bytes += entry["value"]
+
+    networks = (stats.get("networks") or {}).values()
+
+    return {
+        "cpu_percent": _get_cpu_percent(
+            stats["cpu_stats"],
+            prev_stats["cpu_stats"] if prev_stats else stats.get("precpu_stats"),
+        ),
+        "mem_bytes": memory_stats["usage"] - cache,
+        "mem_limit_bytes": memory_stats.get("limit"),
+        "shm_bytes": memory_details.get("shmem", memory_details.get("total_shmem", 0)),
+        "pids": (stats.get("pids_stats") or {}).get("current", 0),
+        "blk_read_bytes": blk_read_bytes,
+        "blk_write_bytes": blk_write_bytes,
+        "net_rx_bytes": sum(network["rx_bytes"] for network in networks),
+        "net_tx_bytes": sum(network["tx_bytes"] for network in networks),
+    }
+
+
+def _get_cpu_percent(cpu_stats: dict, prev_cpu_stats: dict) -> float:
+    """Get CPU usage in percent of one core, as shown by `docker stats`."""
+    if not prev_cpu_stats or "system_cpu_usage" not in prev_cpu_stats:
+        return 0.0
+    cpu_delta = (
+        cpu_stats["cpu_usage"]["total_usage"]
+        - prev_cpu_stats["cpu_usage"]["total_usage"]
+    )
+    system_delta = cpu_stats["system_cpu_usage"] - prev_cpu_stats["system_cpu_usage"]
+    if system_delta <= 0:
+        return 0.0
+    num_cpus = cpu_stats.get("online_cpus") or len(
+        cpu_stats["cpu_usage"].get("percpu_usage") or [None]
+    )
+    return round(100 * num_cpus * cpu_delta / system_delta, 2)
@@ -9,6 +9,7 @@ import pathlib
 import yaml
 import copy
 import contextlib
+import time
 from typing import Union
 
 # To enable compatiblity with Python<=3.6 (e.g. for sinergym dockerfile)
@@ -22,8 +23,11 @@ except ImportError:
 
 import beobench.experiment.containers
 import beobench.experiment.config_parser
+import beobench.experiment.metrics
+import beobench.experiment.resources
 import beobench.utils
 import beobench.logging
+import beobench.wrappers.registry
 from beobench.logging import logger
 from beobench.constants import CONTAINER_DATA_DIR, CONTAINER_RO_DIR, AVAILABLE_AGENTS
 
@@ -135,6 +139,35 @@ def run(
 
     # running experiment num_samples times
     num_samples = config["general"]["num_samples"]
+    metrics = None
+    if not no_additional_container:
+        metrics = _start_metrics(config)
+    if metrics is not None:
+        metrics.queue(num_samples)
+
+    try:
+        _run_samples(config, num_samples, no_additional_container, metrics)
+    finally:
+        if metrics is not None:
+            metrics.stop()
+
+
+def _run_samples(
+    config: dict,
+    num_samples: int,
+    no_additional_container: bool,
+    metrics: beobench.experiment.metrics.ExperimentMetrics = None,
+) -> None:
+    """Run experiment samples one after another.
+
+    Args:
+        config (dict): Beobench configuration.
+        num_samples (int): number of experiment samples to run.
+        no_additional_container (bool): whether to run experiments in the current
+            container instead of starting another container.
+        metrics (ExperimentMetrics, optional): live experiment metrics to update.
+            Defaults to None.
+    """
     for i in range(1, num_samples + 1):
         # TODO: enable checking whether something is run in container
         # and do not print the statement below if inside experiment container.
@@ -160,6 +193,10 @@ def run(
         config = beobench.utils.merge_dicts(
             a=config, b=autogen_config, let_b_overrule_a=True
         )
+        # fingerprint is saved with the run's config to allow grouping of results
+        config["autogen"][
+            "fingerprint"
+        ] = beobench.experiment.config_parser.fingerprint(config)
 
         if no_additional_container:
             # Execute experiment
@@ -178,14 +215,56 @@ def run(
             # First build container image and then execute experiment inside container
             # But only run one experiment per container.
             config["general"]["num_samples"] = 1
-            _build_and_run_in_container(config)
+            if metrics is None:
+                _build_and_run_in_container(config)
+                continue
+            metrics.start(config["autogen"]["run_id"])
+            exit_code = None
+            try:
+                exit_code = _build_and_run_in_container(config, metrics=metrics)
+            finally:
+                metrics.finish(success=exit_code == 0)
+
 
+def _start_metrics(config: dict) -> beobench.experiment.metrics.ExperimentMetrics:
+    """Start live experiment metrics endpoint and/or textfile writer if configured.
 
-def _build_and_run_in_container(config: dict) -> None:
+    Args:
+        config (dict): Beobench configuration.
+
+    Returns:
+        ExperimentMetrics: live experiment metrics, or None if neither
+            `general.metrics_port` nor `general.metrics_textfile` is set.
+    """
+    port = config["general"]["metrics_port"]
+    textfile = config["general"]["metrics_textfile"]
+    if not port and not textfile:
+        return None
+
+    metrics = beobench.experiment.metrics.ExperimentMetrics(
+        local_dir=config["general"]["local_dir"]
+    )
+    if port:
+        metrics.serve(port)
+        logger.info(f"Serving live experiment metrics on http://127.0.0.1:{port}.")
+    if textfile:
+        metrics.start_textfile_writer(textfile)
+        logger.info(f"Writing live experiment metrics to {textfile}.")
+    return metrics
+
+
+def _build_and_run_in_container(
+    config: dict, metrics: beobench.experiment.metrics.ExperimentMetrics = None
+) -> int:
     """Build container image and run experiment in docker container.
 
     Args:
         config (dict): Beobench configuration.
+        metrics (ExperimentMetrics, optional): live experiment metrics that the
+            image build duration is added to. Defaults to None.
+
+    Returns:
+        int: exit code of docker container (0 means success).
     """
 
     # We need to deepcopy the config as some sensitive data (API keys) is deleted at
@@ -208,13 +287,20 @@ def _build_and_run_in_container(config: dict) -> None:
     else:
         beobench_extras = config["general"]["beobench_extras"]
 
-    image_tag = beobench.experiment.containers.build_experiment_container(
-        build_context=config["env"]["gym"],
-        use_no_cache=config["general"]["use_no_cache"],
-        beobench_extras=beobench_extras,
-        beobench_package=config["general"]["dev_path"],
-        force_build=config["general"]["force_build"],
-    )
+    build_start = time.monotonic()
+    build_success = False
+    try:
+        image_tag = beobench.experiment.containers.build_experiment_container(
+            build_context=config["env"]["gym"],
+            use_no_cache=config["general"]["use_no_cache"],
+            beobench_extras=beobench_extras,
+            beobench_package=config["general"]["dev_path"],
+            force_build=config["general"]["force_build"],
+        )
+        build_success = True
+    finally:
+        if metrics is not None:
+            metrics.add_build(time.monotonic() - build_start, success=build_success)
 
     ### part 2: create args and run command in docker container
     if config["general"]["docker_flags"] is None:
@@ -232,6 +318,25 @@ def _build_and_run_in_container(config: dict) -> None:
     # We don't want the key to be logged in wandb
     del config["general"]["wandb_api_key"]
 
+    # Mount wrapper files given by user and point config to their location
+    # inside the container
+    mounted_wrapper_files = set()
+    for wrapper_dict in config["wrappers"]:
+        wrapper_file = pathlib.Path(wrapper_dict["origin"])
+        if wrapper_file.suffix == ".py" and wrapper_file.is_file():
+            # files with same name from different dirs must not share mount point
+            wrapper_file_id = beobench.wrappers.registry.get_file_id(wrapper_file)
+            wrapper_file_on_docker_abs = (
+                CONTAINER_RO_DIR / "wrappers" / f"{wrapper_file_id}.py"
+            ).absolute()
+            if wrapper_file_id not in mounted_wrapper_files:
+                mounted_wrapper_files.add(wrapper_file_id)
+                docker_flags += [
+                    "-v",
+                    f"{wrapper_file.absolute()}:{wrapper_file_on_docker_abs}:ro",
+                ]
+            wrapper_dict["origin"] = str(wrapper_file_on_docker_abs)
+
     # Save config to local dir and add mount flag for config
     config_path = local_dir_path / "tmp" / "config.yaml"
     config_path.parent.mkdir(parents=True, exist_ok=True)
@@ -318,8 +423,37 @@ def _build_and_run_in_container(config: dict) -> None:
             arg_str = arg_str.replace(wandb_api_key, "<API_KEY_HIDDEN>")
         logger.info(f"Executing docker command: {arg_str}")
 
-        # subprocess.check_call(args)
-        beobench.utils.run_command(args, process_name="container")
+        # complete container output is written to per-run log file, the console
+        # only shows a (rate-limited and filtered) view of it
+        log_path = local_dir_path / "logs" / f"{config['autogen']['run_id']}.log.gz"
+        logger.info(f"Writing container output to {log_path}.")
+
+        # sample resource usage of container while it runs
+        stats_interval = config["general"]["container_stats_interval"]
+        if stats_interval:
+            stats_path = local_dir_path / "resources" / config["autogen"]["run_id"]
+            logger.info(f"Writing container resource usage to {stats_path}.*")
+            stats_sampler = beobench.experiment.resources.ContainerStatsSampler(
+                container_name,
+                timeline_path=f"{stats_path}.csv",
+                summary_path=f"{stats_path}.summary.json",
+                interval=stats_interval,
+            ).start()
+        else:
+            stats_sampler = None
+
+        try:
+            # subprocess.check_call(args)
+            return beobench.utils.run_command(
+                args,
+                process_name="container",
+                log_path=log_path,
+                max_lines_per_sec=config["general"]["console_log_max_lines_per_sec"],
+                line_filter=config["general"]["console_log_filter"],
+            )
+        finally:
+            if stats_sampler is not None:
+                stats_sampler.stop()
 
 
 def _create_config_from_kwargs(**kwargs) -> dict:
@@ -0,0 +1,157 @@
+"""Snapshot and restore the state of (wrapped) environments.
+
+Every layer of a wrapped environment (the integration's env and each wrapper) can
+take part in snapshots by implementing two methods:
+
+- `get_state()`, returning an object with the current state of this layer that is
+  not changed by any further interaction with the environment.
+- `set_state(state)`, restoring the layer to the given state without changing it.
+
+Integrations whose simulators support saving their state (e.g. FMU get/set state)
+can implement these methods directly. For all other integrations the
+`ActionReplay` wrapper records all actions since the last reset and restores a
+state by replaying them. Layers below an `ActionReplay` wrapper are restored by
+this replay, so their own states are not saved in snapshots.
+"""
+
+import copy
+
+import gym
+
+import beobench.experiment.batch
+
+
+class ActionReplay(gym.Wrapper):
+    """Wrapper enabling snapshots by replaying actions since the last reset."""
+
+    def __init__(self, env: gym.Env):
+        """Wrapper enabling snapshots by replaying actions since the last reset.
+
+        This requires the wrapped environment to be deterministic.
+
+        Args:
+            env (gym.Env): environment to wrap.
+        """
+        super().__init__(env)
+        self.reset_kwargs = {}
+        self.actions = []
+
+    def reset(self, **kwargs):
+        self.reset_kwargs = kwargs
+        self.actions = []
+        return self.env.reset(**kwargs)
+
+    def step(self, action):
+        self.actions.append(copy.deepcopy(action))
+        return self.env.step(action)
+
+    def step_many(self, actions):
+        obs, rewards, dones, infos = beobench.experiment.batch.step_many(
+            self.env, actions
+        )
+        self.actions += copy.deepcopy(list(actions)[: len(rewards)])
+        return obs, rewards, dones, infos
+
+    def get_state(self) -> dict:
+        return {"reset_kwargs": dict(self.reset_kwargs), "actions": list(self.actions)}
+
+    def set_state(self, state: dict) -> None:
+        self.reset(**state["reset_kwargs"])
+        for action in state["actions"]:
+            self.step(action)
+
+
+def supports_state(env: gym.Env) -> bool:
+    """Check whether single env layer implements get_state() and set_state().
+
+    Methods are looked up on the class, as gym wrappers forward unknown attributes
+    to the wrapped environment.
+
+    Args:
+        env (gym.Env): environment or wrapper.
+
+    Returns:
+        bool: whether env layer supports snapshots.
+    """
+    return callable(getattr(type(env), "get_state", None)) and callable(
+        getattr(type(env), "set_state", None)
+    )
+
+
+def get_layers(env: gym.Env) -> list:
+    """Get all layers of wrapped environment.
+
+    Args:
+        env (gym.Env): (wrapped) environment.
+
+    Returns:
+        list: list of wrappers from outermost to innermost, followed by unwrapped env.
+    """
+    layers = [env]
+    while isinstance(layers[-1], gym.Wrapper):
+        layers.append(layers[-1].env)
+    return layers
+
+
+def snapshot(env: gym.Env) -> list:
+    """Take snapshot of state of environment and all its wrappers.
+
+    Args:
+        env (gym.Env): (wrapped) environment.
+
+    Raises:
+        ValueError: if the state of the unwrapped environment can't be saved.
+
+    Returns:
+        list: snapshot that can be given to restore().
+    """
+    layers = get_layers(env)
+    if not supports_state(layers[-1]) and not any(
+        isinstance(layer, ActionReplay) for layer in layers
+    ):
+        raise ValueError(
+            (
+                "Environment does not support snapshots. Set general.env_snapshots "
+                "to True in config to enable snapshots via action replay."
+            )
+        )
+
+    states = []
+    below_replay = False
+    for layer in layers:
+        if below_replay or not supports_state(layer):
+            states.append((type(layer).__name__, None))
+        else:
+            states.append((type(layer).__name__, layer.get_state()))
+        below_replay = below_replay or isinstance(layer, ActionReplay)
+    return states
+
+
+def restore(env: gym.Env, state: list) -> None:
+    """Restore environment and all its wrappers to snapshot.
+
+    The same snapshot can be restored multiple times, e.g. to evaluate multiple
+    policies starting from the same state.
+
+    Args:
+        env (gym.Env): (wrapped) environment that the snapshot was taken from, or
+            an environment with identical wrappers.
+        state (list): snapshot as returned by snapshot().
+
+    Raises:
+        ValueError: if the wrappers of env do not match the snapshot.
+    """
+    layers = get_layers(env)
+    layer_names = [type(layer).__name__ for layer in layers]
+    if layer_names != [name for name, _ in state]:
+        raise ValueError(
+            (
+                f"Snapshot with layers {[name for name, _ in state]} does not match "
+                f"environment with layers {layer_names}."
+            )
+        )
+
+    # Restore from innermost to outermost layer
+    for layer, (_, layer_state) in reversed(list(zip(layers, state))):
+        if layer_state is not None:
+            layer.set_state(layer_state)
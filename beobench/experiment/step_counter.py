@@ -0,0 +1,100 @@
+"""Env step counters written for the live experiment metrics of the scheduler.
+
+The counters of each env are written as a small JSON file to
+`<local_dir>/metrics/live/`, and read on the host by
+beobench.experiment.metrics.ExperimentMetrics.
+"""
+
+import json
+import os
+import pathlib
+import time
+
+import gym
+
+import beobench.experiment.batch
+
+
+class StepCounter(gym.Wrapper):
+    """Wrapper counting env steps and writing them to a live metrics file."""
+
+    def __init__(
+        self,
+        env: gym.Env,
+        path: str,
+        run_id: str,
+        sim_seconds_per_step: float = None,
+        write_interval: float = 5.0,
+    ):
+        """Wrapper counting env steps and writing them to a live metrics file.
+
+        Args:
+            env (gym.Env): environment to wrap.
+            path (str): path of JSON file that counters are written to.
+            run_id (str): id of run the env belongs to.
+            sim_seconds_per_step (float, optional): simulated seconds per env step,
+                e.g. 900 for 15 minute steps. Defaults to None.
+            write_interval (float, optional): minimum seconds between writes of the
+                counters. Defaults to 5.0.
+        """
+        super().__init__(env)
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.run_id = run_id
+        self.sim_seconds_per_step = sim_seconds_per_step
+        self.write_interval = write_interval
+        self.num_steps = 0
+        self.num_resets = 0
+        self._start_time = time.time()
+        self._last_write = time.monotonic()
+        self.write()
+
+    def step(self, action):
+        result = self.env.step(action)
+        self.num_steps += 1
+        if time.monotonic() - self._last_write >= self.write_interval:
+            self.write()
+        return result
+
+    def reset(self, **kwargs):
+        self.num_resets += 1
+        return self.env.reset(**kwargs)
+
+    def step_many(self, actions):
+        result = beobench.experiment.batch.step_many(self.env, actions)
+        self.num_steps += len(result[1])
+        if time.monotonic() - self._last_write >= self.write_interval:
+            self.write()
+        return result
+
+    def close(self):
+        self.write()
+        self.env.close()
+
+    def get_state(self) -> dict:
+        return {"num_steps": self.num_steps, "num_resets": self.num_resets}
+
+    def set_state(self, state: dict) -> None:
+        self.num_steps = state["num_steps"]
+        self.num_resets = state["num_resets"]
+        self.write()
+
+    def write(self) -> None:
+        """Write counters to file (atomically)."""
+        self._last_write = time.monotonic()
+        counters = {
+            "run_id": self.run_id,
+            "env_steps": self.num_steps,
+            "env_resets": self.num_resets,
+            "sim_seconds": (
+                self.num_steps * self.sim_seconds_per_step
+                if self.sim_seconds_per_step
+                else None
+            ),
+            "start_time": self._start_time,
+            "update_time": time.time(),
+        }
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as json_file:
+            json.dump(counters, json_file)
+        os.replace(tmp_path, self.path)
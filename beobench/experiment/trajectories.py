@@ -0,0 +1,264 @@
+"""Columnar storage of recorded environment trajectories.
+
+A trajectory directory contains the pickled observation and action spaces
+(`spaces.pkl`) and numbered chunk files (`chunk_000000.npz`, ...). Each chunk holds
+one array per column with one row per recorded step. Resets are recorded as rows as
+well (with `reset` set to True), such that the initial observation of each episode
+is available:
+
+- `reset`: whether row is the return of env.reset().
+- `obs` or `obs.<key>`: observation (by key for dict observation spaces).
+- `action` or `action.<key>`: action taken (NaN or zeros for reset rows).
+- `reward` and `done`: returns of env.step() (0 and False for reset rows).
+- `info.<key>`: numeric info values, with nested info dicts flattened.
+"""
+
+import pathlib
+import pickle
+import queue
+import threading
+
+import numpy as np
+
+from beobench.utils import flatten_dict
+
+SPACES_FILE = "spaces.pkl"
+CHUNK_PATTERN = "chunk_*.npz"
+
+_STOP = object()
+
+
+class TrajectoryWriter:
+    """Writer appending trajectory rows to chunk files in a background thread."""
+
+    def __init__(
+        self,
+        path: str,
+        observation_space=None,
+        action_space=None,
+        chunk_size: int = 1000,
+        max_queued_chunks: int = 8,
+        compress: bool = False,
+    ):
+        """Writer appending trajectory rows to chunk files in a background thread.
+
+        Adding rows only appends references to the current chunk. Full chunks are
+        converted to columns and written by the writer thread. If the writer falls
+        behind by more than max_queued_chunks, adding rows blocks until a chunk has
+        been written.
+
+        Args:
+            path (str): trajectory directory.
+            observation_space (gym.Space, optional): observation space saved with
+                the trajectory. Defaults to None.
+            action_space (gym.Space, optional): action space saved with the
+                trajectory. Defaults to None.
+            chunk_size (int, optional): number of rows per chunk file. Defaults to
+                1000.
+            max_queued_chunks (int, optional): maximum number of chunks waiting to
+                be written. Defaults to 8.
+            compress (bool, optional): whether to compress chunk files. Defaults to
+                False.
+        """
+        self.path = pathlib.Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        with open(self.path / SPACES_FILE, "wb") as spaces_file:
+            pickle.dump(
+                {"observation_space": observation_space, "action_space": action_space},
+                spaces_file,
+            )
+
+        self.chunk_size = chunk_size
+        self.compress = compress
+        self.num_chunks = 0
+        self._rows = []
+        self._queue = queue.Queue(maxsize=max_queued_chunks)
+        self._error = None
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+
+    def add(self, row: dict) -> None:
+        """Add row to trajectory.
+
+        Args:
+            row (dict): column values of row. Array values must not be modified
+                after adding them.
+        """
+        self._rows.append(row)
+        if len(self._rows) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Queue current (partial) chunk to be written."""
+        if self._error is not None:
+            raise RuntimeError("Trajectory writer thread failed.") from self._error
+        if self._rows:
+            self._queue.put((self.num_chunks, self._rows))
+            self.num_chunks += 1
+            self._rows = []
+
+    def close(self) -> None:
+        """Write all remaining rows and stop writer thread."""
+        if not self._thread.is_alive():
+            return
+        self.flush()
+        self._queue.put(_STOP)
+        self._thread.join()
+        if self._error is not None:
+            raise RuntimeError("Trajectory writer thread failed.") from self._error
+
+    def _write_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            if self._error is not None:
+                continue  # drain queue so that producer is never blocked
+            chunk_index, rows = item
+            try:
+                self._write_chunk(chunk_index, rows)
+            except Exception as e:  # pylint: disable=broad-except
+                self._error = e
+
+    def _write_chunk(self, chunk_index: int, rows: list) -> None:
+        save_fn = np.savez_compressed if self.compress else np.savez
+        # write to temporary file first, such that readers never see partial chunks
+        tmp_path = self.path / f"chunk_{chunk_index:06d}.tmp.npz"
+        save_fn(tmp_path, **rows_to_columns(rows))
+        tmp_path.rename(self.path / f"chunk_{chunk_index:06d}.npz")
+
+
+def make_row(
+    obs, action=None, reward: float = 0.0, done: bool = False, info: dict = None
+) -> dict:
+    """Make trajectory row from return values of env.step() or env.reset().
+
+    Args:
+        obs: observation.
+        action (optional): action taken. Defaults to None, in which case the row is
+            a reset row.
+        reward (float, optional): reward. Defaults to 0.0.
+        done (bool, optional): done flag. Defaults to False.
+        info (dict, optional): info dict. Defaults to None.
+
+    Returns:
+        dict: column values of row.
+    """
+    row = {"reset": action is None, "reward": reward, "done": done}
+    _add_values(row, "obs", obs)
+    if action is not None:
+        _add_values(row, "action", action)
+    if info:
+        for key, value in flatten_dict(info).items():
+            if isinstance(value, (bool, int, float, np.number, np.bool_, np.ndarray)):
+                row[f"info.{key}"] = value
+    return row
+
+
+def rows_to_columns(rows: list) -> dict:
+    """Convert trajectory rows to column arrays.
+
+    Values missing in a row (e.g. actions of reset rows or info values only given
+    in some steps) are filled with NaN for float columns and zeros otherwise.
+
+    Args:
+        rows (list): list of row dicts.
+
+    Returns:
+        dict: array with one entry per row for each column.
+    """
+    columns = {}
+    for row in rows:
+        for key, value in row.items():
+            if key not in columns:
+                columns[key] = np.asarray(value)
+    for key, template in columns.items():
+        fill_value = np.full_like(template, np.nan if template.dtype.kind == "f" else 0)
+        columns[key] = np.stack([row.get(key, fill_value) for row in rows])
+    return columns
+
+
+def load_spaces(path: str) -> tuple:
+    """Load observation and action space of trajectory.
+
+    Args:
+        path (str): trajectory directory.
+
+    Returns:
+        tuple: observation space and action space.
+    """
+    with open(pathlib.Path(path) / SPACES_FILE, "rb") as spaces_file:
+        spaces = pickle.load(spaces_file)
+    return spaces["observation_space"], spaces["action_space"]
+
+
+def get_chunk_paths(path: str) -> list:
+    """Get paths of all chunk files of trajectory, in order of recording.
+
+    Args:
+        path (str): trajectory directory.
+
+    Returns:
+        list: paths of chunk files.
+    """
+    return sorted(
+        chunk_path
+        for chunk_path in pathlib.Path(path).glob(CHUNK_PATTERN)
+        if not chunk_path.name.endswith(".tmp.npz")
+    )
+
+
+def load_columns(path: str) -> dict:
+    """Load all chunks of trajectory into column arrays.
+
+    Args:
+        path (str): trajectory directory.
+
+    Returns:
+        dict: array with one entry per recorded row for each column.
+    """
+    chunks = []
+    for chunk_path in get_chunk_paths(path):
+        with np.load(chunk_path) as chunk:
+            chunks.append(dict(chunk))
+    return concatenate_chunks(chunks)
+
+
+def concatenate_chunks(chunks: list) -> dict:
+    """Concatenate column dicts of chunks, filling columns missing in a chunk.
+
+    Args:
+        chunks (list): list of dicts of column arrays.
+
+    Returns:
+        dict: concatenated column arrays.
+    """
+    templates = {}
+    for chunk in chunks:
+        for key, values in chunk.items():
+            templates.setdefault(key, values[:0])
+
+    columns = {}
+    for key, template in templates.items():
+        parts = []
+        for chunk in chunks:
+            if key in chunk:
+                parts.append(chunk[key])
+            else:
+                num_rows = len(chunk["reset"])
+                fill_value = np.nan if template.dtype.kind == "f" else 0
+                parts.append(
+                    np.full(
+                        (num_rows,) + template.shape[1:], fill_value, template.dtype
+                    )
+                )
+        columns[key] = np.concatenate(parts)
+    return columns
+
+
+def _add_values(row: dict, prefix: str, value) -> None:
+    if isinstance(value, dict):
+        for key, sub_value in flatten_dict(value).items():
+            row[f"{prefix}.{key}"] = np.array(sub_value)
+    else:
+        row[prefix] = np.array(value)
@@ -0,0 +1,258 @@
+"""On-disk cache of transitions of deterministic environments.
+
+Each transition is keyed by a hash of the environment key (e.g. the fingerprint of
+the env config), the reset kwargs and all actions taken since the last reset. As
+long as transitions are in the cache, the simulator is not stepped at all. On the
+first cache miss, the simulator catches up by resetting and replaying the actions
+of the current episode, and transitions are simulated (and cached) from then on.
+
+This is only correct for deterministic environments whose transitions depend only
+on the env config and the reset kwargs and actions since the last reset.
+"""
+
+import copy
+import hashlib
+import pathlib
+import pickle
+import sqlite3
+import time
+
+import gym
+
+_PICKLE_PROTOCOL = pickle.HIGHEST_PROTOCOL
+
+
+class TransitionStore:
+    """SQLite store of pickled transitions with size-based LRU eviction."""
+
+    def __init__(
+        self,
+        path: str,
+        max_size: int,
+        access_batch_size: int = 100,
+        put_batch_size: int = 100,
+    ):
+        """SQLite store of pickled transitions with size-based LRU eviction.
+
+        The store can be shared by multiple processes (e.g. RLlib workers). Writes
+        are batched into short transactions, such that the database is never locked
+        for long. New transitions only become visible to other processes once their
+        batch is written.
+
+        Args:
+            path (str): path of SQLite database file.
+            max_size (int): maximum total size of stored transitions in bytes. Least
+                recently used transitions are evicted once this size is exceeded.
+            access_batch_size (int, optional): number of cache hits after which their
+                access times (used for eviction) are updated in a single short
+                transaction. Defaults to 100.
+            put_batch_size (int, optional): number of new transitions that are
+                written in a single short transaction. Defaults to 100.
+        """
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        self.access_batch_size = access_batch_size
+        self.put_batch_size = put_batch_size
+
+        self._conn = sqlite3.connect(str(self.path), timeout=60)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            (
+                "CREATE TABLE IF NOT EXISTS transitions (key TEXT PRIMARY KEY, "
+                "value BLOB NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS last_access_idx ON transitions (last_access)"
+        )
+        self._conn.commit()
+        self._size = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM transitions"
+        ).fetchone()[0]
+        self._accesses = []  # (access time, key) of cache hits not yet written
+        self._puts = {}  # key: (blob, put time) of transitions not yet written
+
+    def get(self, key: str):
+        """Get transition from store.
+
+        Args:
+            key (str): key of transition.
+
+        Returns:
+            stored transition, or None if key not in store.
+        """
+        if key in self._puts:
+            blob = self._puts[key][0]
+        else:
+            row = self._conn.execute(
+                "SELECT value FROM transitions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            blob = row[0]
+        self._accesses.append((time.time(), key))
+        if len(self._accesses) >= self.access_batch_size:
+            self.flush_accesses()
+        return pickle.loads(blob)
+
+    def put(self, key: str, value) -> None:
+        """Add transition to store, evicting old transitions if necessary.
+
+        Args:
+            key (str): key of transition.
+            value: picklable transition.
+        """
+        blob = pickle.dumps(value, protocol=_PICKLE_PROTOCOL)
+        self._puts[key] = (blob, time.time())
+        self._size += len(blob)
+        if self._size > self.max_size:
+            self.evict()
+        elif len(self._puts) >= self.put_batch_size:
+            self.flush_puts()
+
+    def flush_puts(self) -> None:
+        """Write transitions added since last flush to store."""
+        if self._puts:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO transitions VALUES (?, ?, ?, ?)",
+                    [
+                        (key, blob, len(blob), put_time)
+                        for key, (blob, put_time) in self._puts.items()
+                    ],
+                )
+            self._puts = {}
+
+    def flush_accesses(self) -> None:
+        """Write access times of cache hits since last flush to store."""
+        # pending puts first, such that their access times are not lost
+        self.flush_puts()
+        if self._accesses:
+            with self._conn:
+                self._conn.executemany(
+                    "UPDATE transitions SET last_access = ? WHERE key = ?",
+                    self._accesses,
+                )
+            self._accesses = []
+
+    def evict(self) -> None:
+        """Evict least recently used transitions until store is below 90% of max."""
+        self.flush_accesses()
+        self._size = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM transitions"
+        ).fetchone()[0]
+        target_size = 0.9 * self.max_size
+        if self._size <= target_size:
+            return
+        evicted_keys = []
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM transitions ORDER BY last_access"
+        ).fetchall():
+            if self._size <= target_size:
+                break
+            evicted_keys.append((key,))
+            self._size -= size
+        with self._conn:
+            self._conn.executemany(
+                "DELETE FROM transitions WHERE key = ?", evicted_keys
+            )
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self.flush_accesses()
+            self._conn.close()
+            self._conn = None
+
+
+class TransitionCache(gym.Wrapper):
+    """Wrapper serving transitions from a TransitionStore where possible."""
+
+    def __init__(self, env: gym.Env, store: TransitionStore, env_key: str):
+        """Wrapper serving transitions from a TransitionStore where possible.
+
+        This wrapper must directly wrap the integration's environment, and requires
+        this environment to be deterministic.
+
+        Args:
+            env (gym.Env): environment to wrap.
+            store (TransitionStore): store of cached transitions.
+            env_key (str): key identifying environment, e.g. fingerprint of env
+                config.
+        """
+        super().__init__(env)
+        self.store = store
+        self.env_key = env_key
+        # reset kwargs and actions of current episode, for simulator catch-up
+        self.reset_kwargs = None
+        self.actions = []
+        self.num_hits = 0
+        self.num_misses = 0
+        self._hash = None
+        # number of steps in current episode the simulator is at, or None if the
+        # simulator has not been reset for the current episode
+        self._sim_steps = None
+
+    def reset(self, **kwargs):
+        self.reset_kwargs = kwargs
+        self.actions = []
+        self._sim_steps = None
+        self._hash = hashlib.sha256(
+            pickle.dumps(
+                (self.env_key, sorted(kwargs.items())), protocol=_PICKLE_PROTOCOL
+            )
+        )
+        return self._get_transition(lambda: self.env.reset(**kwargs))
+
+    def step(self, action):
+        if self._hash is None:
+            raise RuntimeError("Environment must be reset before calling step().")
+        self.actions.append(copy.deepcopy(action))
+        self._hash.update(pickle.dumps(action, protocol=_PICKLE_PROTOCOL))
+        return self._get_transition(lambda: self.env.step(action))
+
+    def close(self):
+        self.store.close()
+        self.env.close()
+
+    def get_state(self) -> dict:
+        # The simulator position is saved as well, as it is restored together with
+        # the state of the (natively snapshotted) simulator below this wrapper.
+        return {
+            "reset_kwargs": copy.deepcopy(self.reset_kwargs),
+            "actions": copy.deepcopy(self.actions),
+            "hash": self._hash.copy() if self._hash is not None else None,
+            "sim_steps": self._sim_steps,
+        }
+
+    def set_state(self, state: dict) -> None:
+        self.reset_kwargs = copy.deepcopy(state["reset_kwargs"])
+        self.actions = copy.deepcopy(state["actions"])
+        self._hash = state["hash"].copy() if state["hash"] is not None else None
+        self._sim_steps = state["sim_steps"]
+
+    def _get_transition(self, simulate_fn):
+        key = self._hash.hexdigest()
+        transition = self.store.get(key)
+        if transition is not None:
+            self.num_hits += 1
+            return transition
+
+        self.num_misses += 1
+        self._catch_up()
+        transition = simulate_fn()
+        self._sim_steps = len(self.actions)
+        self.store.put(key, transition)
+        return transition
+
+    def _catch_up(self) -> None:
+        """Bring simulator to the state before the current reset or step."""
+        if not self.actions:
+            # current call is a reset
+            return
+        if self._sim_steps is None:
+            self.env.reset(**self.reset_kwargs)
+            self._sim_steps = 0
+        for action in self.actions[self._sim_steps : -1]:
+            self.env.step(action)
+        self._sim_steps = len(self.actions) - 1
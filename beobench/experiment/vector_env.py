@@ -0,0 +1,292 @@
+"""Vectorised environments that step multiple env instances in subprocess workers.
+
+Observations, rewards and dones are exchanged via memory-mapped buffers in shared
+memory (`/dev/shm` if available), only actions and infos are sent via pipes.
+"""
+
+import multiprocessing
+import os
+import pathlib
+import shutil
+import tempfile
+import traceback
+
+import gym
+import gym.spaces
+import numpy as np
+
+SHM_DIR = pathlib.Path("/dev/shm")
+
+
+class VectorEnvWorkerError(Exception):
+    pass
+
+
+class VectorEnv:
+    """Vectorised environment stepping multiple env instances in subprocesses."""
+
+    def __init__(
+        self,
+        env_fns: list,
+        seeds: list = None,
+        context: str = None,
+        copy: bool = True,
+    ):
+        """Vectorised environment stepping multiple env instances in subprocesses.
+
+        Args:
+            env_fns (list): list of callables that each create a single environment.
+                With a context other than `fork` these callables must be picklable.
+            seeds (list, optional): seed for each environment. Defaults to None, in
+                which case environments are not seeded.
+            context (str, optional): multiprocessing start method. Defaults to None,
+                which uses `fork` if available.
+            copy (bool, optional): whether to return copies of the shared observation
+                and reward buffers. If False, the returned arrays are overwritten
+                by the next step. Defaults to True.
+        """
+
+        if seeds is None:
+            seeds = [None] * len(env_fns)
+        if context is None and "fork" in multiprocessing.get_all_start_methods():
+            context = "fork"
+
+        self.num_envs = len(env_fns)
+        self.copy = copy
+        self.closed = False
+        self._waiting = False
+        self._buffer_dir = None
+        # indices of workers that stopped due to an error
+        self._failed_workers = set()
+
+        ctx = multiprocessing.get_context(context)
+        self._remotes, work_remotes = zip(*[ctx.Pipe() for _ in range(self.num_envs)])
+        self._processes = []
+        for work_remote, remote, env_fn, seed in zip(
+            work_remotes, self._remotes, env_fns, seeds
+        ):
+            process = ctx.Process(
+                target=_worker,
+                args=(work_remote, remote, env_fn, seed),
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+            work_remote.close()
+
+        # All workers create their env in parallel, the first one defines the spaces.
+        spaces = self._receive_all()
+        self.single_observation_space, self.single_action_space = spaces[0]
+        self.observation_space = _batch_box(
+            gym.spaces.flatten_space(self.single_observation_space), self.num_envs
+        )
+        self.action_space = self.single_action_space
+
+        self._buffer_dir = tempfile.mkdtemp(
+            prefix="beobench_vector_env_",
+            dir=SHM_DIR if SHM_DIR.is_dir() else None,
+        )
+        buffer_specs = {
+            "obs": (
+                (self.num_envs, self.observation_space.shape[1]),
+                self.observation_space.dtype,
+            ),
+            "rewards": ((self.num_envs,), np.float64),
+            "dones": ((self.num_envs,), np.bool_),
+        }
+        self._buffers = {}
+        for name, (shape, dtype) in buffer_specs.items():
+            path = os.path.join(self._buffer_dir, name)
+            self._buffers[name] = np.memmap(path, dtype=dtype, mode="w+", shape=shape)
+            buffer_specs[name] = (path, shape, np.dtype(dtype).str)
+
+        for index, remote in enumerate(self._remotes):
+            remote.send(("buffers", (buffer_specs, index)))
+        self._receive_all()
+
+    def reset(self) -> np.ndarray:
+        """Reset all environments.
+
+        Returns:
+            np.ndarray: stacked (flattened) observations.
+        """
+        self._check_workers()
+        for remote in self._remotes:
+            remote.send(("reset", None))
+        self._receive_all()
+        return self._get_buffer("obs")
+
+    def step_async(self, actions) -> None:
+        """Send actions to all environments without waiting for the results.
+
+        Args:
+            actions: sequence of actions, one per environment.
+        """
+        if self._waiting:
+            raise VectorEnvWorkerError("step_async() called twice without step_wait().")
+        self._check_workers()
+        for remote, action in zip(self._remotes, actions):
+            remote.send(("step", action))
+        self._waiting = True
+
+    def step_wait(self) -> tuple:
+        """Wait for steps started by step_async() to finish.
+
+        Environments that are done are automatically reset. Their final observation
+        is given in `info["terminal_observation"]`.
+
+        Returns:
+            tuple: stacked observations, rewards and dones, and list of infos.
+        """
+        self._waiting = False
+        infos = self._receive_all()
+        return (
+            self._get_buffer("obs"),
+            self._get_buffer("rewards"),
+            self._get_buffer("dones"),
+            infos,
+        )
+
+    def step(self, actions) -> tuple:
+        """Take synchronous step in all environments.
+
+        Args:
+            actions: sequence of actions, one per environment.
+
+        Returns:
+            tuple: stacked observations, rewards and dones, and list of infos.
+        """
+        self.step_async(actions)
+        return self.step_wait()
+
+    def close(self) -> None:
+        """Close all environments and worker processes.
+
+        Workers that stopped due to an error (or do not stop within a few seconds)
+        are terminated.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        if self._waiting:
+            try:
+                self._receive_all()
+            except VectorEnvWorkerError:
+                pass
+        for index, remote in enumerate(self._remotes):
+            if index not in self._failed_workers:
+                try:
+                    remote.send(("close", None))
+                except (BrokenPipeError, EOFError):
+                    self._failed_workers.add(index)
+            remote.close()
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        if self._buffer_dir is not None:
+            shutil.rmtree(self._buffer_dir, ignore_errors=True)
+
+    def _get_buffer(self, name: str) -> np.ndarray:
+        if self.copy:
+            return np.array(self._buffers[name])
+        else:
+            return self._buffers[name]
+
+    def _check_workers(self) -> None:
+        if self._failed_workers:
+            raise VectorEnvWorkerError(
+                f"Vector env workers {sorted(self._failed_workers)} stopped due to "
+                "an error. Close and recreate the vector env."
+            )
+
+    def _receive_all(self) -> list:
+        # results of all workers are received before raising, such that the
+        # pipes of the remaining workers stay in sync
+        results = []
+        for index, remote in enumerate(self._remotes):
+            if index in self._failed_workers:
+                results.append(("error", "Worker stopped after previous error."))
+                continue
+            try:
+                results.append(remote.recv())
+            except (EOFError, ConnectionResetError):
+                results.append(("error", "Worker process stopped unexpectedly."))
+            if results[-1][0] == "error":
+                self._failed_workers.add(index)
+        for status, content in results:
+            if status == "error":
+                raise VectorEnvWorkerError(f"Error in vector env worker:\n{content}")
+        return [content for _, content in results]
+
+    def __del__(self):
+        if not getattr(self, "closed", True):
+            self.close()
+
+
+def _worker(remote, parent_remote, env_fn, seed) -> None:
+    """Run single environment in worker process.
+
+    Args:
+        remote: worker end of pipe.
+        parent_remote: parent end of pipe (closed in worker).
+        env_fn: callable creating environment.
+        seed: seed of environment.
+    """
+    parent_remote.close()
+    try:
+        env = env_fn()
+        if seed is not None:
+            if hasattr(env, "seed"):
+                env.seed(seed)
+            env.action_space.seed(seed)
+        remote.send(("ok", (env.observation_space, env.action_space)))
+
+        buffers = {}
+        index = None
+        while True:
+            try:
+                command, data = remote.recv()
+            except EOFError:
+                break  # parent closed pipe without sending close command
+            if command == "step":
+                obs, reward, done, info = env.step(data)
+                if done:
+                    info["terminal_observation"] = gym.spaces.flatten(
+                        env.observation_space, obs
+                    )
+                    obs = env.reset()
+                buffers["obs"][index] = gym.spaces.flatten(env.observation_space, obs)
+                buffers["rewards"][index] = reward
+                buffers["dones"][index] = done
+                remote.send(("ok", info))
+            elif command == "reset":
+                obs = env.reset()
+                buffers["obs"][index] = gym.spaces.flatten(env.observation_space, obs)
+                remote.send(("ok", None))
+            elif command == "buffers":
+                buffer_specs, index = data
+                for name, (path, shape, dtype) in buffer_specs.items():
+                    buffers[name] = np.memmap(path, dtype=dtype, mode="r+", shape=shape)
+                remote.send(("ok", None))
+            elif command == "close":
+                env.close()
+                remote.close()
+                break
+            else:
+                raise NotImplementedError(f"Unknown vector env command: {command}")
+    except Exception:  # pylint: disable=broad-except
+        try:
+            remote.send(("error", traceback.format_exc()))
+        except BrokenPipeError:
+            pass
+
+
+def _batch_box(space: gym.spaces.Box, n: int) -> gym.spaces.Box:
+    """Create Box space of n stacked copies of given (flat) Box space."""
+    return gym.spaces.Box(
+        low=np.stack([space.low] * n),
+        high=np.stack([space.high] * n),
+        dtype=space.dtype,
+    )
@@ -1,6 +1,11 @@
 """RLlib integration in beobench."""
 
+import gzip
+import importlib
 import json
+from typing import Iterator, Union
+
+import numpy as np
 import ray.tune
 import ray.tune.integration.wandb
 import ray.tune.integration.mlflow
@@ -109,7 +114,9 @@ def _create_mlflow_callback(
     return mlflow_callback
 
 
-def get_cross_episodes_data(path: str) -> dict:
+def get_cross_episodes_data(
+    path: str, columnar: bool = False, info_key: str = None
+) -> Union[list, dict]:
     """Get concatenated episode data from RLlib output.
 
     This currently only concatenates data from info variable.
@@ -117,30 +124,107 @@ def get_cross_episodes_data(path: str) -> dict:
     a dict of dicts.
 
     Args:
-        path (str): path to RLlib output json file.
+        path (str): path to RLlib output json file (optionally gzip-compressed).
+        columnar (bool, optional): whether to return a numpy array for each
+            (flattened) info key instead of a list of info dicts. This requires much
+            less memory for large outputs. Values missing in some steps are filled
+            with NaN. Defaults to False.
+        info_key (str, optional): if given, only the values of this info key (e.g.
+            `obs`) are returned. Defaults to None.
 
     Returns:
-        dict: dictionary with episode data
+        list or dict: list of info dicts, or dict with array for each info key.
     """
     # TODO: add non-info data to this logging procedure
 
-    # Open RLlib output
-    outputs = []
-    with open(path, encoding="UTF-8") as json_file:
-        for line in json_file.readlines():
-            outputs.append(json.loads(line))
+    infos = iter_cross_episodes_infos(path)
+    if info_key is not None:
+        infos = (info[info_key] for info in infos)
+
+    if not columnar:
+        return list(infos)
+
+    columns = _ColumnBuilder()
+    for info in infos:
+        columns.append(beobench.utils.flatten_dict(info))
+    return columns.to_arrays()
 
-    # Get all keys of observations saved in info dict
-    all_obs_keys = []
-    for info_key in outputs[0]["infos"][0].keys():
-        all_obs_keys += list(outputs[0]["infos"][0][info_key].keys())
 
-    # Create empty (flat) dict of obs saved in info dict
-    infos = []
+def iter_cross_episodes_infos(path: str) -> Iterator[dict]:
+    """Iterate over info dicts of all steps in RLlib output, one line at a time.
 
-    # Add data to dict, one step at a time
-    for output in outputs[:]:
-        for info in output["infos"]:
-            infos.append(info)
+    Lines are parsed with orjson or ujson if installed, otherwise with the json
+    module.
 
-    return infos
+    Args:
+        path (str): path to RLlib output json file (optionally gzip-compressed).
+
+    Yields:
+        dict: info dict of step.
+    """
+    json_loads = _get_json_loads()
+    with _open_output(path) as json_file:
+        for line in json_file:
+            if not line.strip():
+                continue
+            yield from json_loads(line)["infos"]
+
+
+class _ColumnBuilder:
+    """Builder of numpy arrays from rows of values, filled in chunks."""
+
+    def __init__(self, chunk_size: int = 65536):
+        self.chunk_size = chunk_size
+        self.num_rows = 0
+        self._chunks = {}  # key -> list of (start row, array) of full chunks
+        self._buffers = {}  # key -> (start row, list of values) of current chunk
+
+    def append(self, row: dict) -> None:
+        for key, value in row.items():
+            start, values = self._buffers.setdefault(key, (self.num_rows, []))
+            # fill rows in which key was missing
+            values.extend([np.nan] * (self.num_rows - start - len(values)))
+            values.append(value)
+        self.num_rows += 1
+        if self.num_rows % self.chunk_size == 0:
+            self._flush()
+
+    def to_arrays(self) -> dict:
+        self._flush()
+        arrays = {}
+        for key, chunks in self._chunks.items():
+            parts = []
+            end = 0
+            for start, array in chunks:
+                if start > end:
+                    parts.append(np.full(start - end, np.nan))
+                parts.append(array)
+                end = start + len(array)
+            if end < self.num_rows:
+                parts.append(np.full(self.num_rows - end, np.nan))
+            arrays[key] = np.concatenate(parts)
+        return arrays
+
+    def _flush(self) -> None:
+        for key, (start, values) in self._buffers.items():
+            values.extend([np.nan] * (self.num_rows - start - len(values)))
+            self._chunks.setdefault(key, []).append((start, np.asarray(values)))
+        self._buffers = {}
+
+
+def _open_output(path: str):
+    with open(path, "rb") as output_file:
+        is_gzip = output_file.read(2) == b"\x1f\x8b"
+    if is_gzip:
+        return gzip.open(path, "rt", encoding="UTF-8")
+    return open(path, encoding="UTF-8")
+
+
+def _get_json_loads():
+    """Get fastest available JSON parsing function."""
+    for module_name in ["orjson", "ujson"]:
+        try:
+            return importlib.import_module(module_name).loads
+        except ImportError:
+            pass
+    return json.loads
@@ -0,0 +1,249 @@
+"""Metrics sinks that logged records (dicts of metrics) can be written to.
+
+Each sink implements `log(record)`, `log_many(records)` and `close()`. The
+WandbSink sends records to wandb, while the SQLiteSink appends them to a local
+SQLite file without network access, from which they can later be exported to
+wandb or MLflow.
+"""
+
+import json
+import pathlib
+import sqlite3
+
+import numpy as np
+import wandb
+
+from beobench.utils import flatten_dict
+
+# available metrics sinks (as set in general.metrics_sink config)
+AVAILABLE_SINKS = ["wandb", "sqlite"]
+
+_TABLE = "metrics"
+_ROW_COLUMN = "_row"
+
+
+class WandbSink:
+    """Metrics sink logging records to wandb."""
+
+    def log(self, record: dict) -> None:
+        wandb.log(record)
+
+    def log_many(self, records: list) -> None:
+        for record in records:
+            wandb.log(record)
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteSink:
+    """Metrics sink appending records to a local SQLite file."""
+
+    def __init__(self, path: str):
+        """Metrics sink appending records to a local SQLite file.
+
+        Records are stored as rows of a single table, with one column per metric
+        key. Columns are added when new keys are logged. Non-scalar values are
+        stored as JSON strings.
+
+        Args:
+            path (str): path of SQLite file.
+        """
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # records may be logged from a background thread (see BufferedLogger)
+        self._conn = sqlite3.connect(
+            str(self.path), timeout=60, check_same_thread=False
+        )
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {_TABLE} ({_ROW_COLUMN} INTEGER PRIMARY KEY)"
+        )
+        self._conn.commit()
+        self._columns = set(_get_columns(self._conn))
+
+    def log(self, record: dict) -> None:
+        self.log_many([record])
+
+    def log_many(self, records: list) -> None:
+        """Append records in a single transaction.
+
+        Args:
+            records (list): list of record dicts.
+        """
+        records = [_flatten_record(record) for record in records]
+        for record in records:
+            for key in record:
+                if key not in self._columns:
+                    self._add_column(key)
+
+        # records with the same keys are inserted with a single statement
+        groups = {}
+        for record in records:
+            groups.setdefault(tuple(record), []).append(
+                tuple(_to_sql_value(value) for value in record.values())
+            )
+        for keys, rows in groups.items():
+            if not keys:
+                self._conn.executemany(f"INSERT INTO {_TABLE} DEFAULT VALUES", rows)
+                continue
+            self._conn.executemany(
+                (
+                    f"INSERT INTO {_TABLE} ({', '.join(_quote(key) for key in keys)}) "
+                    f"VALUES ({', '.join('?' * len(keys))})"
+                ),
+                rows,
+            )
+        self._conn.commit()
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _add_column(self, key: str) -> None:
+        try:
+            self._conn.execute(f"ALTER TABLE {_TABLE} ADD COLUMN {_quote(key)}")
+        except sqlite3.OperationalError:
+            # another process logging to the same file (e.g. an RLlib worker) may
+            # have added the column since the columns were last read
+            self._columns = set(_get_columns(self._conn))
+            if key not in self._columns:
+                self._conn.execute(f"ALTER TABLE {_TABLE} ADD COLUMN {_quote(key)}")
+        self._columns.add(key)
+
+
+def create_sink(name: str, path: str = None) -> object:
+    """Create metrics sink.
+
+    Args:
+        name (str): name of sink, one of AVAILABLE_SINKS.
+        path (str, optional): path of file of file-backed sinks. Defaults to None.
+
+    Returns:
+        object: metrics sink.
+    """
+    if name == "wandb":
+        return WandbSink()
+    elif name == "sqlite":
+        return SQLiteSink(path)
+    else:
+        raise ValueError(
+            f"Metrics sink {name} not supported. Use one of {AVAILABLE_SINKS}."
+        )
+
+
+def iter_records(path: str, chunk_size: int = 1000):
+    """Iterate over records stored by SQLiteSink, in order of logging.
+
+    Args:
+        path (str): path of SQLite file.
+        chunk_size (int, optional): number of rows read at once. Defaults to 1000.
+
+    Yields:
+        dict: record, without keys not logged in this record.
+    """
+    conn = sqlite3.connect(str(path))
+    try:
+        columns = _get_columns(conn)
+        selected_columns = [_ROW_COLUMN] + [_quote(column) for column in columns]
+        cursor = conn.execute(
+            (
+                f"SELECT {', '.join(selected_columns)} "
+                f"FROM {_TABLE} ORDER BY {_ROW_COLUMN}"
+            )
+        )
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            for row in rows:
+                yield {
+                    key: value
+                    for key, value in zip(columns, row[1:])
+                    if value is not None
+                }
+    finally:
+        conn.close()
+
+
+def export_to_wandb(
+    path: str,
+    project: str = None,
+    entity: str = None,
+    group: str = None,
+    run_id: str = None,
+) -> None:
+    """Sync records stored by SQLiteSink to a wandb run.
+
+    Args:
+        path (str): path of SQLite file.
+        project (str, optional): name of wandb project. Defaults to None.
+        entity (str, optional): name of wandb entity. Defaults to None.
+        group (str, optional): name of wandb run group. Defaults to None.
+        run_id (str, optional): id of wandb run. Defaults to None.
+    """
+    run = wandb.init(id=run_id, project=project, entity=entity, group=group)
+    for record in iter_records(path):
+        run.log(record)
+    run.finish()
+
+
+def export_to_mlflow(
+    path: str, experiment_name: str, tracking_uri: str = None, run_name: str = None
+) -> None:
+    """Export numeric metrics of records stored by SQLiteSink to an MLflow run.
+
+    Each record is logged as one MLflow step. Requires the mlflow package.
+
+    Args:
+        path (str): path of SQLite file.
+        experiment_name (str): name of MLflow experiment.
+        tracking_uri (str, optional): MLflow tracking URI. Defaults to None.
+        run_name (str, optional): name of MLflow run. Defaults to None.
+    """
+    import mlflow  # pylint: disable=import-outside-toplevel
+
+    if tracking_uri is not None:
+        mlflow.set_tracking_uri(tracking_uri)
+    mlflow.set_experiment(experiment_name)
+    with mlflow.start_run(run_name=run_name):
+        for step, record in enumerate(iter_records(path)):
+            metrics = {
+                key: value
+                for key, value in record.items()
+                if isinstance(value, (int, float))
+            }
+            mlflow.log_metrics(metrics, step=step)
+
+
+def _flatten_record(record: dict) -> dict:
+    """Flatten nested record dicts (e.g. reset logs of WandbLogger)."""
+    if any(isinstance(value, dict) for value in record.values()):
+        return flatten_dict(record)
+    return record
+
+
+def _to_sql_value(value):
+    if value is None or isinstance(value, (str, int, float)):
+        return value  # includes bool, a subclass of int
+    if isinstance(value, (np.generic, np.ndarray)) and np.ndim(value) == 0:
+        return value.item()
+    return json.dumps(value, default=_json_default)
+
+
+def _json_default(value):
+    if isinstance(value, (np.generic, np.ndarray)):
+        return value.tolist()
+    return str(value)
+
+
+def _quote(key: str) -> str:
+    return '"' + key.replace('"', '""') + '"'
+
+
+def _get_columns(conn: sqlite3.Connection) -> list:
+    return [
+        row[1]
+        for row in conn.execute(f"PRAGMA table_info({_TABLE})").fetchall()
+        if row[1] != _ROW_COLUMN
+    ]
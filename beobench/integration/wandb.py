@@ -1,18 +1,215 @@
 """Module with tools for using Beobench with wandb."""
 
+import atexit
+import pathlib
+import queue
+import threading
+import time
+
+import numpy as np
 import wandb
 
+from beobench.logging import logger
+
+_STOP = object()
+
 
-def log_eps_data(eps_dict: dict) -> None:
+def log_eps_data(
+    eps_dict: dict,
+    mode: str = "steps",
+    chunk_size: int = 10000,
+    name: str = "eps_data",
+) -> None:
     """Log episode data to wandb.
 
     To be used with concatenated episode data from get_cross_episodes_data().
 
+    The data can be logged in three modes:
+
+    - `steps`: each step is logged with a separate wandb.log() call.
+    - `table`: chunks of chunk_size steps are logged as wandb tables, with one
+      wandb.log() call per chunk.
+    - `artifact`: chunks are saved as .npz files (with one array per key) and
+      uploaded as a single wandb artifact. This is the fastest mode for long
+      episodes, as wandb tables check the type of each value.
+
     Args:
-        eps_dict (dict): episode data
+        eps_dict (dict): episode data, with a sequence of values (one per step) for
+            each key.
+        mode (str, optional): logging mode, one of `steps`, `table` or `artifact`.
+            Defaults to "steps".
+        chunk_size (int, optional): number of steps per table or file, and between
+            progress reports. Defaults to 10000.
+        name (str, optional): key of tables or name of artifact. Defaults to
+            "eps_data".
     """
 
-    eps_dict_len = len(list(eps_dict.values())[0])
-    for i in range(eps_dict_len):
-        single_eps_dict = {key: values[i] for key, values in eps_dict.items()}
-        wandb.log({"env_step": i, **single_eps_dict})
+    keys = list(eps_dict.keys())
+    columns = [eps_dict[key] for key in keys]
+    eps_dict_len = len(columns[0])
+
+    if mode == "steps":
+        for i, values in enumerate(zip(*columns)):
+            wandb.log({"env_step": i, **dict(zip(keys, values))})
+            if (i + 1) % chunk_size == 0:
+                logger.info(f"Logged episode data of {i + 1}/{eps_dict_len} steps.")
+    elif mode == "table":
+        for start in range(0, eps_dict_len, chunk_size):
+            stop = min(start + chunk_size, eps_dict_len)
+            chunk_columns = [_to_list(column[start:stop]) for column in columns]
+            table = wandb.Table(
+                columns=["env_step"] + keys,
+                data=[list(row) for row in zip(range(start, stop), *chunk_columns)],
+            )
+            wandb.log({name: table})
+            logger.info(f"Uploaded episode data of {stop}/{eps_dict_len} steps.")
+    elif mode == "artifact":
+        artifact = wandb.Artifact(name, type="episode_data")
+        # files are written to the run dir, as they are uploaded asynchronously
+        chunk_dir = pathlib.Path(wandb.run.dir) / name
+        chunk_dir.mkdir(parents=True, exist_ok=True)
+        for start in range(0, eps_dict_len, chunk_size):
+            stop = min(start + chunk_size, eps_dict_len)
+            chunk_path = chunk_dir / f"{name}_{start:09d}.npz"
+            np.savez_compressed(
+                chunk_path,
+                env_step=np.arange(start, stop),
+                **{
+                    key: np.asarray(column[start:stop])
+                    for key, column in zip(keys, columns)
+                },
+            )
+            artifact.add_file(str(chunk_path))
+            logger.info(f"Saved episode data of {stop}/{eps_dict_len} steps.")
+        wandb.log_artifact(artifact)
+        logger.info(f"Uploaded episode data of {eps_dict_len} steps as artifact.")
+    else:
+        raise ValueError(
+            f"Mode {mode} not supported. Use 'steps', 'table' or 'artifact'."
+        )
+
+
+def _to_list(values) -> list:
+    return values.tolist() if hasattr(values, "tolist") else list(values)
+
+
+class BufferedLogger:
+    """Logger collecting records and logging them in batches in a background thread."""
+
+    def __init__(
+        self,
+        log_fn=None,
+        log_many_fn=None,
+        flush_every: int = 100,
+        flush_interval: float = 10.0,
+        max_queued_batches: int = 16,
+        block_when_full: bool = False,
+    ):
+        """Logger collecting records and logging them in batches in a background thread.
+
+        Records are buffered and handed to the background thread every flush_every
+        records or flush_interval seconds (checked when adding records). If the
+        background thread falls behind by more than max_queued_batches batches,
+        new batches are dropped (with a warning counting the dropped records), such
+        that memory use stays bounded and logging never blocks the environment
+        loop. Alternatively, adding records can block until the background thread
+        catches up. Remaining records are logged at interpreter exit if close() is
+        not called.
+
+        Args:
+            log_fn (callable, optional): function logging a single record. Defaults
+                to None, in which case wandb.log is used.
+            log_many_fn (callable, optional): function logging a list of records at
+                once, used instead of log_fn if given (e.g. the log_many() method of
+                a metrics sink). Defaults to None.
+            flush_every (int, optional): number of records after which buffer is
+                flushed. Defaults to 100.
+            flush_interval (float, optional): seconds after which buffer is
+                flushed. Defaults to 10.0.
+            max_queued_batches (int, optional): maximum number of batches waiting to
+                be logged. Defaults to 16.
+            block_when_full (bool, optional): whether to block until the background
+                thread catches up instead of dropping batches. Defaults to False.
+        """
+        self.log_fn = log_fn if log_fn is not None else wandb.log
+        self.log_many_fn = log_many_fn
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.block_when_full = block_when_full
+        self.num_dropped_batches = 0
+        self.num_dropped_records = 0
+
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self._queue = queue.Queue(maxsize=max_queued_batches)
+        self._thread = threading.Thread(target=self._log_loop, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def log(self, record: dict) -> None:
+        """Add record to buffer.
+
+        Args:
+            record (dict): record to log. Must not be modified after adding it.
+        """
+        self._buffer.append(record)
+        if (
+            len(self._buffer) >= self.flush_every
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        """Hand buffered records to background thread."""
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+        if self.block_when_full:
+            self._queue.put(batch)
+            return
+        try:
+            self._queue.put_nowait(batch)
+        except queue.Full:
+            self.num_dropped_batches += 1
+            self.num_dropped_records += len(batch)
+            logger.warning(
+                (
+                    f"Logging falls behind, dropped batch of {len(batch)} records "
+                    f"({self.num_dropped_records} records in "
+                    f"{self.num_dropped_batches} batches dropped so far)."
+                )
+            )
+
+    def close(self) -> None:
+        """Log all buffered records and stop background thread."""
+        atexit.unregister(self.close)
+        if not self._thread.is_alive():
+            return
+        self.flush()
+        self._queue.put(_STOP)
+        self._thread.join()
+        if self.num_dropped_batches:
+            logger.warning(
+                (
+                    f"Logging dropped {self.num_dropped_batches} batches "
+                    f"({self.num_dropped_records} records) in total."
+                )
+            )
+
+    def _log_loop(self) -> None:
+        while True:
+            batch = self._queue.get()
+            if batch is _STOP:
+                return
+            if self.log_many_fn is not None:
+                try:
+                    self.log_many_fn(batch)
+                except Exception:  # pylint: disable=broad-except
+                    logger.exception("Logging of records failed.")
+                continue
+            for record in batch:
+                try:
+                    self.log_fn(record)
+                except Exception:  # pylint: disable=broad-except
+                    logger.exception("Logging of record failed.")
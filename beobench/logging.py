@@ -1,7 +1,15 @@
 """Logging utilities for Beobench."""
 
 from loguru import logger
+import gzip
+import pathlib
+import queue
+import re
 import sys
+import threading
+import time
+
+_STOP = object()
 
 
 def setup(include_time=False) -> None:
@@ -24,14 +32,198 @@ def setup(include_time=False) -> None:
     )
 
 
-def log_subprocess(pipe, process_name="subprocess"):
-    """Log subprocess pipe.
+class LogPump:
+    """Pump forwarding subprocess output to a log file and the console."""
+
+    def __init__(
+        self,
+        pipe,
+        process_name: str = "subprocess",
+        log_path: str = None,
+        max_file_bytes: int = 100 * 2**20,
+        num_backups: int = 5,
+        max_lines_per_sec: float = None,
+        line_filter: str = None,
+        chunk_size: int = 2**16,
+        max_queued_chunks: int = 64,
+    ):
+        """Pump forwarding subprocess output to a log file and the console.
+
+        A reader thread reads the pipe in large chunks and writes the raw output to
+        a gzip compressed log file, such that the process is never slowed down by a
+        full pipe. The chunks are handed to a console thread via a bounded queue,
+        which logs a rate-limited and/or filtered view of the lines to the console.
+        If the console thread falls behind, chunks are only written to the log file,
+        and the number of lines not shown is reported.
+
+        Args:
+            pipe: binary pipe of subprocess output (e.g. process.stdout).
+            process_name (str, optional): name of process shown in console.
+                Defaults to "subprocess".
+            log_path (str, optional): path of gzip compressed log file. Once the
+                file exceeds max_file_bytes (uncompressed), it is rotated to
+                `<name>.1.gz` etc. Defaults to None, in which case no log file is
+                written.
+            max_file_bytes (int, optional): uncompressed bytes after which the log
+                file is rotated. Defaults to 100 MiB.
+            num_backups (int, optional): number of rotated log files kept. Defaults
+                to 5.
+            max_lines_per_sec (float, optional): maximum number of lines per second
+                logged to the console. Further lines are only written to the log file,
+                and the number of suppressed lines is reported. Defaults to None, in
+                which case all lines are logged.
+            line_filter (str, optional): regular expression that lines must match
+                (re.search) to be logged to the console. Defaults to None.
+            chunk_size (int, optional): maximum number of bytes read at once.
+                Defaults to 64 KiB.
+            max_queued_chunks (int, optional): maximum number of chunks waiting to
+                be logged to the console. Defaults to 64.
+        """
+        self.pipe = pipe
+        self.log_path = pathlib.Path(log_path) if log_path is not None else None
+        self.max_file_bytes = max_file_bytes
+        self.num_backups = num_backups
+        self.max_lines_per_sec = max_lines_per_sec
+        self.line_filter = re.compile(line_filter) if line_filter else None
+        self.chunk_size = chunk_size
+        self.num_suppressed_lines = 0
+
+        self._context = f"\033[34m{process_name}:\033[0m"
+        self._log_file = None
+        self._file_bytes = 0
+        # chunks (and their lines) dropped by reader thread since last queued chunk
+        self._num_dropped = (0, 0)
+        self._partial_line = b""
+        # token bucket allowing bursts of up to max(1, max_lines_per_sec) lines, such
+        # that at least one line is shown for rates below one line per second
+        self._max_allowance = (
+            max(1, max_lines_per_sec) if max_lines_per_sec is not None else None
+        )
+        self._allowance = self._max_allowance
+        self._last_check = time.monotonic()
+        self._last_suppressed_report = self._last_check
+        self._queue = queue.Queue(maxsize=max_queued_chunks)
+        self._thread = threading.Thread(target=self._pump, daemon=True)
+        self._console_thread = threading.Thread(target=self._log_queued, daemon=True)
+
+    def start(self) -> "LogPump":
+        if self.log_path is not None:
+            self.log_path.parent.mkdir(parents=True, exist_ok=True)
+            self._open_log_file()
+        self._console_thread.start()
+        self._thread.start()
+        return self
+
+    def join(self) -> None:
+        """Wait until pipe is closed and all output is processed."""
+        self._thread.join()
+        self._console_thread.join()
+
+    def _pump(self) -> None:
+        """Read pipe and write output to log file (in reader thread)."""
+        read = getattr(self.pipe, "read1", self.pipe.read)
+        try:
+            while True:
+                chunk = read(self.chunk_size)
+                if not chunk:
+                    break
+                self._write_to_file(chunk)
+                try:
+                    self._queue.put_nowait((chunk, self._num_dropped))
+                    self._num_dropped = (0, 0)
+                except queue.Full:
+                    num_chunks, num_lines = self._num_dropped
+                    self._num_dropped = (num_chunks + 1, num_lines + chunk.count(b"\n"))
+        finally:
+            if self._log_file is not None:
+                self._log_file.close()
+            self._queue.put((_STOP, self._num_dropped))
+
+    def _log_queued(self) -> None:
+        """Log queued chunks to console (in console thread)."""
+        while True:
+            chunk, (num_dropped_chunks, num_dropped_lines) = self._queue.get()
+            if num_dropped_chunks:
+                # partial line can't be completed after dropped chunks
+                self.num_suppressed_lines += num_dropped_lines + bool(
+                    self._partial_line
+                )
+                self._partial_line = b""
+            if chunk is _STOP:
+                break
+            self._log_to_console(chunk)
+        if self._partial_line:
+            self._log_lines([self._partial_line])
+        self._report_suppressed_lines(force=True)
+
+    def _write_to_file(self, chunk: bytes) -> None:
+        if self._log_file is None:
+            return
+        self._log_file.write(chunk)
+        self._file_bytes += len(chunk)
+        if self._file_bytes >= self.max_file_bytes:
+            self._rotate_log_file()
+
+    def _log_to_console(self, chunk: bytes) -> None:
+        lines = (self._partial_line + chunk).split(b"\n")
+        self._partial_line = lines.pop()
+        self._log_lines(lines)
+
+    def _log_lines(self, lines: list) -> None:
+        if self.line_filter is not None:
+            lines = [
+                line
+                for line in lines
+                if self.line_filter.search(line.decode("utf-8", errors="replace"))
+            ]
+        if self.max_lines_per_sec is not None:
+            now = time.monotonic()
+            self._allowance = min(
+                self._max_allowance,
+                self._allowance + (now - self._last_check) * self.max_lines_per_sec,
+            )
+            self._last_check = now
+            num_allowed = max(0, min(len(lines), int(self._allowance)))
+            self._allowance -= num_allowed
+            self.num_suppressed_lines += len(lines) - num_allowed
+            lines = lines[:num_allowed]
+            self._report_suppressed_lines()
+        for line in lines:
+            line = line.decode("utf-8", errors="replace").rstrip()
+            logger.info(f"{self._context} {line}")
+
+    def _report_suppressed_lines(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if self.num_suppressed_lines and (
+            force or now - self._last_suppressed_report >= 10
+        ):
+            log_file_str = f" (see {self.log_path})" if self.log_path else ""
+            logger.info(
+                (
+                    f"{self._context} ... {self.num_suppressed_lines} lines not shown"
+                    f"{log_file_str}."
+                )
+            )
+            self.num_suppressed_lines = 0
+            self._last_suppressed_report = now
+
+    def _open_log_file(self) -> None:
+        # low compression level, as speed matters more than size of log files
+        self._log_file = gzip.open(self.log_path, "wb", compresslevel=1)
+        self._file_bytes = 0
 
-    Adapted from from https://stackoverflow.com/a/21978778.
+    def _rotate_log_file(self) -> None:
+        self._log_file.close()
+        for i in range(self.num_backups - 1, 0, -1):
+            backup_path = self._get_backup_path(i)
+            if backup_path.exists():
+                backup_path.rename(self._get_backup_path(i + 1))
+        if self.num_backups > 0:
+            self.log_path.rename(self._get_backup_path(1))
+        self._open_log_file()
 
-    Color setting of context is described in https://stackoverflow.com/a/33206814.
-    """
-    for line in iter(pipe.readline, b""):  # b'\n'-separated lines
-        context = f"\033[34m{process_name}:\033[0m"  # .decode("ascii")
-        line = line.decode("utf-8").rstrip()
-        logger.info(f"{context} {line}")
+    def _get_backup_path(self, index: int) -> pathlib.Path:
+        name = self.log_path.name
+        if name.endswith(".gz"):
+            name = name[: -len(".gz")]
+        return self.log_path.with_name(f"{name}.{index}.gz")
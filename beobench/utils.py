@@ -88,6 +88,29 @@ def merge_dicts(
     return a
 
 
+def flatten_dict(d: dict, parent_key: str = "", sep: str = ".") -> dict:
+    """Flatten nested dictionary into single level dict with joined keys.
+
+    Empty dictionaries are kept as leaf values so that they are not silently lost.
+
+    Args:
+        d (dict): (nested) dictionary to flatten.
+        parent_key (str, optional): key prefix to add to all keys. Defaults to "".
+        sep (str, optional): separator used to join keys. Defaults to ".".
+
+    Returns:
+        dict: flat dictionary, e.g. {"a.b": 1} for {"a": {"b": 1}}.
+    """
+    items = {}
+    for key, value in d.items():
+        new_key = f"{parent_key}{sep}{key}" if parent_key else str(key)
+        if isinstance(value, dict) and value:
+            items.update(flatten_dict(value, parent_key=new_key, sep=sep))
+        else:
+            items[new_key] = value
+    return items
+
+
 def shutdown() -> None:
     """Shut down all beobench and BOPTEST containers."""
 
@@ -118,8 +141,28 @@ def restart() -> None:
     shutdown()
 
 
-def run_command(cmd_line_args, process_name):
-    """Run command and log its output."""
+def run_command(
+    cmd_line_args,
+    process_name,
+    log_path: str = None,
+    max_lines_per_sec: float = None,
+    line_filter: str = None,
+):
+    """Run command and log its output.
+
+    Args:
+        cmd_line_args (list): command line arguments.
+        process_name (str): name of process shown in logs.
+        log_path (str, optional): path of gzip compressed file that the complete
+            output is written to. Defaults to None.
+        max_lines_per_sec (float, optional): maximum number of output lines per
+            second logged to the console. Defaults to None.
+        line_filter (str, optional): regular expression that output lines must
+            match to be logged to the console. Defaults to None.
+
+    Returns:
+        int: exit code of command (0 means success).
+    """
 
     process = subprocess.Popen(  # pylint: disable=consider-using-with
         cmd_line_args,
@@ -127,8 +170,14 @@ def run_command(cmd_line_args, process_name):
         stderr=subprocess.STDOUT,
     )
     with process.stdout:
-        beobench.logging.log_subprocess(
+        pump = beobench.logging.LogPump(
             process.stdout,
             process_name=process_name,
-        )
-    _ = process.wait()  # 0 means success
+            log_path=log_path,
+            max_lines_per_sec=max_lines_per_sec,
+            line_filter=line_filter,
+        ).start()
+        exit_code = process.wait()  # 0 means success
+        # console output may still be catching up once the process has finished
+        pump.join()
+    return exit_code
@@ -1,32 +1,100 @@
 """Environment wrappers for energym environments."""
 
+from typing import Union
+
 import gym
+import numpy as np
+
+import beobench.experiment.batch
 
 
 class CustomReward(gym.Wrapper):
     """Wrapper to customize reward of energym environments."""
 
-    def __init__(self, env: gym.Env, info_obs_weights: dict):
+    def __init__(
+        self,
+        env: gym.Env,
+        info_obs_weights: Union[dict, list],
+        selected_weighting: int = 0,
+    ):
         """Wrapper to customize reward of energym environments.
 
         Args:
             env (gym.Env): environment to be wrapped.
-            info_obs_weights (dict): dictionary with keys matching the info[obs] values
-                to be combined as a linear combination with the weights given. E.g.
-                {'power_ev':0.4, 'power_hvac':0.6} will make the env.step() method
-                return a negative reward signal computed by
+            info_obs_weights (dict or list): dictionary with keys matching the
+                info[obs] values to be combined as a linear combination with the
+                weights given. E.g. {'power_ev':0.4, 'power_hvac':0.6} will make the
+                env.step() method return a negative reward signal computed by
 
                 ```
                 info['obs']['power_ev'] * 0.4 + info['obs']['power_hvac'] * 0.6
                 ```
+
+                This can also be a list of such dictionaries (the matrix form), e.g.
+                [{'power_ev':0.4, 'power_hvac':0.6}, {'power_hvac':1.0}]. Each
+                dictionary is a row of a weight matrix with one column per key used
+                in any of the dictionaries, where missing keys have weight 0. The
+                rewards of all weightings are computed at once (with a single
+                matrix-vector product) and returned as array in
+                info['custom_rewards'], in the order of the list.
+            selected_weighting (int, optional): index of the weighting in
+                info_obs_weights (if list) that is used as reward. Defaults to 0.
         """
         super().__init__(env)
         self.info_obs_weights = info_obs_weights
+        self.selected_weighting = selected_weighting
+        self.multi_objective = isinstance(info_obs_weights, list)
+        self.obs_keys, self.weight_matrix = get_weight_matrix(info_obs_weights)
 
     def step(self, action):
         obs, _, done, info = self.env.step(action)
 
-        reward = sum(  # pylint: disable=consider-using-generator
-            [info["obs"][key] * value for key, value in self.info_obs_weights.items()]
+        rewards = self.weight_matrix @ np.fromiter(
+            map(info["obs"].__getitem__, self.obs_keys),
+            dtype=np.float64,
+            count=len(self.obs_keys),
         )
-        return obs, reward, done, info
+        if self.multi_objective:
+            info["custom_rewards"] = rewards
+
+        return obs, float(rewards[self.selected_weighting]), done, info
+
+    def step_many(self, actions):
+        obs, _, dones, infos = beobench.experiment.batch.step_many(self.env, actions)
+
+        obs_values = np.array(
+            [[info["obs"][key] for key in self.obs_keys] for info in infos],
+            dtype=np.float64,
+        ).reshape(len(infos), len(self.obs_keys))
+        rewards = obs_values @ self.weight_matrix.T
+        if self.multi_objective:
+            for info, info_rewards in zip(infos, rewards):
+                info["custom_rewards"] = info_rewards
+
+        return obs, rewards[:, self.selected_weighting], dones, infos
+
+
+def get_weight_matrix(info_obs_weights) -> tuple:
+    """Get matrix of reward weights from (list of) weight dicts.
+
+    Args:
+        info_obs_weights (dict or list): dict of weights of info['obs'] values, or
+            list of such dicts, as used by CustomReward.
+
+    Returns:
+        tuple: list of info['obs'] keys, and matrix of weights with one row per
+            weighting and one column per key.
+    """
+    if isinstance(info_obs_weights, dict):
+        info_obs_weights = [info_obs_weights]
+
+    obs_keys = []
+    for weights in info_obs_weights:
+        obs_keys += [key for key in weights if key not in obs_keys]
+
+    weight_matrix = np.zeros((len(info_obs_weights), len(obs_keys)))
+    for i, weights in enumerate(info_obs_weights):
+        for j, key in enumerate(obs_keys):
+            weight_matrix[i, j] = weights.get(key, 0.0)
+
+    return obs_keys, weight_matrix
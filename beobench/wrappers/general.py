@@ -1,12 +1,29 @@
 """Environment wrappers that may be applied across gyms."""
 
+import copy
 import gym
 import gym.spaces
+import itertools
+import os
+import pathlib
 import warnings
 import wandb
 import numpy as np
 
-from beobench.experiment.provider import config
+import beobench.experiment.batch
+import beobench.experiment.trajectories
+import beobench.integration.wandb
+import beobench.utils
+from beobench.experiment.provider import config, create_metrics_sink
+from beobench.constants import CONTAINER_DATA_DIR
+
+# Prefix of logged info values
+_INFO_PREFIX = "env.returns.info"
+
+# Counter to give trajectories of multiple envs in same process unique names
+_trajectory_counter = itertools.count()
+# Counter to give normalisation stats of multiple envs in same process unique names
+_normalization_counter = itertools.count()
 
 
 class EnvResetCalledError(Exception):
@@ -58,6 +75,549 @@ class FixDictActs(gym.ActionWrapper):
         return {**action, **self.fixed_actions}
 
 
+class FlattenDictObs(gym.ObservationWrapper):
+    """Wrapper that flattens dict observations into float arrays."""
+
+    def __init__(self, env: gym.Env, dtype: str = "float32", num_buffers: int = None):
+        """Wrapper that flattens dict observations into float arrays.
+
+        The key order and position of each observation in the flat array are
+        computed once from the observation space. Optionally, each observation is
+        written into one of `num_buffers` preallocated arrays (used in rotation)
+        instead of a new array.
+
+        Args:
+            env (gym.Env): environment to wrap.
+            dtype (str, optional): dtype of flat observations. Defaults to "float32".
+            num_buffers (int, optional): number of buffers used in rotation. Each
+                returned observation is then overwritten `num_buffers` steps later,
+                so this must only be used if neither the agent nor any outer wrapper
+                keeps observations for longer. Defaults to None, in which case a new
+                array is returned for each observation.
+        """
+        super().__init__(env)
+        self.obs_slices, self._obs_shapes, low, high = _get_flat_layout(
+            self.env.observation_space
+        )
+        self._observation_space = gym.spaces.Box(low=low, high=high, dtype=dtype)
+
+        self._buffers = _RotatingBuffers(num_buffers)
+
+    def observation(self, observation):
+        buffer = self._buffers.get(
+            self.observation_space.shape, self.observation_space.dtype
+        )
+        for key, obs_slice in self.obs_slices.items():
+            buffer[obs_slice] = np.ravel(observation[key])
+        return buffer
+
+    def step_many(self, actions):
+        obs, rewards, dones, infos = beobench.experiment.batch.step_many(
+            self.env, actions
+        )
+        flat_obs = np.empty(
+            (len(rewards), self.observation_space.shape[0]),
+            dtype=self.observation_space.dtype,
+        )
+        if not len(rewards):
+            return flat_obs, rewards, dones, infos  # no dict obs to flatten
+        for key, obs_slice in self.obs_slices.items():
+            flat_obs[:, obs_slice] = np.reshape(obs[key], (len(rewards), -1))
+        return flat_obs, rewards, dones, infos
+
+
+class FlattenDictActs(gym.ActionWrapper):
+    """Wrapper that maps flat array actions to dict actions."""
+
+    def __init__(self, env: gym.Env, dtype: str = "float32"):
+        """Wrapper that maps flat array actions to dict actions.
+
+        This is the inverse of FlattenDictObs for actions. Dict actions are views
+        into the flat action array, so no values are copied.
+
+        Args:
+            env (gym.Env): environment to wrap.
+            dtype (str, optional): dtype of flat actions. Defaults to "float32".
+        """
+        super().__init__(env)
+        self.act_slices, self._act_shapes, low, high = _get_flat_layout(
+            self.env.action_space
+        )
+        self._discrete_keys = [
+            key
+            for key, space in self.env.action_space.spaces.items()
+            if isinstance(space, gym.spaces.Discrete)
+        ]
+        self._action_space = gym.spaces.Box(low=low, high=high, dtype=dtype)
+
+    def action(self, action):
+        action = np.asarray(action)
+        dict_action = {
+            key: action[act_slice].reshape(self._act_shapes[key])
+            for key, act_slice in self.act_slices.items()
+        }
+        for key in self._discrete_keys:
+            dict_action[key] = int(np.round(dict_action[key]))
+        return dict_action
+
+
+class SubsetBoxObs(gym.ObservationWrapper):
+    """Wrapper that reduces flat Box observation space to subset."""
+
+    def __init__(
+        self,
+        env: gym.Env,
+        selected_obs_keys: list = None,
+        selected_obs_indices: list = None,
+        num_buffers: int = None,
+    ):
+        """Wrapper that reduces flat Box observation space to subset.
+
+        This is the array version of SubsetDictObs. Selected observations are
+        gathered via a precomputed index array (optionally into reusable buffers).
+        It also works on batched observations (e.g. from step_many()).
+
+        Args:
+            env (gym.Env): environment to wrap.
+            selected_obs_keys (list, optional): keys of selected observations. This
+                requires the observations to be flattened by FlattenDictObs.
+                Defaults to None.
+            selected_obs_indices (list, optional): indices of selected observations
+                in flat observation. Used if no selected_obs_keys given. Defaults to
+                None.
+            num_buffers (int, optional): number of buffers used in rotation, see
+                FlattenDictObs. Defaults to None, in which case new arrays are
+                returned.
+        """
+        super().__init__(env)
+        if selected_obs_keys is not None:
+            obs_slices = self.env.obs_slices
+            selected_obs_indices = np.concatenate(
+                [
+                    np.arange(obs_slices[key].start, obs_slices[key].stop)
+                    for key in selected_obs_keys
+                ]
+            )
+            self.obs_slices = {}
+            offset = 0
+            for key in selected_obs_keys:
+                size = obs_slices[key].stop - obs_slices[key].start
+                self.obs_slices[key] = slice(offset, offset + size)
+                offset += size
+
+        self.selected_obs_indices = np.asarray(selected_obs_indices, dtype=np.intp)
+        if selected_obs_keys is None:
+            self.obs_slices = _get_subset_slices(
+                getattr(self.env, "obs_slices", {}), self.selected_obs_indices
+            )
+        space = self.env.observation_space
+        self._observation_space = gym.spaces.Box(
+            low=space.low[self.selected_obs_indices],
+            high=space.high[self.selected_obs_indices],
+            dtype=space.dtype,
+        )
+        self._buffers = _RotatingBuffers(num_buffers)
+
+    def observation(self, observation):
+        observation = np.asarray(observation)
+        buffer = self._buffers.get(
+            observation.shape[:-1] + self.selected_obs_indices.shape,
+            observation.dtype,
+        )
+        return np.take(observation, self.selected_obs_indices, axis=-1, out=buffer)
+
+    def step_many(self, actions):
+        obs, rewards, dones, infos = beobench.experiment.batch.step_many(
+            self.env, actions
+        )
+        if not len(rewards):
+            obs = np.empty(
+                (0,) + self.observation_space.shape, self.observation_space.dtype
+            )
+            return obs, rewards, dones, infos
+        return (
+            np.take(obs, self.selected_obs_indices, axis=-1),
+            rewards,
+            dones,
+            infos,
+        )
+
+
+class FixBoxActs(gym.ActionWrapper):
+    """Wrapper to fix some actions in flat Box action space."""
+
+    def __init__(
+        self,
+        env: gym.Env,
+        fixed_actions: dict = None,
+        num_buffers: int = None,
+    ):
+        """Wrapper to fix some actions in flat Box action space.
+
+        This is the array version of FixDictActs. Actions are put into their
+        precomputed positions next to the fixed values. With num_buffers, fixed
+        values are written only once into reusable buffers. It also works on
+        batched actions.
+
+        Args:
+            env (gym.Env): environment to wrap.
+            fixed_actions (dict, optional): dictionary of the values of fixed
+                actions. Keys are either indices in the flat action array or keys of
+                the dict action space flattened by FlattenDictActs. Defaults to None.
+            num_buffers (int, optional): number of buffers used in rotation, see
+                FlattenDictObs. Defaults to None, in which case new arrays are
+                returned.
+        """
+        super().__init__(env)
+        if fixed_actions is None:
+            fixed_actions = {}
+
+        space = self.env.action_space
+        fixed_values = np.zeros(space.shape, dtype=space.dtype)
+        fixed_mask = np.zeros(space.shape, dtype=bool)
+        for key, value in fixed_actions.items():
+            if isinstance(key, str):
+                indices = self.env.act_slices[key]
+            else:
+                indices = int(key)
+            fixed_values[indices] = value
+            fixed_mask[indices] = True
+
+        self.fixed_indices = np.flatnonzero(fixed_mask)
+        self.free_indices = np.flatnonzero(~fixed_mask)
+        self._fixed_values = fixed_values[self.fixed_indices]
+        self._action_space = gym.spaces.Box(
+            low=space.low[self.free_indices],
+            high=space.high[self.free_indices],
+            dtype=space.dtype,
+        )
+        self._buffers = _RotatingBuffers(num_buffers, init_fn=self._init_buffer)
+
+    def action(self, action):
+        action = np.asarray(action)
+        buffer = self._buffers.get(
+            action.shape[:-1] + self.env.action_space.shape,
+            self.env.action_space.dtype,
+        )
+        buffer[..., self.free_indices] = action
+        return buffer
+
+    def step_many(self, actions):
+        full_actions = self._init_buffer(
+            np.empty(
+                (len(actions),) + self.env.action_space.shape,
+                dtype=self.env.action_space.dtype,
+            )
+        )
+        if len(actions):
+            full_actions[:, self.free_indices] = actions
+        return beobench.experiment.batch.step_many(self.env, full_actions)
+
+    def _init_buffer(self, buffer: np.ndarray) -> np.ndarray:
+        buffer[..., self.fixed_indices] = self._fixed_values
+        return buffer
+
+
+class RunningNormalizeObs(gym.ObservationWrapper):
+    """Wrapper normalising observations with running mean and variance."""
+
+    def __init__(
+        self,
+        env: gym.Env,
+        freeze_after: int = None,
+        clip: float = 10.0,
+        epsilon: float = 1e-8,
+        stats_path: str = None,
+        load_stats_path: str = None,
+    ):
+        """Wrapper normalising observations with running mean and variance.
+
+        Mean and variance of each observation value are updated with Welford's
+        algorithm (or its batched version for batched observations, e.g. from
+        step_many()). This is independent of any normalisation of the integration,
+        and does not require bounds of the observations.
+
+        Args:
+            env (gym.Env): environment to wrap, with Box observation space.
+            freeze_after (int, optional): number of observations after which the
+                statistics are no longer updated. Defaults to None, in which case
+                statistics are always updated.
+            clip (float, optional): normalised observations are clipped to
+                [-clip, clip]. Defaults to 10.0.
+            epsilon (float, optional): added to variance for numerical stability.
+                Defaults to 1e-8.
+            stats_path (str, optional): path of .npz file that statistics are saved
+                to when env is closed. Defaults to None, in which case they are saved
+                to a new file under `<local_dir>/normalization/`, named after the
+                run id, process id and env index.
+            load_stats_path (str, optional): path of .npz file with statistics (e.g.
+                of previous run) to initialise statistics with. Defaults to None.
+        """
+        super().__init__(env)
+        self.freeze_after = freeze_after
+        self.clip = clip
+        self.epsilon = epsilon
+        if stats_path is None:
+            stats_path = (
+                CONTAINER_DATA_DIR
+                / "normalization"
+                / (
+                    f"obs_stats_{config['autogen']['run_id']}_"
+                    f"{os.getpid()}_{next(_normalization_counter)}.npz"
+                )
+            )
+        self.stats_path = pathlib.Path(stats_path)
+
+        shape = self.env.observation_space.shape
+        self.count = 0
+        self.mean = np.zeros(shape, dtype=np.float64)
+        self.m2 = np.zeros(shape, dtype=np.float64)  # sum of squared differences
+        self._std = np.ones(shape, dtype=np.float64)
+        self._delta = np.zeros(shape, dtype=np.float64)
+        if load_stats_path is not None:
+            self.load_stats(load_stats_path)
+
+        self._observation_space = gym.spaces.Box(
+            low=-clip, high=clip, shape=shape, dtype=np.float32
+        )
+
+    @property
+    def frozen(self) -> bool:
+        return self.freeze_after is not None and self.count >= self.freeze_after
+
+    def observation(self, observation):
+        observation = np.asarray(observation, dtype=np.float64)
+        if not self.frozen:
+            if observation.ndim > self.mean.ndim:
+                self._update_batch(observation)
+            else:
+                self._update(observation)
+        return self._normalize(observation)
+
+    def step_many(self, actions):
+        obs, rewards, dones, infos = beobench.experiment.batch.step_many(
+            self.env, actions
+        )
+        return self.observation(obs), rewards, dones, infos
+
+    def close(self):
+        self.save_stats(self.stats_path)
+        self.env.close()
+
+    def save_stats(self, path: str) -> None:
+        """Save running statistics to .npz file.
+
+        Args:
+            path (str): path of .npz file.
+        """
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(path, count=self.count, mean=self.mean, m2=self.m2)
+
+    def load_stats(self, path: str) -> None:
+        """Load running statistics from .npz file saved by save_stats().
+
+        Args:
+            path (str): path of .npz file.
+        """
+        with np.load(path) as stats:
+            self.set_state(
+                {"count": int(stats["count"]), "mean": stats["mean"], "m2": stats["m2"]}
+            )
+
+    def get_state(self) -> dict:
+        return {"count": self.count, "mean": self.mean.copy(), "m2": self.m2.copy()}
+
+    def set_state(self, state: dict) -> None:
+        self.count = state["count"]
+        self.mean[...] = state["mean"]
+        self.m2[...] = state["m2"]
+        self._update_std()
+
+    def _update(self, observation: np.ndarray) -> None:
+        self.count += 1
+        np.subtract(observation, self.mean, out=self._delta)
+        self.mean += self._delta / self.count
+        self.m2 += self._delta * (observation - self.mean)
+        self._update_std()
+
+    def _update_batch(self, observations: np.ndarray) -> None:
+        observations = observations.reshape((-1,) + self.mean.shape)
+        batch_count = observations.shape[0]
+        batch_mean = observations.mean(axis=0)
+        batch_m2 = ((observations - batch_mean) ** 2).sum(axis=0)
+
+        total_count = self.count + batch_count
+        delta = batch_mean - self.mean
+        self.mean += delta * batch_count / total_count
+        self.m2 += batch_m2 + delta**2 * self.count * batch_count / total_count
+        self.count = total_count
+        self._update_std()
+
+    def _update_std(self) -> None:
+        if self.count > 0:
+            np.sqrt(self.m2 / self.count + self.epsilon, out=self._std)
+
+    def _normalize(self, observation: np.ndarray) -> np.ndarray:
+        normalized = (observation - self.mean) / self._std
+        np.clip(normalized, -self.clip, self.clip, out=normalized)
+        return normalized.astype(np.float32)
+
+
+class RecordTrajectory(gym.Wrapper):
+    """Wrapper recording all steps and resets to columnar chunk files."""
+
+    def __init__(
+        self,
+        env: gym.Env,
+        path: str = None,
+        chunk_size: int = 1000,
+        max_queued_chunks: int = 8,
+        compress: bool = False,
+    ):
+        """Wrapper recording all steps and resets to columnar chunk files.
+
+        Observations, actions, rewards, dones and (flattened, numeric) infos are
+        written to chunked .npz files by a background thread, such that recording
+        only adds the cost of copying the observation and action to each step. See
+        beobench.experiment.trajectories for the file format.
+
+        Args:
+            env (gym.Env): environment to wrap.
+            path (str, optional): directory to write trajectory to. Defaults to None,
+                in which case a new directory under `<local_dir>/trajectories/` is
+                used.
+            chunk_size (int, optional): number of steps per chunk file. Defaults to
+                1000.
+            max_queued_chunks (int, optional): maximum number of chunks waiting to
+                be written before step() blocks. Defaults to 8.
+            compress (bool, optional): whether to compress chunk files. Defaults to
+                False.
+        """
+        super().__init__(env)
+        if path is None:
+            path = (
+                CONTAINER_DATA_DIR
+                / "trajectories"
+                / (
+                    f"{config['autogen']['run_id']}_"
+                    f"{os.getpid()}_{next(_trajectory_counter)}"
+                )
+            )
+        self.writer = beobench.experiment.trajectories.TrajectoryWriter(
+            path,
+            observation_space=self.env.observation_space,
+            action_space=self.env.action_space,
+            chunk_size=chunk_size,
+            max_queued_chunks=max_queued_chunks,
+            compress=compress,
+        )
+
+    def step(self, action):
+        obs, reward, done, info = self.env.step(action)
+        self.writer.add(
+            beobench.experiment.trajectories.make_row(obs, action, reward, done, info)
+        )
+        return obs, reward, done, info
+
+    def reset(self, **kwargs):
+        obs = self.env.reset(**kwargs)
+        self.writer.add(beobench.experiment.trajectories.make_row(obs))
+        return obs
+
+    def step_many(self, actions):
+        obs, rewards, dones, infos = beobench.experiment.batch.step_many(
+            self.env, actions
+        )
+        for i, info in enumerate(infos):
+            if isinstance(obs, dict):
+                step_obs = {key: values[i] for key, values in obs.items()}
+            else:
+                step_obs = obs[i]
+            self.writer.add(
+                beobench.experiment.trajectories.make_row(
+                    step_obs, actions[i], rewards[i], dones[i], info
+                )
+            )
+        return obs, rewards, dones, infos
+
+    def close(self):
+        self.writer.close()
+        self.env.close()
+
+
+class ActionRepeat(gym.Wrapper):
+    """Wrapper repeating each action for multiple environment steps."""
+
+    def __init__(
+        self,
+        env: gym.Env,
+        num_repeats: int = 1,
+        reward_aggregation: str = "sum",
+        obs_aggregation: str = "last",
+    ):
+        """Wrapper repeating each action for multiple environment steps.
+
+        This reduces the number of agent decisions (and the calls of all outer
+        wrappers) per simulated time. The repeated steps are taken with a single
+        step_many() call, and repetition stops early once the environment is done.
+        The info dict returned is the one of the last repeated step.
+
+        Args:
+            env (gym.Env): environment to wrap.
+            num_repeats (int, optional): number of steps each action is taken for.
+                Defaults to 1.
+            reward_aggregation (str, optional): how rewards of repeated steps are
+                aggregated, one of "sum", "mean" or "last". Defaults to "sum".
+            obs_aggregation (str, optional): how observations of repeated steps are
+                aggregated, one of "last", "mean" or "sum". Defaults to "last".
+        """
+        super().__init__(env)
+        for name, aggregation in [
+            ("reward_aggregation", reward_aggregation),
+            ("obs_aggregation", obs_aggregation),
+        ]:
+            if aggregation not in ["sum", "mean", "last"]:
+                raise ValueError(
+                    (
+                        f"{name} {aggregation} not supported. "
+                        "Use 'sum', 'mean' or 'last'."
+                    )
+                )
+        if num_repeats < 1:
+            raise ValueError("num_repeats must be at least 1.")
+        self.num_repeats = num_repeats
+        self.reward_aggregation = reward_aggregation
+        self.obs_aggregation = obs_aggregation
+
+    def step(self, action):
+        obs, rewards, dones, infos = beobench.experiment.batch.step_many(
+            self.env, [action] * self.num_repeats
+        )
+        group_starts = np.array([0])
+        obs, rewards = self._aggregate(obs, rewards, group_starts)
+        return _index_obs(obs, 0), float(rewards[0]), bool(dones[-1]), infos[-1]
+
+    def step_many(self, actions):
+        obs, rewards, dones, infos = beobench.experiment.batch.step_many(
+            self.env, [action for action in actions for _ in range(self.num_repeats)]
+        )
+        group_starts = np.arange(0, len(rewards), self.num_repeats)
+        group_ends = np.minimum(group_starts + self.num_repeats, len(rewards))
+        obs, rewards = self._aggregate(obs, rewards, group_starts)
+        return obs, rewards, dones[group_ends - 1], [infos[i - 1] for i in group_ends]
+
+    def _aggregate(self, obs, rewards: np.ndarray, group_starts: np.ndarray) -> tuple:
+        """Aggregate stacked observations and rewards of groups of repeated steps."""
+        group_ends = np.minimum(group_starts + self.num_repeats, len(rewards))
+        return (
+            _aggregate_groups(obs, group_starts, group_ends, self.obs_aggregation),
+            _aggregate_groups(
+                rewards, group_starts, group_ends, self.reward_aggregation
+            ),
+        )
+
+
 class PreventReset(gym.Wrapper):
     """Wrapper to prevent more than one (initial) reset of the environment."""
 
@@ -83,6 +643,12 @@ class PreventReset(gym.Wrapper):
             self.first_reset_done = True
             return self.env.reset(**kwargs)
 
+    def get_state(self) -> dict:
+        return {"first_reset_done": self.first_reset_done}
+
+    def set_state(self, state: dict) -> None:
+        self.first_reset_done = state["first_reset_done"]
+
 
 class WandbLogger(gym.Wrapper):
     """Wrapper to log all env data for every xth step."""
@@ -93,88 +659,498 @@ class WandbLogger(gym.Wrapper):
         log_freq: int = 1,
         summary_metric_keys: list = None,
         restart_sum_metrics_at_reset: bool = False,
+        flush_every: int = 100,
+        flush_interval: float = 10.0,
+        max_queued_batches: int = 16,
+        block_when_full: bool = False,
+        sink: str = None,
     ):
         """Wrapper to log all env data for every xth step.
 
+        Actions and observations are logged with one flat key per variable (e.g.
+        `env.returns.obs.<key>` for dict observations and `env.inputs.action.<i>`
+        for array actions), given by a schema computed once from the action and
+        observation spaces. Spaces other than Box, Discrete or dicts of these are
+        logged as (nested) values under `env.inputs.action` and `env.returns.obs`
+        instead. Info values are logged as `env.returns.info.<key>`. Summary metrics
+        (cummulative sum, mean, min and max) of all flat variables and of numeric
+        info values given in summary_metric_keys are updated on every step in numpy
+        arrays, independent of log_freq.
+
+        Logged steps are buffered and sent to the metrics sink (by default wandb)
+        in batches by a background thread, such that logging does not slow down the
+        environment loop. The buffer is also flushed on reset() and close().
+
         Args:
             env (gym.Env): environment to wrap.
             log_freq (int, optional): how often to log the step() method. E.g. for 2
                 every second step is logged. Defaults to 1.
-            summary_metric_keys (list, optional): list of keys of logged metrics for
-                summary metrics such as cummulative sum and mean are computed. This
-                defaults to ["env.returns.reward"]. WARNING: summary metrics only
-                work for log_feq == 1, otherwise the cummulative metrics will not be
-                correct.
+            summary_metric_keys (list, optional): list of keys of logged variables
+                for which summary metrics are logged (with suffixes `_cum`, `_mean`,
+                `_min` and `_max`). Info keys (e.g. `env.returns.info.total_power`)
+                are checked against the info of the first step, and skipped with a
+                warning if they are not numeric values. Defaults to
+                ["env.returns.reward"].
+            restart_sum_metrics_at_reset (bool, optional): whether to restart the
+                summary metrics at each reset. Defaults to False.
+            flush_every (int, optional): number of logged steps after which they are
+                sent to the sink. Defaults to 100.
+            flush_interval (float, optional): seconds after which logged steps are
+                sent to the sink. Defaults to 10.0.
+            max_queued_batches (int, optional): maximum number of batches of logged
+                steps waiting to be sent. Defaults to 16.
+            block_when_full (bool, optional): whether to block the environment loop
+                when max_queued_batches is reached instead of dropping further
+                batches (with a warning counting the dropped steps). Defaults to
+                False.
+            sink (str, optional): name of metrics sink to log to, e.g. `wandb` or
+                `sqlite`. Defaults to None, in which case `general.metrics_sink`
+                from the config is used.
         """
 
         if summary_metric_keys is None:
             summary_metric_keys = ["env.returns.reward"]
+        if sink is None:
+            sink = config["general"]["metrics_sink"]
 
         super().__init__(env)
-        wandb.init(
-            id=config["autogen"]["run_id"],
-            project=config["general"]["wandb_project"],
-            entity=config["general"]["wandb_entity"],
-            group=config["general"]["wandb_group"],
-        )
+        if sink == "wandb":
+            wandb.init(
+                id=config["autogen"]["run_id"],
+                project=config["general"]["wandb_project"],
+                entity=config["general"]["wandb_entity"],
+                group=config["general"]["wandb_group"],
+            )
+        self.sink = create_metrics_sink(sink)
         self.log_freq = log_freq
         self.total_env_steps = 0
         self.restart_sum_metrics_at_reset = restart_sum_metrics_at_reset
-        self.cum_metrics = {key: 0 for key in summary_metric_keys}
         self.num_env_resets = 0
-        self.last_log_dict = {}
+
+        # Flat schema: one entry of each logged row per variable, followed by the
+        # info values of summary metrics (resolved on the first step)
+        self._nested_keys = []
+        action_keys, self._action_slices = self._get_flat_keys(
+            self.env.action_space, "env.inputs.action"
+        )
+        obs_keys, obs_slices = self._get_flat_keys(
+            self.env.observation_space, "env.returns.obs"
+        )
+        num_action_values = len(action_keys)
+        self._obs_slices = _offset_slices(obs_slices, num_action_values)
+        self._reward_index = num_action_values + len(obs_keys)
+        self.keys = action_keys + obs_keys + ["env.returns.reward"]
+        self._info_keys = [
+            key
+            for key in dict.fromkeys(summary_metric_keys)
+            if key.startswith(_INFO_PREFIX + ".") and key not in self.keys
+        ]
+        self.keys += self._info_keys
+        self._info_paths = None
+
+        unknown_keys = set(summary_metric_keys) - set(self.keys)
+        if unknown_keys:
+            raise ValueError(
+                (
+                    f"Summary metric keys {sorted(unknown_keys)} not logged by "
+                    f"WandbLogger. Available keys: {self.keys} and numeric info "
+                    f"values ({_INFO_PREFIX}.<key>)."
+                )
+            )
+        self.summary_metric_keys = list(dict.fromkeys(summary_metric_keys))
+        self._summary_indices = np.array(
+            [self.keys.index(key) for key in self.summary_metric_keys], dtype=np.intp
+        )
+        self._restart_summary_metrics()
+        self.last_record = None
+
+        self.logger = beobench.integration.wandb.BufferedLogger(
+            log_many_fn=lambda records: self.sink.log_many(
+                [self._get_log_dict(record) for record in records]
+            ),
+            flush_every=flush_every,
+            flush_interval=flush_interval,
+            max_queued_batches=max_queued_batches,
+            block_when_full=block_when_full,
+        )
 
     def step(self, action):
         obs, reward, done, info = self.env.step(action)
 
         self.total_env_steps += 1
 
+        if self._info_paths is None:
+            self._init_info_keys(info)
+        row = np.empty(len(self.keys))
+        _fill_flat(row, self._action_slices, action)
+        _fill_flat(row, self._obs_slices, obs)
+        row[self._reward_index] = reward
+        for i, path in enumerate(self._info_paths, start=self._reward_index + 1):
+            row[i] = _get_nested(info, path)
+
+        self.num_summary_steps += 1
+        self.cum_metrics += row
+        np.minimum(self.min_metrics, row, out=self.min_metrics)
+        np.maximum(self.max_metrics, row, out=self.max_metrics)
+
         if self.total_env_steps % self.log_freq == 0:
-            # TODO: enable flat dict for dict action and observation spaces
-            # This would allow for summary values of invididual actions/observations
-            if isinstance(action, (list, np.ndarray)):
-                for i, act in enumerate(action):
-                    new_action = {f"{i}": act}
-                action = new_action
-
-            log_dict = {
-                "env.inputs.action": action,
-                "env.returns.obs": obs,
-                "env.returns.reward": reward,
-                "env.returns.done": done,
-                "env.total_steps": self.total_env_steps,
-                **{f"env.returns.info.{key}": value for key, value in info.items()},
-            }
-            log_dict = self._create_summary_metrics(log_dict)
-            wandb.log(log_dict)
-            self.last_log_dict = log_dict
+            # summary metrics are copied by fancy indexing, info is copied as the env
+            # may modify it after it is logged in the background thread
+            record = (
+                row,
+                done,
+                self.total_env_steps,
+                copy.deepcopy(info),
+                self.cum_metrics[self._summary_indices],
+                self.min_metrics[self._summary_indices],
+                self.max_metrics[self._summary_indices],
+                self.num_summary_steps,
+                {
+                    key: value
+                    for key, value in [
+                        ("env.inputs.action", action),
+                        ("env.returns.obs", obs),
+                    ]
+                    if key in self._nested_keys
+                },
+            )
+            self.logger.log(record)
+            self.last_record = record
 
         return obs, reward, done, info
 
     def reset(self):
 
         if self.restart_sum_metrics_at_reset:
-            wandb.log({"reset": self.last_log_dict, "reset.num": self.num_env_resets})
-            self.cum_metrics = {key: 0 for key in self.cum_metrics.keys()}
+            if self.last_record is not None:
+                self.logger.log(
+                    {
+                        **beobench.utils.flatten_dict(
+                            self._get_log_dict(self.last_record), parent_key="reset"
+                        ),
+                        "reset.num": self.num_env_resets,
+                    }
+                )
+            self._restart_summary_metrics()
             self.num_env_resets += 1
+        self.logger.flush()
 
         return self.env.reset()
 
-    def _create_summary_metrics(self, log_dict: dict):
-        """Create summary of variables in log dict.
+    def close(self):
+        self.logger.close()
+        self.sink.close()
+        self.env.close()
+
+    def get_state(self) -> dict:
+        return {
+            "total_env_steps": self.total_env_steps,
+            "num_summary_steps": self.num_summary_steps,
+            "cum_metrics": self.cum_metrics.copy(),
+            "min_metrics": self.min_metrics.copy(),
+            "max_metrics": self.max_metrics.copy(),
+            "num_env_resets": self.num_env_resets,
+            "last_record": self.last_record,
+            # schema changes once info keys are resolved on the first step
+            "schema": (
+                list(self.keys),
+                list(self._info_keys),
+                self._info_paths,
+                list(self.summary_metric_keys),
+            ),
+        }
+
+    def set_state(self, state: dict) -> None:
+        self.total_env_steps = state["total_env_steps"]
+        self.num_summary_steps = state["num_summary_steps"]
+        self.cum_metrics = state["cum_metrics"].copy()
+        self.min_metrics = state["min_metrics"].copy()
+        self.max_metrics = state["max_metrics"].copy()
+        self.num_env_resets = state["num_env_resets"]
+        self.last_record = state["last_record"]
+        (
+            self.keys,
+            self._info_keys,
+            self._info_paths,
+            self.summary_metric_keys,
+        ) = state["schema"]
+        self._summary_indices = np.array(
+            [self.keys.index(key) for key in self.summary_metric_keys], dtype=np.intp
+        )
+
+    def _get_flat_keys(self, space: gym.Space, prefix: str) -> tuple:
+        """Get flat log keys of space, falling back to logging nested values."""
+        try:
+            return _get_flat_keys(space, prefix)
+        except NotImplementedError:
+            self._nested_keys.append(prefix)
+            return [], {}
+
+    def _init_info_keys(self, info: dict) -> None:
+        """Resolve info keys of summary metrics from info of first step.
+
+        Info keys that are not numeric values in the first info are removed from the
+        schema with a warning.
+        """
+        info_paths = _get_flat_paths(info, _INFO_PREFIX)
+        self._info_paths = []
+        skipped_keys = []
+        for key in self._info_keys:
+            path = info_paths.get(key)
+            if path is not None and _is_numeric(_get_nested(info, path)):
+                self._info_paths.append(path)
+            else:
+                skipped_keys.append(key)
+
+        if skipped_keys:
+            warnings.warn(
+                (
+                    f"Summary metric keys {skipped_keys} are not numeric info values "
+                    "and are skipped."
+                )
+            )
+            skipped_indices = [self.keys.index(key) for key in skipped_keys]
+            self.keys = [key for key in self.keys if key not in skipped_keys]
+            self._info_keys = [
+                key for key in self._info_keys if key not in skipped_keys
+            ]
+            self.summary_metric_keys = [
+                key for key in self.summary_metric_keys if key not in skipped_keys
+            ]
+            self._summary_indices = np.array(
+                [self.keys.index(key) for key in self.summary_metric_keys],
+                dtype=np.intp,
+            )
+            self.cum_metrics = np.delete(self.cum_metrics, skipped_indices)
+            self.min_metrics = np.delete(self.min_metrics, skipped_indices)
+            self.max_metrics = np.delete(self.max_metrics, skipped_indices)
 
-        In particular, the
+    def _restart_summary_metrics(self) -> None:
+        self.num_summary_steps = 0
+        self.cum_metrics = np.zeros(len(self.keys))
+        self.min_metrics = np.full(len(self.keys), np.inf)
+        self.max_metrics = np.full(len(self.keys), -np.inf)
+
+    def _get_log_dict(self, record) -> dict:
+        """Create log dict from logged record.
+
+        This is called by the background thread of the logger (or for the reset
+        log), such that creating the dict does not slow down the environment loop.
 
         Args:
-            log_dict (dict): _description_
+            record (tuple): record created in step().
 
         Returns:
-            _type_: _description_
+            dict: flat log dict.
         """
+        if isinstance(record, dict):
+            return record
+        row, done, total_steps, info, cums, mins, maxs, num_steps, nested = record
+        log_dict = dict(zip(self.keys, row.tolist()))
+        log_dict.update(nested)
+        log_dict["env.returns.done"] = done
+        log_dict["env.total_steps"] = total_steps
+        log_dict.update(beobench.utils.flatten_dict(info, parent_key=_INFO_PREFIX))
+        for key, cum, min_value, max_value in zip(
+            self.summary_metric_keys, cums.tolist(), mins.tolist(), maxs.tolist()
+        ):
+            log_dict[key + "_cum"] = cum
+            log_dict[key + "_mean"] = cum / num_steps
+            log_dict[key + "_min"] = min_value
+            log_dict[key + "_max"] = max_value
+        return log_dict
 
-        for key in self.cum_metrics.keys():
-            self.cum_metrics[key] += log_dict[key]
-            log_dict[key + "_cum"] = self.cum_metrics[key]
-            log_dict[key + "_mean"] = self.cum_metrics[key] / self.total_env_steps
 
-        return log_dict
+def _get_flat_layout(space: gym.spaces.Dict) -> tuple:
+    """Get position of each subspace of dict space in a flat array.
+
+    Args:
+        space (gym.spaces.Dict): dict space with Box or Discrete subspaces.
+
+    Returns:
+        tuple: dicts of slice and shape of each key, and arrays of lower and upper
+            bounds of flat space.
+    """
+    slices, shapes, lows, highs = {}, {}, [], []
+    offset = 0
+    for key, subspace in space.spaces.items():
+        if isinstance(subspace, gym.spaces.Box):
+            shape = subspace.shape
+            lows.append(subspace.low.flatten())
+            highs.append(subspace.high.flatten())
+        elif isinstance(subspace, gym.spaces.Discrete):
+            shape = ()
+            lows.append(np.zeros(1))
+            highs.append(np.full(1, subspace.n - 1))
+        else:
+            raise NotImplementedError(
+                f"Flattening of {type(subspace).__name__} space ({key}) not supported."
+            )
+        size = int(np.prod(shape))
+        slices[key] = slice(offset, offset + size)
+        shapes[key] = shape
+        offset += size
+
+    return slices, shapes, np.concatenate(lows), np.concatenate(highs)
+
+
+def _get_flat_keys(space: gym.Space, prefix: str) -> tuple:
+    """Get flat log keys of space and slices of its values in a flat array.
+
+    Args:
+        space (gym.Space): Box, Discrete or dict space with Box or Discrete
+            subspaces.
+        prefix (str): prefix of all keys.
+
+    Returns:
+        tuple: list of keys, and slice of the values of each dict key (or None for
+            non-dict spaces) in the flat array.
+    """
+    if isinstance(space, gym.spaces.Dict):
+        slices, _, _, _ = _get_flat_layout(space)
+        keys = []
+        for key, key_slice in slices.items():
+            size = key_slice.stop - key_slice.start
+            if size == 1:
+                keys.append(f"{prefix}.{key}")
+            else:
+                keys += [f"{prefix}.{key}.{i}" for i in range(size)]
+        return keys, slices
+
+    if isinstance(space, gym.spaces.Box):
+        size = int(np.prod(space.shape))
+    elif isinstance(space, gym.spaces.Discrete):
+        size = 1
+    else:
+        raise NotImplementedError(
+            f"Logging of {type(space).__name__} space not supported."
+        )
+    if size == 1:
+        return [prefix], {None: slice(0, 1)}
+    return [f"{prefix}.{i}" for i in range(size)], {None: slice(0, size)}
+
+
+def _get_subset_slices(obs_slices: dict, indices: np.ndarray) -> dict:
+    """Get slices of keys in subset of flat observation given by indices.
+
+    Only keys of which all values are selected (in their original order) are kept,
+    as other keys can't be given by a slice of the subset.
+    """
+    subset_slices = {}
+    for key, obs_slice in obs_slices.items():
+        positions = np.flatnonzero(
+            (indices >= obs_slice.start) & (indices < obs_slice.stop)
+        )
+        size = obs_slice.stop - obs_slice.start
+        if (
+            len(positions) == size
+            and np.array_equal(
+                indices[positions], np.arange(obs_slice.start, obs_slice.stop)
+            )
+            and np.all(np.diff(positions) == 1)
+        ):
+            subset_slices[key] = slice(int(positions[0]), int(positions[0]) + size)
+    return subset_slices
+
+
+def _get_flat_paths(d: dict, parent_key: str) -> dict:
+    """Get path (tuple of keys) of each value of nested dict, by flattened key.
+
+    Args:
+        d (dict): (nested) dictionary.
+        parent_key (str): key prefix of all flattened keys.
+
+    Returns:
+        dict: path of each key as flattened by beobench.utils.flatten_dict().
+    """
+    paths = {}
+    for key, value in d.items():
+        flat_key = f"{parent_key}.{key}"
+        if isinstance(value, dict) and value:
+            for sub_key, path in _get_flat_paths(value, flat_key).items():
+                paths[sub_key] = (key,) + path
+        else:
+            paths[flat_key] = (key,)
+    return paths
+
+
+def _get_nested(d: dict, path: tuple):
+    """Get value at path of nested dict, or NaN if not given."""
+    try:
+        for key in path:
+            d = d[key]
+    except (KeyError, TypeError):
+        return np.nan
+    return d
+
+
+def _is_numeric(value) -> bool:
+    return np.isscalar(value) and np.asarray(value).dtype.kind in "biuf"
+
+
+def _offset_slices(slices: dict, offset: int) -> dict:
+    return {
+        key: slice(key_slice.start + offset, key_slice.stop + offset)
+        for key, key_slice in slices.items()
+    }
+
+
+def _fill_flat(row: np.ndarray, slices: dict, values) -> None:
+    """Write (dict of) values into their slices of flat row."""
+    for key, key_slice in slices.items():
+        row[key_slice] = np.ravel(values if key is None else values[key])
+
+
+def _aggregate_groups(values, starts: np.ndarray, ends: np.ndarray, aggregation: str):
+    """Aggregate consecutive groups of stacked values (or dict of these)."""
+    if isinstance(values, dict):
+        return {
+            key: _aggregate_groups(sub_values, starts, ends, aggregation)
+            for key, sub_values in values.items()
+        }
+    values = np.asarray(values)
+    if aggregation == "last":
+        return values[ends - 1]
+    sums = np.add.reduceat(values, starts, axis=0)
+    if aggregation == "mean":
+        counts = (ends - starts).reshape((-1,) + (1,) * (values.ndim - 1))
+        means = sums / counts
+        return means.astype(values.dtype) if values.dtype.kind == "f" else means
+    return sums
+
+
+def _index_obs(obs, index: int):
+    """Get single observation from stacked observations (or dict of these)."""
+    if isinstance(obs, dict):
+        return {key: sub_obs[index] for key, sub_obs in obs.items()}
+    return obs[index]
+
+
+class _RotatingBuffers:
+    """Preallocated arrays that are reused in rotation (if num_buffers is given)."""
+
+    def __init__(self, num_buffers: int = None, init_fn=None):
+        self.num_buffers = num_buffers
+        self.init_fn = init_fn
+        self._buffers = []
+        self._index = 0
+
+    def get(self, shape: tuple, dtype) -> np.ndarray:
+        """Get next buffer, (re)allocating buffers if shape or dtype changed.
+
+        Without num_buffers, a new array is returned on every call.
+        """
+        if not self.num_buffers:
+            buffer = np.empty(shape, dtype=dtype)
+            return self.init_fn(buffer) if self.init_fn is not None else buffer
+        if not self._buffers or (
+            self._buffers[0].shape != shape or self._buffers[0].dtype != dtype
+        ):
+            self._buffers = [
+                np.empty(shape, dtype=dtype) for _ in range(self.num_buffers)
+            ]
+            if self.init_fn is not None:
+                self._buffers = [self.init_fn(buffer) for buffer in self._buffers]
+        buffer = self._buffers[self._index % self.num_buffers]
+        self._index += 1
+        return buffer
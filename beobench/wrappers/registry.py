@@ -0,0 +1,118 @@
+"""Registry resolving and validating wrappers given in Beobench configs.
+
+Wrapper classes are resolved only once per process. The `origin` of a wrapper can be
+the name of a built-in wrapper module (e.g. `general`), a dotted import path of an
+installed module (e.g. `mypackage.wrappers`) or a path to a python file (e.g. mounted
+into the experiment container).
+"""
+
+import hashlib
+import importlib
+import importlib.util
+import inspect
+import pathlib
+import sys
+
+from beobench.constants import AVAILABLE_WRAPPERS
+
+_wrapper_classes = {}
+
+
+def get_wrapper(wrapper_dict: dict) -> type:
+    """Get wrapper class for wrapper config.
+
+    Args:
+        wrapper_dict (dict): wrapper config with `origin` and `class` keys.
+
+    Returns:
+        type: wrapper class.
+    """
+    key = (wrapper_dict["origin"], wrapper_dict["class"])
+    if key not in _wrapper_classes:
+        _wrapper_classes[key] = _resolve_wrapper(*key)
+    return _wrapper_classes[key]
+
+
+def register_wrappers(wrapper_dicts: list) -> list:
+    """Resolve wrapper classes and validate their configs.
+
+    Args:
+        wrapper_dicts (list): list of wrapper configs, as under `wrappers` in a
+            Beobench config.
+
+    Raises:
+        ValueError: if the config of a wrapper does not match the arguments of the
+            wrapper class.
+
+    Returns:
+        list: list of tuples of wrapper class and wrapper kwargs.
+    """
+    wrappers = []
+    for wrapper_dict in wrapper_dicts:
+        wrapper_class = get_wrapper(wrapper_dict)
+        wrapper_config = wrapper_dict.get("config") or {}
+        try:
+            inspect.signature(wrapper_class).bind(None, **wrapper_config)
+        except TypeError as e:
+            raise ValueError(
+                (
+                    f"Invalid config for wrapper {wrapper_dict['class']} "
+                    f"from {wrapper_dict['origin']}: {e}"
+                )
+            ) from e
+        wrappers.append((wrapper_class, wrapper_config))
+    return wrappers
+
+
+def get_file_id(path: str) -> str:
+    """Get name of wrapper file that is unique for its resolved path.
+
+    Wrapper files with the same name in different directories get different ids,
+    e.g. for their mount points in the experiment container and their module names.
+
+    Args:
+        path (str): path of wrapper file.
+
+    Returns:
+        str: file stem followed by a short hash of the resolved path.
+    """
+    path = pathlib.Path(path)
+    path_hash = hashlib.sha256(str(path.resolve()).encode("utf-8")).hexdigest()
+    return f"{path.stem}_{path_hash[:8]}"
+
+
+def _resolve_wrapper(origin: str, class_name: str) -> type:
+    if origin in AVAILABLE_WRAPPERS:
+        module = importlib.import_module("beobench.wrappers." + origin)
+    elif origin.endswith(".py"):
+        module = _import_file(pathlib.Path(origin))
+    else:
+        module = importlib.import_module(origin)
+
+    try:
+        return getattr(module, class_name)
+    except AttributeError as e:
+        raise ValueError(
+            f"Wrapper class {class_name} not found in wrapper origin {origin}."
+        ) from e
+
+
+def _import_file(path: pathlib.Path) -> object:
+    """Import python file as module."""
+    module_name = f"beobench_user_wrappers_{get_file_id(path)}"
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    if spec is None:
+        raise ValueError(f"Unable to import wrapper file {path}.")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        # don't keep partially initialised module, such that a fixed file is
+        # imported again
+        sys.modules.pop(module_name, None)
+        raise
+    return module
@@ -1,5 +1,9 @@
 """Test configuration with fixtures."""
 
+import importlib
+import sys
+import types
+
 import pytest
 
 import beobench.experiment.config_parser
@@ -10,3 +14,30 @@ collect_ignore_glob = ["performance"]
 @pytest.fixture
 def run_config():
     return beobench.experiment.config_parser.get_standard_config("test_energym")
+
+
+@pytest.fixture
+def general_wrappers(monkeypatch, tmp_path):
+    """Module beobench.wrappers.general, importable outside experiment containers.
+
+    The wrappers module reads the experiment config from the provider, which is
+    only available inside experiment containers. It is therefore imported with a
+    provider module using the default config and a local SQLite metrics sink.
+    """
+    pytest.importorskip("gym")
+    pytest.importorskip("wandb")
+    import beobench.integration.sinks  # pylint: disable=import-outside-toplevel
+
+    config = beobench.experiment.config_parser.add_default_and_user_configs({})
+    config["autogen"] = beobench.experiment.config_parser.get_autogen_config()[
+        "autogen"
+    ]
+    config["general"]["metrics_sink"] = "sqlite"
+    provider = types.ModuleType("beobench.experiment.provider")
+    provider.config = config
+    provider.create_metrics_sink = lambda name=None: (
+        beobench.integration.sinks.create_sink("sqlite", tmp_path / "metrics.sqlite")
+    )
+    monkeypatch.setitem(sys.modules, "beobench.experiment.provider", provider)
+    monkeypatch.delitem(sys.modules, "beobench.wrappers.general", raising=False)
+    return importlib.import_module("beobench.wrappers.general")
@@ -1,6 +1,6 @@
 """Simple fixed action agent for time testing."""
 
-from beobench.experiment.provider import config, create_env
+from beobench.experiment.provider import config, create_env, step_many
 from beobench.constants import CONTAINER_DATA_DIR
 import timeit
 
@@ -9,6 +9,7 @@ env = create_env()
 action = config["agent"]["config"]["action"]
 num_steps = config["agent"]["config"]["num_steps"]
 use_native_env = config["agent"]["config"]["use_native_env"]
+use_step_many = config["agent"]["config"]["use_step_many"]
 
 print("Beobench: fixed actions being taken.")
 
@@ -18,6 +19,11 @@ if use_native_env:
         for _ in range(num_steps):
             env.env.step(action)
 
+elif use_step_many:
+
+    def take_steps():
+        step_many(env, [action] * num_steps)
+
 else:
 
     def take_steps():
@@ -0,0 +1,104 @@
+"""Benchmark steps per second of remote environments.
+
+Compares the Beobench remote env transport (Unix domain socket and TCP) with
+the Celery + RabbitMQ transport from `split_containers_example`. The Celery
+benchmark is only run if the broker and environment container of the example
+are running (e.g. run this script inside the agent container of the example's
+docker-compose setup) and `--celery` is given.
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from beobench.experiment.remote import RemoteEnv, serve_env
+
+
+class DummyEnv:
+    """Environment with (almost) no computational cost per step."""
+
+    def __init__(self, obs_size: int = 100):
+        self.observation_space = None
+        self.action_space = None
+        self.state = np.zeros(obs_size)
+
+    def reset(self):
+        self.state[:] = 0
+        return self.state
+
+    def step(self, action):
+        self.state += action
+        return self.state, 0.0, False, {}
+
+    def close(self):
+        pass
+
+
+def _serve_dummy_env(address: str, obs_size: int) -> None:
+    serve_env(DummyEnv(obs_size), address)
+
+
+def benchmark_beobench(address: str, num_steps: int, obs_size: int) -> float:
+    server = multiprocessing.Process(
+        target=_serve_dummy_env, args=(address, obs_size), daemon=True
+    )
+    server.start()
+    env = RemoteEnv(address)
+    env.reset()
+    action = np.ones(obs_size)
+
+    start = time.perf_counter()
+    for _ in range(num_steps):
+        env.step(action)
+    duration = time.perf_counter() - start
+
+    env.close()
+    server.join()
+    return num_steps / duration
+
+
+def benchmark_celery(num_steps: int) -> float:
+    sys.path.append(
+        os.path.join(os.path.dirname(__file__), "../../split_containers_example/source")
+    )
+    from envwrapper import step, reset  # pylint: disable=import-outside-toplevel
+
+    reset.delay().get()
+    start = time.perf_counter()
+    for _ in range(num_steps):
+        step.delay(np.ones(1)).get()
+    duration = time.perf_counter() - start
+    return num_steps / duration
+
+
+def main():
+    """Main benchmark function."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num-steps", type=int, default=10000)
+    parser.add_argument("--obs-size", type=int, default=100)
+    parser.add_argument("--celery", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        results = {
+            "beobench (unix socket)": benchmark_beobench(
+                f"unix://{tmp_dir}/env.sock", args.num_steps, args.obs_size
+            ),
+            "beobench (tcp)": benchmark_beobench(
+                "tcp://127.0.0.1:50123", args.num_steps, args.obs_size
+            ),
+        }
+    if args.celery:
+        results["celery + rabbitmq"] = benchmark_celery(args.num_steps)
+
+    for name, steps_per_sec in results.items():
+        print(f"Performance, {name}: {steps_per_sec:.0f} steps/sec")
+
+
+if __name__ == "__main__":
+    main()
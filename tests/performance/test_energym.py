@@ -10,6 +10,7 @@ def test_performance_on_fixed_actions(
     num_steps: int = 100,
     beobench_normalize: bool = False,
     beobench_use_native_env: bool = False,
+    beobench_use_step_many: bool = False,
 ):
 
     if config is None:
@@ -73,6 +74,7 @@ def test_performance_on_fixed_actions(
                     "action": action,
                     "num_steps": num_steps,
                     "use_native_env": beobench_use_native_env,
+                    "use_step_many": beobench_use_step_many,
                 },
             },
             "env": {
@@ -99,11 +101,17 @@ def main():
     # pylint: disable=cell-var-from-loop
 
     NUM_STEPS = 10000  # pylint: disable=invalid-name
-    for use_beobench, beobench_normalize, beobench_use_native_env in [
-        (True, False, False),
-        (True, True, False),
-        (True, False, True),
-        (False, None, None),
+    for (
+        use_beobench,
+        beobench_normalize,
+        beobench_use_native_env,
+        beobench_use_step_many,
+    ) in [
+        (True, False, False, False),
+        (True, True, False, False),
+        (True, False, True, False),
+        (True, False, False, True),
+        (False, None, None, None),
     ]:
         with open(
             "beobench_results/perf_test_results.txt", "a", encoding="utf-8"
@@ -113,6 +121,7 @@ def main():
             text_file.write(f"  use_beobench: {use_beobench}\n")
             text_file.write(f"  beobench_normalize: {beobench_normalize}\n")
             text_file.write(f"  beobench_use_native_env: {beobench_use_native_env}\n")
+            text_file.write(f"  beobench_use_step_many: {beobench_use_step_many}\n")
             text_file.write(f"  num_steps: {NUM_STEPS}\n\n")
 
         func_time = timeit.timeit(
@@ -122,6 +131,7 @@ def main():
                 num_steps=NUM_STEPS,
                 beobench_normalize=beobench_normalize,
                 beobench_use_native_env=beobench_use_native_env,
+                beobench_use_step_many=beobench_use_step_many,
             ),
             number=1,
         )
@@ -0,0 +1,78 @@
+"""Benchmark wandb calls and time for logging episode data.
+
+Compares logging each step with a separate wandb.log() call to the bulk upload of
+chunks as wandb tables or as a wandb artifact in
+`beobench.integration.wandb.log_eps_data()`. By default, wandb runs in offline mode,
+such that no data is uploaded.
+"""
+
+import argparse
+import time
+
+import numpy as np
+import wandb
+
+import beobench.integration.wandb
+
+
+def benchmark(eps_dict: dict, **log_kwargs) -> tuple:
+    num_calls = 0
+    wandb_log = wandb.log
+    wandb_log_artifact = wandb.log_artifact
+
+    def counting(log_fn):
+        def counting_log_fn(*args, **kwargs):
+            nonlocal num_calls
+            num_calls += 1
+            return log_fn(*args, **kwargs)
+
+        return counting_log_fn
+
+    wandb.log = counting(wandb_log)
+    wandb.log_artifact = counting(wandb_log_artifact)
+    try:
+        start = time.perf_counter()
+        beobench.integration.wandb.log_eps_data(eps_dict, **log_kwargs)
+        duration = time.perf_counter() - start
+    finally:
+        wandb.log = wandb_log
+        wandb.log_artifact = wandb_log_artifact
+    return num_calls, duration
+
+
+def main():
+    """Main benchmark function."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num-steps", type=int, default=100000)
+    parser.add_argument("--num-keys", type=int, default=20)
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--wandb-mode", default="offline")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    eps_dict = {
+        f"obs_{i}": rng.normal(size=args.num_steps) for i in range(args.num_keys)
+    }
+
+    results = {}
+    for name, log_kwargs in [
+        ("steps", {"mode": "steps"}),
+        ("table", {"mode": "table", "chunk_size": args.chunk_size}),
+        ("artifact", {"mode": "artifact", "chunk_size": args.chunk_size}),
+    ]:
+        run = wandb.init(mode=args.wandb_mode, project="beobench_benchmark")
+        results[name] = benchmark(eps_dict, **log_kwargs)
+        run.finish()
+
+    scale = 100000 / args.num_steps
+    for name, (num_calls, duration) in results.items():
+        print(
+            (
+                f"Performance, {name}: {num_calls * scale:.0f} wandb calls and "
+                f"{duration * scale:.2f} sec per 100k steps"
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
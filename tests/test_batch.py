@@ -0,0 +1,88 @@
+"""Tests for batch module."""
+
+import pytest
+
+gym = pytest.importorskip("gym")
+
+import numpy as np  # pylint: disable=wrong-import-position
+
+import beobench.experiment.batch as batch  # pylint: disable=wrong-import-position
+
+
+class CountingEnv(gym.Env):
+    """Env whose observation is the sum of actions, done after max_steps steps."""
+
+    observation_space = gym.spaces.Box(low=-100, high=100, shape=(1,))
+    action_space = gym.spaces.Box(low=-10, high=10, shape=(1,))
+
+    def __init__(self, max_steps=10):
+        self.max_steps = max_steps
+        self.num_steps = 0
+        self.total = 0.0
+
+    def reset(self, **kwargs):
+        self.num_steps, self.total = 0, 0.0
+        return np.array([self.total])
+
+    def step(self, action):
+        self.num_steps += 1
+        self.total += float(np.asarray(action).sum())
+        done = self.num_steps >= self.max_steps
+        return np.array([self.total]), 1.0, done, {"step": self.num_steps}
+
+
+class NativeCountingEnv(CountingEnv):
+    """CountingEnv with native step_many recording the received action batches."""
+
+    def __init__(self, max_steps=10):
+        super().__init__(max_steps)
+        self.action_batches = []
+
+    def step_many(self, actions):
+        self.action_batches.append(list(actions))
+        return batch.stack_steps([self.step(action) for action in actions])
+
+
+class PassThrough(gym.Wrapper):
+    pass
+
+
+class AddOne(gym.ActionWrapper):
+    def action(self, action):
+        return action + 1
+
+
+class Double(gym.ObservationWrapper):
+    def observation(self, observation):
+        return observation * 2
+
+
+def test_step_many_stops_when_done():
+    env = CountingEnv(max_steps=3)
+    env.unwrapped.reset()
+    obs, rewards, dones, infos = batch.step_many(env, [np.ones(1)] * 5)
+
+    assert obs.tolist() == [[1.0], [2.0], [3.0]]
+    assert rewards.tolist() == [1.0, 1.0, 1.0]
+    assert dones.tolist() == [False, False, True]
+    assert [info["step"] for info in infos] == [1, 2, 3]
+
+
+def test_step_many_passes_actions_through_wrappers_to_native_env():
+    inner_env = NativeCountingEnv()
+    env = Double(AddOne(PassThrough(inner_env)))
+    env.unwrapped.reset()
+    obs, rewards, _, _ = batch.step_many(env, [np.zeros(1)] * 3)
+
+    assert len(inner_env.action_batches) == 1
+    assert [a.tolist() for a in inner_env.action_batches[0]] == [[1.0]] * 3
+    assert obs.tolist() == [[2.0], [4.0], [6.0]]
+    assert rewards.tolist() == [1.0, 1.0, 1.0]
+
+
+def test_step_many_without_actions():
+    env = Double(CountingEnv())
+    env.unwrapped.reset()
+    obs, rewards, dones, infos = batch.step_many(env, [])
+
+    assert len(obs) == len(rewards) == len(dones) == len(infos) == 0
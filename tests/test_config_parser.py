@@ -0,0 +1,73 @@
+"""Tests for config parser module."""
+
+import beobench.experiment.config_parser as config_parser
+
+
+def test_fingerprint_ignores_order_number_format_and_autogen(run_config):
+    config_a = {
+        "env": {"config": {"days": 365, "step": 1.0}},
+        "agent": {"lr": 0.1},
+        "general": {},
+    }
+    config_b = {
+        "agent": {"lr": 0.1},
+        "env": {"config": {"step": 1, "days": 365.0}},
+        "autogen": {"run_id": "abc"},
+        "general": {"wandb_api_key": "secret"},
+    }
+
+    assert config_parser.fingerprint(config_a) == config_parser.fingerprint(config_b)
+    assert config_parser.fingerprint(run_config) != config_parser.fingerprint(config_a)
+
+
+def test_fingerprint_only_excludes_top_level_paths():
+    config = {
+        "env": {"config": {"num_samples": 1, "autogen": {"a": 1}}},
+        "general": {"num_samples": 1},
+    }
+    fingerprint = config_parser.fingerprint(config)
+
+    changed = {
+        "env": {"config": {"num_samples": 2, "autogen": {"a": 1}}},
+        "general": {"num_samples": 1},
+    }
+    assert config_parser.fingerprint(changed) != fingerprint
+    changed = {
+        "env": {"config": {"num_samples": 1, "autogen": {"a": 2}}},
+        "general": {"num_samples": 1},
+    }
+    assert config_parser.fingerprint(changed) != fingerprint
+    changed = {
+        "env": {"config": {"num_samples": 1, "autogen": {"a": 1}}},
+        "general": {"num_samples": 3, "wandb_api_key": "secret"},
+    }
+    assert config_parser.fingerprint(changed) == fingerprint
+
+
+def test_diff():
+    config_a = {"env": {"config": {"days": 365, "weather": "a"}}, "wrappers": []}
+    config_b = {"env": {"config": {"days": 365.0, "name": "b"}}, "wrappers": [1]}
+
+    assert config_parser.diff(config_a, config_b) == [
+        "env.config.name",
+        "env.config.weather",
+        "wrappers",
+    ]
+    assert config_parser.diff(config_a, config_a) == []
+
+
+def test_samples_share_fingerprint(run_config, monkeypatch):
+    import beobench.experiment.scheduler as scheduler
+
+    fingerprints = []
+    monkeypatch.setattr(
+        scheduler,
+        "_build_and_run_in_container",
+        lambda config, **kwargs: fingerprints.append(config["autogen"]["fingerprint"]),
+    )
+    config = config_parser.add_default_and_user_configs(run_config)
+    config["general"]["num_samples"] = 3
+    scheduler._run_samples(config, 3, no_additional_container=False)
+
+    assert len(fingerprints) == 3
+    assert len(set(fingerprints)) == 1
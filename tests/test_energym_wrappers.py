@@ -0,0 +1,46 @@
+"""Tests for energym wrappers module."""
+
+import pytest
+
+gym = pytest.importorskip("gym")
+
+import numpy as np  # pylint: disable=wrong-import-position
+
+import beobench.experiment.batch  # pylint: disable=wrong-import-position
+from beobench.wrappers import energym  # pylint: disable=wrong-import-position
+
+
+class InfoObsEnv(gym.Env):
+    """Env returning the action as info['obs'] values."""
+
+    observation_space = gym.spaces.Box(low=-10, high=10, shape=(1,))
+    action_space = gym.spaces.Box(low=-10, high=10, shape=(2,))
+
+    def reset(self, **kwargs):
+        return np.zeros(1)
+
+    def step(self, action):
+        info = {"obs": {"power_ev": action[0], "power_hvac": action[1]}}
+        return np.zeros(1), 0.0, False, info
+
+
+def test_get_weight_matrix():
+    obs_keys, weight_matrix = energym.get_weight_matrix(
+        [{"power_ev": 0.4, "power_hvac": 0.6}, {"power_hvac": 1.0}]
+    )
+    assert obs_keys == ["power_ev", "power_hvac"]
+    assert weight_matrix.tolist() == [[0.4, 0.6], [0.0, 1.0]]
+
+
+def test_custom_reward_matrix_form():
+    env = energym.CustomReward(
+        InfoObsEnv(),
+        info_obs_weights=[{"power_ev": 0.5, "power_hvac": 0.5}, {"power_hvac": 1.0}],
+        selected_weighting=1,
+    )
+    _, rewards, _, infos = beobench.experiment.batch.step_many(
+        env, np.array([[1.0, 3.0], [2.0, 4.0]])
+    )
+    assert rewards.tolist() == [3.0, 4.0]
+    assert infos[0]["custom_rewards"].tolist() == [2.0, 3.0]
+    assert infos[1]["custom_rewards"].tolist() == [3.0, 4.0]
@@ -0,0 +1,57 @@
+"""Tests for env pool module."""
+
+import pytest
+
+gym = pytest.importorskip("gym")
+
+import beobench.experiment.env_pool  # pylint: disable=wrong-import-position
+
+
+class DummyEnv(gym.Env):
+    """Env recording how often it was reset and whether it was closed."""
+
+    observation_space = gym.spaces.Discrete(2)
+    action_space = gym.spaces.Discrete(2)
+
+    def __init__(self, env_config):
+        self.env_config = env_config
+        self.num_resets = 0
+        self.closed = False
+
+    def reset(self, **kwargs):
+        self.num_resets += 1
+        return 0
+
+    def step(self, action):
+        return 0, 0.0, False, {}
+
+    def close(self):
+        self.closed = True
+
+
+def test_env_pool_reuses_envs_with_same_config():
+    pool = beobench.experiment.env_pool.EnvPool(DummyEnv, max_size=1)
+    env = pool.acquire({"days": 1})
+    inner_env = env.unwrapped
+    env.close()
+    env.close()  # second close must not release env twice
+    assert inner_env.num_resets == 1  # reset on release
+    assert not inner_env.closed
+
+    assert pool.acquire({"days": 1.0}).unwrapped is inner_env
+    assert pool.acquire({"days": 1}).unwrapped is not inner_env
+    assert pool.acquire({"days": 2}).unwrapped is not inner_env
+
+
+def test_env_pool_evicts_oldest_and_idle_envs():
+    pool = beobench.experiment.env_pool.EnvPool(DummyEnv, max_size=1)
+    env_a, env_b = pool.acquire({"days": 1}), pool.acquire({"days": 2})
+    env_a.close()
+    env_b.close()
+    assert env_a.unwrapped.closed
+    assert not env_b.unwrapped.closed
+
+    pool.idle_timeout = -1
+    pool.evict_idle()
+    assert env_b.unwrapped.closed
+    assert pool.acquire({"days": 2}).unwrapped is not env_b.unwrapped
@@ -0,0 +1,323 @@
+"""Tests for general wrappers module."""
+
+import pytest
+
+gym = pytest.importorskip("gym")
+
+import numpy as np  # pylint: disable=wrong-import-position
+
+import beobench.experiment.batch  # pylint: disable=wrong-import-position
+
+
+class DictEnv(gym.Env):
+    """Env with dict observations and actions, observing the last action."""
+
+    observation_space = gym.spaces.Dict(
+        {
+            "a": gym.spaces.Box(low=-10, high=10, shape=(2,)),
+            "b": gym.spaces.Box(low=-1, high=1, shape=(1,)),
+        }
+    )
+    action_space = gym.spaces.Dict(
+        {
+            "x": gym.spaces.Box(low=-10, high=10, shape=(2,)),
+            "y": gym.spaces.Discrete(3),
+        }
+    )
+
+    def reset(self, **kwargs):
+        return {"a": np.zeros(2), "b": np.zeros(1)}
+
+    def step(self, action):
+        obs = {"a": np.asarray(action["x"], float), "b": np.array([action["y"]])}
+        return obs, 1.0, False, {}
+
+
+def test_flatten_dict_obs_and_acts(general_wrappers):
+    env = general_wrappers.FlattenDictObs(
+        general_wrappers.FlattenDictActs(DictEnv()), dtype="float64"
+    )
+    assert env.observation_space.shape == (3,)
+    assert env.action_space.shape == (3,)
+
+    # installed gym versions may expect a different step() API of the wrapped env
+    dict_action = env.env.action(np.array([1.0, 2.0, 2.2]))
+    assert dict_action["x"].tolist() == [1.0, 2.0]
+    assert dict_action["y"] == 2
+    obs = env.observation({"a": np.array([1.0, 2.0]), "b": np.array([2.0])})
+    assert obs.tolist() == [1.0, 2.0, 2.0]
+
+    obs, rewards, _, _ = beobench.experiment.batch.step_many(
+        env, np.array([[1.0, 2.0, 0.0], [3.0, 4.0, 1.0]])
+    )
+    assert obs.tolist() == [[1.0, 2.0, 0.0], [3.0, 4.0, 1.0]]
+    assert rewards.tolist() == [1.0, 1.0]
+
+
+def test_flatten_dict_obs_step_many_without_actions(general_wrappers):
+    env = general_wrappers.FlattenDictObs(DictEnv())
+    obs, rewards, dones, infos = beobench.experiment.batch.step_many(env, [])
+
+    assert obs.shape == (0, 3)
+    assert obs.dtype == np.float32
+    assert len(rewards) == len(dones) == len(infos) == 0
+
+
+def test_subset_box_obs_slices_of_indices(general_wrappers):
+    flat_env = general_wrappers.FlattenDictObs(DictEnv())
+    assert flat_env.obs_slices == {"a": slice(0, 2), "b": slice(2, 3)}
+
+    env = general_wrappers.SubsetBoxObs(flat_env, selected_obs_indices=[2, 0])
+    assert env.obs_slices == {"b": slice(0, 1)}
+    assert env.observation(np.array([1.0, 2.0, 3.0])).tolist() == [3.0, 1.0]
+
+    env = general_wrappers.SubsetBoxObs(flat_env, selected_obs_indices=[2, 0, 1])
+    assert env.obs_slices == {"a": slice(1, 3), "b": slice(0, 1)}
+
+
+def test_subset_box_obs_step_many_without_actions(general_wrappers):
+    env = general_wrappers.SubsetBoxObs(
+        general_wrappers.FlattenDictObs(DictEnv()), selected_obs_keys=["b"]
+    )
+    obs, rewards, _, _ = beobench.experiment.batch.step_many(env, [])
+
+    assert obs.shape == (0, 1)
+    assert len(rewards) == 0
+
+
+class BoxEnv(gym.Env):
+    """Env with Box observations equal to the last action."""
+
+    observation_space = gym.spaces.Box(low=-np.inf, high=np.inf, shape=(2,))
+    action_space = gym.spaces.Box(low=-np.inf, high=np.inf, shape=(2,))
+
+    def reset(self, **kwargs):
+        return np.zeros(2)
+
+    def step(self, action):
+        return np.asarray(action, dtype=np.float64), 0.0, False, {}
+
+
+def test_running_normalize_obs_statistics(general_wrappers, tmp_path):
+    rng = np.random.default_rng(0)
+    observations = rng.normal(loc=3.0, scale=2.0, size=(20, 2))
+    env = general_wrappers.RunningNormalizeObs(
+        BoxEnv(), stats_path=tmp_path / "stats.npz"
+    )
+    env.observation(observations[0])
+    beobench.experiment.batch.step_many(env, observations[1:])
+
+    assert env.count == 20
+    np.testing.assert_allclose(env.mean, observations.mean(axis=0))
+    np.testing.assert_allclose(env.m2 / env.count, observations.var(axis=0))
+
+    env.close()
+    loaded_env = general_wrappers.RunningNormalizeObs(
+        BoxEnv(), load_stats_path=tmp_path / "stats.npz", freeze_after=20
+    )
+    np.testing.assert_allclose(loaded_env.mean, env.mean)
+    assert loaded_env.frozen
+
+
+def test_running_normalize_obs_default_stats_paths_unique(general_wrappers):
+    paths = {
+        general_wrappers.RunningNormalizeObs(BoxEnv()).stats_path for _ in range(2)
+    }
+    assert len(paths) == 2
+
+
+class CountdownEnv(gym.Env):
+    """Env observing the step count, done after 5 steps."""
+
+    observation_space = gym.spaces.Box(low=0, high=5, shape=(1,))
+    action_space = gym.spaces.Box(low=-10, high=10, shape=(1,))
+
+    def __init__(self):
+        self.num_steps = 0
+
+    def reset(self, **kwargs):
+        self.num_steps = 0
+        return np.zeros(1)
+
+    def step(self, action):
+        self.num_steps += 1
+        info = {"step": self.num_steps}
+        return (
+            np.array([float(self.num_steps)]),
+            float(action),
+            self.num_steps >= 5,
+            info,
+        )
+
+
+def test_action_repeat_step(general_wrappers):
+    env = general_wrappers.ActionRepeat(
+        CountdownEnv(), num_repeats=2, obs_aggregation="mean"
+    )
+    obs, reward, done, info = env.step(3.0)
+
+    assert obs.tolist() == [1.5]
+    assert reward == 6.0
+    assert not done
+    assert info == {"step": 2}
+
+
+def test_action_repeat_step_many_stops_when_done(general_wrappers):
+    env = general_wrappers.ActionRepeat(
+        CountdownEnv(), num_repeats=2, reward_aggregation="mean"
+    )
+    obs, rewards, dones, infos = beobench.experiment.batch.step_many(
+        env, [1.0, 2.0, 3.0, 4.0]
+    )
+
+    # last group only contains the single step until the env is done
+    assert obs[:, 0].tolist() == [2.0, 4.0, 5.0]
+    assert rewards.tolist() == [1.0, 2.0, 3.0]
+    assert dones.tolist() == [False, False, True]
+    assert [info["step"] for info in infos] == [2, 4, 5]
+
+
+def test_action_repeat_invalid_config(general_wrappers):
+    with pytest.raises(ValueError):
+        general_wrappers.ActionRepeat(CountdownEnv(), num_repeats=0)
+    with pytest.raises(ValueError):
+        general_wrappers.ActionRepeat(CountdownEnv(), reward_aggregation="max")
+
+
+class InfoEnv(gym.Env):
+    """Env with tuple observations and numeric and non-numeric info values."""
+
+    observation_space = gym.spaces.Tuple(
+        [gym.spaces.Discrete(2), gym.spaces.Box(low=0, high=1, shape=(1,))]
+    )
+    action_space = gym.spaces.Discrete(3)
+
+    def reset(self, **kwargs):
+        return (0, np.zeros(1))
+
+    def step(self, action):
+        info = {"total_power": 10.0 * action, "comfort": {"penalty": 1}, "msg": "ok"}
+        return (1, np.ones(1)), float(action), False, info
+
+
+def test_wandb_logger_info_summary_metrics(general_wrappers, tmp_path):
+    import beobench.integration.sinks  # pylint: disable=import-outside-toplevel
+
+    env = general_wrappers.WandbLogger(
+        InfoEnv(),
+        summary_metric_keys=[
+            "env.returns.reward",
+            "env.returns.info.total_power",
+            "env.returns.info.comfort.penalty",
+            "env.returns.info.msg",
+        ],
+        restart_sum_metrics_at_reset=True,
+    )
+    with pytest.warns(UserWarning, match="env.returns.info.msg"):
+        env.step(1)
+    env.step(2)
+    env.reset()
+    env.close()
+
+    records = list(beobench.integration.sinks.iter_records(tmp_path / "metrics.sqlite"))
+    assert len(records) == 3
+    assert records[1]["env.returns.info.total_power_cum"] == 30.0
+    assert records[1]["env.returns.info.comfort.penalty_mean"] == 1.0
+    assert records[1]["env.returns.reward_max"] == 2.0
+    assert "env.returns.info.msg_cum" not in records[1]
+    # observation space without flat schema is logged as nested values
+    assert "env.returns.obs" in records[1]
+    assert records[1]["env.inputs.action"] == 2.0
+    # reset record is flat
+    assert records[2]["reset.env.returns.info.total_power_cum"] == 30.0
+    assert records[2]["reset.num"] == 0
+
+
+class ReusedInfoEnv(InfoEnv):
+    """InfoEnv returning the same (modified) info dict on every step."""
+
+    def __init__(self):
+        self.info = {"total_power": 0.0, "comfort": {"penalty": 0}}
+
+    def step(self, action):
+        self.info["total_power"] = 10.0 * action
+        self.info["comfort"]["penalty"] = action
+        return (1, np.ones(1)), float(action), False, self.info
+
+
+def test_wandb_logger_copies_info(general_wrappers, tmp_path):
+    import beobench.integration.sinks  # pylint: disable=import-outside-toplevel
+
+    env = general_wrappers.WandbLogger(ReusedInfoEnv(), flush_every=10)
+    for action in [1, 2]:
+        env.step(action)
+    env.close()
+
+    records = list(beobench.integration.sinks.iter_records(tmp_path / "metrics.sqlite"))
+    assert [record["env.returns.info.total_power"] for record in records] == [
+        10.0,
+        20.0,
+    ]
+    assert [record["env.returns.info.comfort.penalty"] for record in records] == [
+        1,
+        2,
+    ]
+
+
+def test_wandb_logger_unknown_summary_metric_key(general_wrappers):
+    with pytest.raises(ValueError):
+        general_wrappers.WandbLogger(InfoEnv(), summary_metric_keys=["env.returns.x"])
+
+
+class StepOverridingWrapper(gym.Wrapper):
+    """Wrapper overriding step() without step_many(), like WandbLogger."""
+
+    def step(self, action):
+        # installed gym versions may expect a different step() API of the wrapped
+        # observation wrapper, so it is stepped via its observation() method
+        obs, reward, done, info = self.env.env.step(action)
+        return self.env.observation(obs), reward, done, info
+
+
+def test_flatten_dict_obs_returns_new_arrays(general_wrappers):
+    env = general_wrappers.FlattenDictObs(DictEnv())
+    observations = [
+        env.observation({"a": np.array([i, -i]), "b": np.array([i])}) for i in range(4)
+    ]
+    assert [obs.tolist() for obs in observations] == [[i, -i, i] for i in range(4)]
+
+
+def test_step_many_through_step_wrapper_with_reused_buffers(general_wrappers):
+    env = StepOverridingWrapper(
+        general_wrappers.FlattenDictObs(DictEnv(), num_buffers=2)
+    )
+    actions = [{"x": np.array([i, -i]), "y": 0} for i in range(1, 5)]
+    obs, _, _, _ = beobench.experiment.batch.step_many(env, actions)
+
+    assert obs[:, :2].tolist() == [[1, -1], [2, -2], [3, -3], [4, -4]]
+
+
+class StepOverridingActionWrapper(gym.Wrapper):
+    """Wrapper overriding step() of action wrapper without step_many()."""
+
+    def step(self, action):
+        return self.env.env.step(self.env.action(action))
+
+
+def test_subset_box_obs_and_fix_box_acts_return_new_arrays(general_wrappers):
+    obs_env = general_wrappers.SubsetBoxObs(BoxEnv(), selected_obs_indices=[1])
+    observations = [obs_env.observation(np.array([0.0, i])) for i in range(4)]
+    assert [obs.tolist() for obs in observations] == [[i] for i in range(4)]
+
+    act_env = general_wrappers.FixBoxActs(BoxEnv(), fixed_actions={0: 5.0})
+    actions = [act_env.action(np.array([i])) for i in range(4)]
+    assert [action.tolist() for action in actions] == [[5.0, i] for i in range(4)]
+
+    # opt-in buffers are overwritten, but values are copied by step_many()
+    act_env = general_wrappers.FixBoxActs(
+        BoxEnv(), fixed_actions={0: 5.0}, num_buffers=2
+    )
+    obs, _, _, _ = beobench.experiment.batch.step_many(
+        StepOverridingActionWrapper(act_env), [np.array([i]) for i in range(4)]
+    )
+    assert obs.tolist() == [[5.0, i] for i in range(4)]
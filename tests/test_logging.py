@@ -0,0 +1,74 @@
+"""Tests for logging module."""
+
+import gzip
+import io
+
+import pytest
+
+import beobench.logging
+
+
+@pytest.fixture
+def console_lines():
+    """Messages logged to the console via loguru."""
+    messages = []
+    handler_id = beobench.logging.logger.add(messages.append, format="{message}")
+    yield messages
+    beobench.logging.logger.remove(handler_id)
+
+
+def run_pump(output: bytes, **kwargs) -> beobench.logging.LogPump:
+    pump = beobench.logging.LogPump(io.BytesIO(output), process_name="test", **kwargs)
+    pump.start().join()
+    return pump
+
+
+def test_log_pump_logs_lines(console_lines):
+    run_pump(b"first\nsecond line\nlast", chunk_size=4)
+    assert [line.split(" ", 1)[1].strip() for line in console_lines] == [
+        "first",
+        "second line",
+        "last",
+    ]
+
+
+def test_log_pump_rotates_log_file(tmp_path):
+    log_path = tmp_path / "run.log.gz"
+    output = b"".join(f"line {i:03d}\n".encode() for i in range(45))  # 405 bytes
+    run_pump(
+        output, log_path=log_path, chunk_size=90, max_file_bytes=100, num_backups=1
+    )
+
+    # file is rotated after every second chunk, only one backup is kept
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "run.log.1.gz",
+        "run.log.gz",
+    ]
+    assert gzip.decompress((tmp_path / "run.log.1.gz").read_bytes()) == output[180:360]
+    assert gzip.decompress(log_path.read_bytes()) == output[360:]
+
+
+def test_log_pump_rate_limits_console(console_lines, tmp_path):
+    log_path = tmp_path / "run.log.gz"
+    output = b"".join(f"line {i}\n".encode() for i in range(100))
+    run_pump(output, log_path=log_path, max_lines_per_sec=5)
+
+    assert len(console_lines) == 6
+    assert "95 lines not shown" in console_lines[-1]
+    assert gzip.decompress(log_path.read_bytes()) == output
+
+
+def test_log_pump_rate_limits_console_below_one_line_per_sec(console_lines):
+    run_pump(b"".join(f"line {i}\n".encode() for i in range(10)), max_lines_per_sec=0.5)
+
+    assert len(console_lines) == 2
+    assert "line 0" in console_lines[0]
+    assert "9 lines not shown" in console_lines[-1]
+
+
+def test_log_pump_filters_console(console_lines):
+    run_pump(b"step 1\nerror: a\nstep 2\nerror: b\n", line_filter="^error")
+    assert [line.split(" ", 1)[1].strip() for line in console_lines] == [
+        "error: a",
+        "error: b",
+    ]
@@ -0,0 +1,105 @@
+"""Tests for experiment metrics module."""
+
+import json
+import time
+import urllib.request
+
+from beobench.experiment import metrics
+
+
+def write_live_counters(local_dir, name, **counters):
+    path = local_dir / metrics.LIVE_METRICS_DIR / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(counters), encoding="utf-8")
+
+
+def test_render(tmp_path):
+    experiment_metrics = metrics.ExperimentMetrics(local_dir=tmp_path)
+    experiment_metrics.queue(3)
+    experiment_metrics.add_build(2.5)
+    experiment_metrics.add_build(1.5, success=False)
+    experiment_metrics.start("run_a")
+    experiment_metrics.finish(success=False)
+    experiment_metrics.start("run_b")
+
+    now = time.time()
+    for i in range(2):
+        write_live_counters(
+            tmp_path,
+            f"run_b_{i}.json",
+            run_id="run_b",
+            env_steps=100,
+            env_resets=1,
+            sim_seconds=900.0,
+            start_time=now - 10,
+            update_time=now,
+        )
+    write_live_counters(
+        tmp_path,
+        "old_run.json",
+        run_id="old_run",
+        env_steps=5,
+        env_resets=1,
+        sim_seconds=None,
+        start_time=now - 10,
+        update_time=now,
+    )
+    lines = experiment_metrics.render().splitlines()
+
+    assert 'beobench_experiments{state="queued"} 1' in lines
+    assert 'beobench_experiments{state="running"} 1' in lines
+    assert 'beobench_experiments_completed_total{result="failed"} 1' in lines
+    assert 'beobench_experiments_completed_total{result="finished"} 0' in lines
+    assert "beobench_image_build_seconds_sum 4.0" in lines
+    assert "beobench_image_build_seconds_count 2" in lines
+    assert "beobench_image_build_failures_total 1" in lines
+    # counters of all processes of a run are summed up
+    assert 'beobench_run_env_steps_total{run_id="run_b"} 200' in lines
+    assert any(
+        line.startswith('beobench_run_env_steps_per_second{run_id="run_b"} 20.0')
+        for line in lines
+    )
+    assert any(
+        line.startswith('beobench_run_sim_seconds_per_second{run_id="run_b"} 180.0')
+        for line in lines
+    )
+    assert not any("old_run" in line for line in lines)
+    assert lines[-1] == "# EOF"
+
+
+def test_render_skips_rates_of_inactive_runs(tmp_path):
+    experiment_metrics = metrics.ExperimentMetrics(local_dir=tmp_path)
+    experiment_metrics.queue()
+    experiment_metrics.start("run_a")
+    write_live_counters(
+        tmp_path,
+        "run_a.json",
+        run_id="run_a",
+        env_steps=10,
+        env_resets=1,
+        sim_seconds=None,
+        start_time=time.time() - 1000,
+        update_time=time.time() - 500,
+    )
+    text = experiment_metrics.render()
+
+    assert 'beobench_run_env_steps_total{run_id="run_a"} 10' in text
+    assert 'beobench_run_env_steps_per_second{run_id="run_a"} 0.0' in text
+    assert "beobench_run_sim_seconds_per_second{" not in text
+
+
+def test_textfile_and_http_endpoint(tmp_path):
+    experiment_metrics = metrics.ExperimentMetrics()
+    experiment_metrics.queue(2)
+    experiment_metrics.write_textfile(tmp_path / "beobench.prom")
+    assert (tmp_path / "beobench.prom").read_text(encoding="utf-8").endswith("# EOF\n")
+
+    experiment_metrics.serve(port=0)
+    try:
+        # pylint: disable=protected-access
+        port = experiment_metrics._server.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            assert response.headers["Content-Type"] == metrics.OPENMETRICS_CONTENT_TYPE
+            assert 'beobench_experiments{state="queued"} 2' in response.read().decode()
+    finally:
+        experiment_metrics.stop()
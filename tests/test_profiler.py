@@ -0,0 +1,51 @@
+"""Tests for wrapper profiler module."""
+
+import json
+
+import pytest
+
+gym = pytest.importorskip("gym")
+
+import beobench.experiment.profiler as profiler  # pylint: disable=wrong-import-position
+
+
+class DummyEnv(gym.Env):
+    observation_space = gym.spaces.Discrete(2)
+    action_space = gym.spaces.Discrete(2)
+
+    def reset(self, **kwargs):
+        return 0
+
+    def step(self, action):
+        return 0, 0.0, False, {}
+
+
+def test_latency_histogram():
+    histogram = profiler.LatencyHistogram()
+    for latency_ns in [1000] * 9 + [100000]:
+        histogram.add(latency_ns)
+
+    summary = histogram.summary()
+    assert summary["count"] == 10
+    assert summary["min_us"] == 1.0
+    assert summary["max_us"] == 100.0
+    assert summary["mean_us"] == pytest.approx(10.9)
+    # quantiles are upper bounds of power-of-two buckets
+    assert summary["p50_us"] == 1.024
+    assert summary["p99_us"] == 100.0
+
+
+def test_wrapper_profiler_dumps_summary_of_each_layer(tmp_path):
+    wrapper_profiler = profiler.WrapperProfiler()
+    env = wrapper_profiler.wrap(DummyEnv())
+    env = wrapper_profiler.wrap(gym.Wrapper(env))
+    wrapper_profiler.add_dump_on_close(env, tmp_path / "profile.json")
+    for _ in range(5):
+        env.step(0)
+    env.close()
+
+    with open(tmp_path / "profile.json", encoding="utf-8") as json_file:
+        summary = json.load(json_file)
+    assert [layer["layer"] for layer in summary] == ["1_Wrapper", "0_DummyEnv"]
+    assert summary[0]["step"]["count"] == summary[1]["step"]["count"] == 5
+    assert "reset" not in summary[0]
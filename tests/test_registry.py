@@ -0,0 +1,57 @@
+"""Tests for wrapper registry module."""
+
+import sys
+
+import pytest
+
+import beobench.wrappers.registry as registry
+
+
+def _write_wrapper_file(path, value):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        "class MyWrapper:\n"
+        f"    value = {value}\n\n"
+        "    def __init__(self, env, scale=1.0):\n"
+        "        self.env = env\n"
+    )
+    return str(path)
+
+
+def test_wrapper_files_with_same_name_do_not_collide(tmp_path):
+    path_a = _write_wrapper_file(tmp_path / "a" / "wrappers.py", 1)
+    path_b = _write_wrapper_file(tmp_path / "b" / "wrappers.py", 2)
+
+    assert registry.get_file_id(path_a) != registry.get_file_id(path_b)
+    assert registry.get_file_id(path_a).startswith("wrappers_")
+    wrapper_a = registry.get_wrapper({"origin": path_a, "class": "MyWrapper"})
+    wrapper_b = registry.get_wrapper({"origin": path_b, "class": "MyWrapper"})
+    assert (wrapper_a.value, wrapper_b.value) == (1, 2)
+
+
+def test_register_wrappers_validates_config(tmp_path):
+    path = _write_wrapper_file(tmp_path / "wrappers.py", 1)
+
+    wrappers = registry.register_wrappers(
+        [{"origin": path, "class": "MyWrapper", "config": {"scale": 2.0}}]
+    )
+    assert wrappers == [(wrappers[0][0], {"scale": 2.0})]
+    with pytest.raises(ValueError):
+        registry.register_wrappers(
+            [{"origin": path, "class": "MyWrapper", "config": {"offset": 1}}]
+        )
+    with pytest.raises(ValueError):
+        registry.register_wrappers([{"origin": path, "class": "Missing"}])
+
+
+def test_failed_wrapper_file_import_is_not_cached(tmp_path):
+    path = tmp_path / "wrappers.py"
+    path.write_text("raise RuntimeError('broken wrapper file')\n")
+    module_name = f"beobench_user_wrappers_{registry.get_file_id(path)}"
+
+    with pytest.raises(RuntimeError, match="broken wrapper file"):
+        registry.get_wrapper({"origin": str(path), "class": "MyWrapper"})
+    assert module_name not in sys.modules
+
+    _write_wrapper_file(path, 3)
+    assert registry.get_wrapper({"origin": str(path), "class": "MyWrapper"}).value == 3
@@ -0,0 +1,82 @@
+"""Tests for remote env module."""
+
+import socket
+import threading
+
+import pytest
+
+gym = pytest.importorskip("gym")
+
+import numpy as np  # pylint: disable=wrong-import-position
+
+from beobench.experiment import remote  # pylint: disable=wrong-import-position
+
+
+class CountingEnv(gym.Env):
+    """Env observing the number of steps since the last reset."""
+
+    observation_space = gym.spaces.Box(low=0, high=100, shape=(1,))
+    action_space = gym.spaces.Discrete(2)
+
+    def __init__(self):
+        self.num_steps = 0
+        self.closed = False
+
+    def reset(self, **kwargs):
+        self.num_steps = 0
+        return np.zeros(1)
+
+    def step(self, action):
+        if action not in self.action_space:
+            raise ValueError(f"Invalid action {action}.")
+        self.num_steps += 1
+        return np.array([float(self.num_steps)]), float(action), False, {}
+
+    def close(self):
+        self.closed = True
+
+
+def test_send_and_recv_message():
+    sock_1, sock_2 = socket.socketpair()
+    with sock_1, sock_2:
+        large_array = np.arange(100000, dtype=np.float64)  # sent in multiple parts
+        for obj in [("step", (1,), {}), {"obs": large_array, "done": False}]:
+            thread = threading.Thread(target=remote.send_message, args=(sock_1, obj))
+            thread.start()
+            received = remote.recv_message(sock_2)
+            thread.join()
+            if isinstance(obj, dict):
+                np.testing.assert_array_equal(received["obs"], large_array)
+            else:
+                assert received == obj
+
+
+def test_remote_env_round_trip(tmp_path):
+    env = CountingEnv()
+    address = f"unix://{tmp_path / 'env.sock'}"
+    server = threading.Thread(target=remote.serve_env, args=(env, address))
+    server.start()
+
+    remote_env = remote.RemoteEnv(address, connect_timeout=10)
+    assert remote_env.observation_space == env.observation_space
+    assert remote_env.reset().tolist() == [0.0]
+    obs, reward, done, _ = remote_env.step(1)
+    assert obs.tolist() == [1.0]
+    assert reward == 1.0
+    assert not done
+    obs, rewards, _, _ = remote_env.step_many([0, 1, 1])
+    assert obs[:, 0].tolist() == [2.0, 3.0, 4.0]
+    assert rewards.tolist() == [0.0, 1.0, 1.0]
+    with pytest.raises(remote.RemoteEnvError, match="Invalid action"):
+        remote_env.step(5)
+
+    remote_env.close()
+    server.join(timeout=10)
+    assert not server.is_alive()
+    assert env.closed
+    assert not (tmp_path / "env.sock").exists()
+
+
+def test_invalid_address():
+    with pytest.raises(ValueError):
+        remote.RemoteEnv("http://localhost:8000")
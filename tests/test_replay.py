@@ -0,0 +1,101 @@
+"""Tests for replay module."""
+
+import pytest
+
+gym = pytest.importorskip("gym")
+
+import numpy as np  # pylint: disable=wrong-import-position
+
+from beobench.experiment import replay  # pylint: disable=wrong-import-position
+from beobench.experiment import trajectories  # pylint: disable=wrong-import-position
+
+
+@pytest.fixture
+def trajectory_path(tmp_path):
+    """Trajectory of two episodes with 3 and 2 steps, written in chunks of 2 rows."""
+    writer = trajectories.TrajectoryWriter(
+        tmp_path,
+        observation_space=gym.spaces.Box(low=-10, high=10, shape=(1,)),
+        action_space=gym.spaces.Discrete(2),
+        chunk_size=2,
+    )
+    for num_steps in [3, 2]:
+        writer.add(trajectories.make_row(np.zeros(1)))
+        for i in range(1, num_steps + 1):
+            writer.add(
+                trajectories.make_row(
+                    np.array([float(i)]),
+                    action=1,
+                    reward=float(i),
+                    done=i == num_steps,
+                    info={"obs": {"power": 10.0 * i}},
+                )
+            )
+    writer.close()
+    return tmp_path
+
+
+def test_replay_round_trip(trajectory_path):
+    env = replay.ReplayEnv(trajectory_path)
+    assert env.num_episodes == 2
+    assert env.observation_space.shape == (1,)
+
+    assert env.reset().tolist() == [0.0]
+    obs, reward, done, info = env.step(0)
+    assert obs.tolist() == [1.0]
+    assert reward == 1.0
+    assert not done
+    assert info == {"obs": {"power": 10.0}}
+
+    obs, rewards, dones, infos = env.step_many([0, 0, 0])
+    assert obs[:, 0].tolist() == [2.0, 3.0]  # stops at end of episode
+    assert rewards.tolist() == [2.0, 3.0]
+    assert dones.tolist() == [False, True]
+    assert infos[1] == {"obs": {"power": 30.0}}
+    with pytest.raises(RuntimeError):
+        env.step(0)
+
+    assert env.reset().tolist() == [0.0]
+    assert env.episode == 1
+    episode = env.get_episode(1)
+    assert episode["reset"].tolist() == [True, False, False]
+    assert episode["reward"].tolist() == [0.0, 1.0, 2.0]
+
+
+def test_replay_reuses_consolidated_columns(trajectory_path):
+    replay.ReplayEnv(trajectory_path)
+    assert (trajectory_path / replay.COLUMNS_DIR / "obs.npy").is_file()
+
+    env = replay.ReplayEnv(trajectory_path)
+    assert isinstance(env.columns["obs"], np.memmap)
+    assert env.reset(episode=0, start_step=2).tolist() == [2.0]
+
+
+def test_replay_consolidates_added_chunks(trajectory_path):
+    env = replay.ReplayEnv(trajectory_path)
+    assert env.num_episodes == 2
+
+    # chunk of third episode without info values
+    rows = [
+        trajectories.make_row(np.zeros(1)),
+        trajectories.make_row(np.ones(1), action=0, reward=5.0, done=True),
+    ]
+    num_chunks = len(trajectories.get_chunk_paths(trajectory_path))
+    np.savez(
+        trajectory_path / f"chunk_{num_chunks:06d}.npz",
+        **trajectories.rows_to_columns(rows),
+    )
+
+    env = replay.ReplayEnv(trajectory_path)
+    assert env.num_episodes == 3
+    assert sorted(path.name for path in trajectory_path.iterdir()) == sorted(
+        [replay.COLUMNS_DIR, trajectories.SPACES_FILE]
+        + [f"chunk_{i:06d}.npz" for i in range(num_chunks + 1)]
+    )
+    expected = trajectories.load_columns(trajectory_path)
+    assert sorted(env.columns) == sorted(expected)
+    for key, values in expected.items():
+        np.testing.assert_array_equal(env.columns[key], values)
+    episode = env.get_episode(2)
+    assert episode["reward"].tolist() == [0.0, 5.0]
+    assert np.isnan(episode["info.obs.power"]).all()
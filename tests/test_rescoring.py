@@ -0,0 +1,72 @@
+"""Tests for rescoring module."""
+
+import pytest
+
+pytest.importorskip("gym")
+
+import numpy as np  # pylint: disable=wrong-import-position
+
+from beobench.experiment import rescoring  # pylint: disable=wrong-import-position
+
+WEIGHTS = [{"power_ev": 0.4, "power_hvac": 0.6}, {"power_hvac": -1.0}, {}]
+
+
+def get_infos(num_steps=10):
+    rng = np.random.default_rng(0)
+    return [
+        {"obs": {"power_ev": rng.normal(), "power_hvac": rng.normal()}}
+        for _ in range(num_steps)
+    ]
+
+
+def test_rescore_matches_per_step_rewards():
+    infos = get_infos()
+    dones = [False] * 3 + [True] + [False] * 5 + [True]
+    result = rescoring.rescore(infos, WEIGHTS, dones=dones, chunk_size=2)
+
+    rewards = np.array(
+        [
+            [
+                sum(w * info["obs"][key] for key, w in weights.items())
+                for weights in WEIGHTS
+            ]
+            for info in infos
+        ]
+    )
+    np.testing.assert_allclose(result["total_reward"], rewards.sum(axis=0))
+    np.testing.assert_allclose(result["mean_reward"], rewards.mean(axis=0))
+    np.testing.assert_allclose(result["std_reward"], rewards.std(axis=0), atol=1e-12)
+    np.testing.assert_allclose(result["min_reward"], rewards.min(axis=0))
+    np.testing.assert_allclose(result["max_reward"], rewards.max(axis=0))
+    np.testing.assert_allclose(
+        result["episode_returns"], [rewards[:4].sum(axis=0), rewards[4:].sum(axis=0)]
+    )
+
+
+def test_rescore_columnar_infos():
+    infos = get_infos()
+    columns = {
+        key: [info["obs"][key] for info in infos] for key in ["power_ev", "power_hvac"]
+    }
+    result = rescoring.rescore(columns, WEIGHTS[0])
+
+    np.testing.assert_allclose(
+        result["total_reward"], rescoring.rescore(infos, WEIGHTS[0])["total_reward"]
+    )
+    assert result["episode_returns"].shape == (1, 1)
+
+
+def test_rescore_rejects_empty_trajectory():
+    with pytest.raises(ValueError, match="empty"):
+        rescoring.rescore([], WEIGHTS)
+    with pytest.raises(ValueError, match="empty"):
+        rescoring.rescore({"power_ev": [], "power_hvac": []}, WEIGHTS)
+
+
+def test_rescore_rejects_missing_weight_keys():
+    infos = get_infos()
+    del infos[3]["obs"]["power_ev"]
+    with pytest.raises(ValueError, match=r"\['power_ev'\]"):
+        rescoring.rescore(infos, WEIGHTS)
+    with pytest.raises(ValueError, match=r"\['power_hvac'\]"):
+        rescoring.rescore({"power_ev": [1.0]}, WEIGHTS)
@@ -0,0 +1,89 @@
+"""Tests for container resources module."""
+
+import csv
+import io
+
+import pytest
+
+pytest.importorskip("docker")
+
+# pylint: disable=wrong-import-position
+from beobench.experiment import resources
+
+
+def get_stats(total_usage, system_cpu_usage, mem_usage=1000):
+    return {
+        "cpu_stats": {
+            "cpu_usage": {"total_usage": total_usage},
+            "system_cpu_usage": system_cpu_usage,
+            "online_cpus": 4,
+        },
+        "memory_stats": {
+            "usage": mem_usage,
+            "limit": 8000,
+            "stats": {"inactive_file": 200, "shmem": 300},
+        },
+        "pids_stats": {"current": 7},
+        "blkio_stats": {
+            "io_service_bytes_recursive": [
+                {"op": "read", "value": 10},
+                {"op": "Read", "value": 5},
+                {"op": "write", "value": 20},
+            ]
+        },
+        "networks": {
+            "eth0": {"rx_bytes": 1, "tx_bytes": 2},
+            "eth1": {"rx_bytes": 3, "tx_bytes": 4},
+        },
+    }
+
+
+def test_parse_stats():
+    stats = get_stats(total_usage=150, system_cpu_usage=1100)
+    stats["precpu_stats"] = get_stats(100, 1000)["cpu_stats"]
+    row = resources.parse_stats(stats)
+
+    assert row == {
+        "cpu_percent": 200.0,  # 4 cpus * 50 / 100
+        "mem_bytes": 800,
+        "mem_limit_bytes": 8000,
+        "shm_bytes": 300,
+        "pids": 7,
+        "blk_read_bytes": 15,
+        "blk_write_bytes": 20,
+        "net_rx_bytes": 4,
+        "net_tx_bytes": 6,
+    }
+    # CPU usage averaged over previous sample instead of precpu_stats
+    prev_stats = get_stats(total_usage=50, system_cpu_usage=600)
+    assert resources.parse_stats(stats, prev_stats)["cpu_percent"] == 80.0
+
+
+def test_parse_stats_cgroup_v1_and_stopped_container():
+    stats = get_stats(total_usage=150, system_cpu_usage=1100)
+    stats["memory_stats"]["stats"] = {"total_inactive_file": 100, "total_shmem": 50}
+    row = resources.parse_stats(stats)
+    assert row["cpu_percent"] == 0.0  # no previous CPU stats
+    assert row["mem_bytes"] == 900
+    assert row["shm_bytes"] == 50
+
+    # stats of stopped containers are empty
+    assert resources.parse_stats({"memory_stats": {}, "cpu_stats": {}}) is None
+
+
+def test_sampler_summary(tmp_path):
+    sampler = resources.ContainerStatsSampler(
+        "container", tmp_path / "timeline.csv", tmp_path / "summary.json"
+    )
+    writer = csv.DictWriter(io.StringIO(), fieldnames=resources.COLUMNS)
+    for i, mem_usage in enumerate([1200, 3200]):
+        row = resources.parse_stats(get_stats(0, 0, mem_usage=mem_usage))
+        row["time"] = 5.0 * i
+        sampler.add_sample(row, writer)
+    summary = sampler.get_summary()
+
+    assert summary["num_samples"] == 2
+    assert summary["duration"] == 5.0
+    assert summary["peak_mem_bytes"] == 3000
+    assert summary["mean_mem_bytes"] == 2000
+    assert summary["total_net_rx_bytes"] == 4
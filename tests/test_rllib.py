@@ -0,0 +1,40 @@
+"""Tests for RLlib integration module."""
+
+import gzip
+import json
+
+import pytest
+
+pytest.importorskip("ray.tune")
+
+import numpy as np  # pylint: disable=wrong-import-position
+
+# pylint: disable=wrong-import-position
+from beobench.integration import rllib
+
+
+def test_column_builder_fills_missing_values_across_chunks():
+    builder = rllib._ColumnBuilder(chunk_size=2)  # pylint: disable=protected-access
+    builder.append({"a": 1.0})
+    builder.append({"a": 2.0})
+    builder.append({"b": 3.0})  # key first given in second chunk
+    builder.append({"a": 4.0})
+    builder.append({"a": 5.0, "b": 6.0})
+    arrays = builder.to_arrays()
+
+    np.testing.assert_array_equal(arrays["a"], [1.0, 2.0, np.nan, 4.0, 5.0])
+    np.testing.assert_array_equal(arrays["b"], [np.nan, np.nan, 3.0, np.nan, 6.0])
+
+
+def test_get_cross_episodes_data(tmp_path):
+    path = tmp_path / "output.json.gz"
+    with gzip.open(path, "wt", encoding="UTF-8") as output_file:
+        for infos in [[{"obs": {"x": 1}}, {"obs": {"x": 2}}], [{"obs": {"y": 3}}]]:
+            output_file.write(json.dumps({"infos": infos}) + "\n")
+
+    infos = rllib.get_cross_episodes_data(path)
+    assert infos == [{"obs": {"x": 1}}, {"obs": {"x": 2}}, {"obs": {"y": 3}}]
+
+    columns = rllib.get_cross_episodes_data(path, columnar=True, info_key="obs")
+    np.testing.assert_array_equal(columns["x"], [1, 2, np.nan])
+    np.testing.assert_array_equal(columns["y"], [np.nan, np.nan, 3])
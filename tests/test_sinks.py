@@ -0,0 +1,41 @@
+"""Tests for metrics sinks module."""
+
+import pytest
+
+pytest.importorskip("wandb")
+
+import numpy as np  # pylint: disable=wrong-import-position
+
+from beobench.integration import sinks  # pylint: disable=wrong-import-position
+
+
+def test_sqlite_sink_adds_columns(tmp_path):
+    sink = sinks.create_sink("sqlite", path=tmp_path / "metrics.sqlite")
+    sink.log({"a": 1})
+    sink.log_many([{"a": 2, "b": np.float32(0.5)}, {"reset": {"a": 3}}, {}])
+    sink.log({"c": np.array([1, 2])})
+    sink.close()
+
+    records = list(sinks.iter_records(tmp_path / "metrics.sqlite"))
+    assert records == [
+        {"a": 1},
+        {"a": 2, "b": 0.5},
+        {"reset.a": 3},
+        {},
+        {"c": "[1, 2]"},
+    ]
+
+
+def test_sqlite_sinks_sharing_file_add_same_column(tmp_path):
+    path = tmp_path / "metrics.sqlite"
+    sink_1 = sinks.SQLiteSink(path)
+    sink_2 = sinks.SQLiteSink(path)
+    sink_1.log({"a": 1})
+    # column was added by other sink since sink_2 read the columns
+    sink_2.log({"a": 2, "b": 3})
+    sink_1.log({"b": 4})
+    sink_1.close()
+    sink_2.close()
+
+    records = list(sinks.iter_records(path))
+    assert records == [{"a": 1}, {"a": 2, "b": 3}, {"b": 4}]
@@ -0,0 +1,130 @@
+"""Tests for snapshot module."""
+
+import json
+
+import pytest
+
+gym = pytest.importorskip("gym")
+
+# pylint: disable=wrong-import-position
+from beobench.experiment import snapshot, step_counter, transition_cache
+
+
+class SumEnv(gym.Env):
+    """Deterministic env observing the sum of actions since the last reset."""
+
+    observation_space = gym.spaces.Box(low=-100, high=100, shape=(1,))
+    action_space = gym.spaces.Discrete(10)
+
+    def __init__(self):
+        self.num_sim_steps = 0
+        self.total = 0
+
+    def reset(self, **kwargs):
+        self.total = 0
+        return self.total
+
+    def step(self, action):
+        self.num_sim_steps += 1
+        self.total += action
+        return self.total, float(action), False, {"total": self.total}
+
+
+class StatefulSumEnv(SumEnv):
+    """SumEnv supporting snapshots natively."""
+
+    def get_state(self) -> dict:
+        return {"total": self.total}
+
+    def set_state(self, state: dict) -> None:
+        self.total = state["total"]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = transition_cache.TransitionStore(
+        tmp_path / "cache.sqlite", max_size=2**20
+    )
+    yield store
+    store.close()
+
+
+def read_counters(counter):
+    counter.write()
+    with open(counter.path, encoding="utf-8") as json_file:
+        return json.load(json_file)
+
+
+def test_snapshot_requires_state_or_action_replay():
+    with pytest.raises(ValueError, match="env_snapshots"):
+        snapshot.snapshot(SumEnv())
+
+
+def test_restore_rejects_different_layers():
+    state = snapshot.snapshot(snapshot.ActionReplay(SumEnv()))
+    with pytest.raises(ValueError, match="does not match"):
+        snapshot.restore(StatefulSumEnv(), state)
+
+
+def test_action_replay_round_trip(tmp_path, store):
+    base_env = SumEnv()
+    env = step_counter.StepCounter(
+        snapshot.ActionReplay(
+            transition_cache.TransitionCache(base_env, store=store, env_key="sum")
+        ),
+        path=tmp_path / "counters.json",
+        run_id="run",
+    )
+    env.reset()
+    env.step(1)
+    env.step(2)
+    state = snapshot.snapshot(env)
+    counters = read_counters(env)
+    transitions = [env.step(3), env.step(4)]
+
+    for _ in range(2):
+        snapshot.restore(env, state)
+        assert env.num_steps == 2
+        assert env.num_resets == 1
+        assert read_counters(env)["env_steps"] == counters["env_steps"]
+        assert [env.step(3), env.step(4)] == transitions
+        assert base_env.total == 10
+    env.close()
+
+
+def test_native_state_round_trip_with_cache(tmp_path, store):
+    base_env = StatefulSumEnv()
+    env = step_counter.StepCounter(
+        transition_cache.TransitionCache(base_env, store=store, env_key="sum"),
+        path=tmp_path / "counters.json",
+        run_id="run",
+    )
+    env.reset()
+    env.step(1)
+    env.step(2)
+    state = snapshot.snapshot(env)
+    transitions = [env.step(3), env.step(4)]
+    assert base_env.num_sim_steps == 4
+
+    snapshot.restore(env, state)
+    assert (env.num_steps, env.num_resets) == (2, 1)
+    # served from cache with keys matching the restored simulator state
+    assert [env.step(3), env.step(4)] == transitions
+    assert base_env.num_sim_steps == 4
+    # first miss catches up from the restored simulator state
+    assert env.step(5) == (15, 5.0, False, {"total": 15})
+    assert base_env.total == 15
+    assert (env.num_steps, env.num_resets) == (5, 1)
+    env.close()
+
+
+def test_snapshot_is_not_changed_by_env(tmp_path, store):
+    env = transition_cache.TransitionCache(StatefulSumEnv(), store=store, env_key="sum")
+    env.reset()
+    env.step(1)
+    state = snapshot.snapshot(env)
+    env.step(2)
+    snapshot.restore(env, state)
+    env.step(2)
+    snapshot.restore(env, state)
+    assert env.actions == [1]
@@ -0,0 +1,55 @@
+"""Tests for trajectories module."""
+
+import numpy as np
+
+from beobench.experiment import trajectories
+
+
+def test_make_row():
+    reset_row = trajectories.make_row({"a": [1.0, 2.0], "b": 3})
+    assert reset_row["reset"]
+    assert "action" not in reset_row
+    assert reset_row["obs.a"].tolist() == [1.0, 2.0]
+
+    row = trajectories.make_row(
+        [1.0], action=2, reward=0.5, done=True, info={"obs": {"x": 1.0}, "msg": "ok"}
+    )
+    assert not row["reset"]
+    assert row["action"] == 2
+    assert row["info.obs.x"] == 1.0
+    assert "info.msg" not in row  # non-numeric info values are not recorded
+
+
+def test_rows_to_columns_fills_missing_values():
+    rows = [
+        trajectories.make_row([0.0]),
+        trajectories.make_row([1.0], action=[1.0], reward=1.0, info={"x": 2.0}),
+        trajectories.make_row([2.0], action=[2.0], reward=2.0, info={"y": 3}),
+    ]
+    columns = trajectories.rows_to_columns(rows)
+
+    assert columns["reset"].tolist() == [True, False, False]
+    assert columns["obs"].shape == (3, 1)
+    assert np.isnan(columns["action"][0]).all()
+    assert np.isnan(columns["info.x"][[0, 2]]).all()
+    assert columns["info.y"].tolist() == [0, 0, 3]
+
+
+def test_writer_chunks(tmp_path):
+    writer = trajectories.TrajectoryWriter(tmp_path, chunk_size=2)
+    writer.add(trajectories.make_row([0.0]))
+    for i in range(1, 5):
+        writer.add(
+            trajectories.make_row(
+                [float(i)], action=[float(i)], info={"x": 1.0} if i == 4 else None
+            )
+        )
+    writer.close()
+
+    assert len(trajectories.get_chunk_paths(tmp_path)) == 3
+    columns = trajectories.load_columns(tmp_path)
+    assert columns["obs"][:, 0].tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+    # column only recorded in last chunk is filled in earlier chunks
+    assert np.isnan(columns["info.x"][:4]).all()
+    assert columns["info.x"][4] == 1.0
+    assert trajectories.load_spaces(tmp_path) == (None, None)
@@ -0,0 +1,116 @@
+"""Tests for transition cache module."""
+
+import itertools
+
+import pytest
+
+gym = pytest.importorskip("gym")
+
+# pylint: disable=wrong-import-position
+from beobench.experiment import transition_cache
+
+
+class SumEnv(gym.Env):
+    """Deterministic env observing the sum of actions since the last reset."""
+
+    observation_space = gym.spaces.Box(low=-100, high=100, shape=(1,))
+    action_space = gym.spaces.Discrete(10)
+
+    def __init__(self):
+        self.calls = []
+        self.total = 0
+
+    def reset(self, **kwargs):
+        self.calls.append(("reset",))
+        self.total = 0
+        return self.total
+
+    def step(self, action):
+        self.calls.append(("step", action))
+        self.total += action
+        return self.total, float(action), False, {}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = transition_cache.TransitionStore(
+        tmp_path / "cache.sqlite", max_size=2**20
+    )
+    yield store
+    store.close()
+
+
+def test_store_batches_puts(tmp_path):
+    store = transition_cache.TransitionStore(
+        tmp_path / "cache.sqlite", max_size=2**20, put_batch_size=3
+    )
+    other_store = transition_cache.TransitionStore(
+        tmp_path / "cache.sqlite", max_size=2**20
+    )
+    store.put("a", 1)
+    store.put("b", 2)
+    assert not store._conn.in_transaction  # pylint: disable=protected-access
+    assert store.get("a") == 1  # pending puts are served by same store
+    assert other_store.get("a") is None
+    store.put("c", 3)  # writes batch in single transaction
+    assert not store._conn.in_transaction  # pylint: disable=protected-access
+    assert [other_store.get(key) for key in "abc"] == [1, 2, 3]
+    assert store.get("d") is None
+    store.put("d", 4)
+    store.close()
+    assert other_store.get("d") == 4
+    other_store.close()
+
+
+def test_store_evicts_least_recently_used(tmp_path, monkeypatch):
+    clock = itertools.count()
+    monkeypatch.setattr(transition_cache.time, "time", lambda: next(clock))
+    value = b"x" * 100
+    blob_size = len(transition_cache.pickle.dumps(value))
+    store = transition_cache.TransitionStore(
+        tmp_path / "cache.sqlite", max_size=3 * blob_size, access_batch_size=10
+    )
+    for key in "abc":
+        store.put(key, value)
+    assert store.get("a") == value  # access time is only queued
+    store.put("d", value)  # exceeds max size, evicting down to 2 transitions
+
+    assert store.get("a") == value
+    assert store.get("b") is None
+    assert store.get("c") is None
+    assert store.get("d") == value
+    store.close()
+
+
+def test_cache_catches_up_simulator(store):
+    env = transition_cache.TransitionCache(SumEnv(), store=store, env_key="sum")
+    env.reset()
+    env.step(1)
+    env.step(2)
+    env.reset()
+    env.step(3)
+    assert env.num_misses == 4
+
+    sim = SumEnv()
+    env = transition_cache.TransitionCache(sim, store=store, env_key="sum")
+    for _ in range(3):
+        assert env.reset() == 0
+        assert env.step(1)[0] == 1
+        assert env.step(2)[0] == 3
+    env.reset()
+    assert env.step(3)[0] == 3
+    assert env.num_hits == 11
+    assert not sim.calls
+
+    # first miss only replays reset and actions of current episode
+    assert env.step(4)[0] == 7
+    assert sim.calls == [("reset",), ("step", 3), ("step", 4)]
+    assert env.step(5)[0] == 12
+    assert sim.calls[-1] == ("step", 5)
+    assert env.actions == [3, 4, 5]
+
+    # reset served from cache does not touch simulator until next miss
+    env.reset()
+    assert env.step(1)[0] == 1
+    assert env.step(1)[0] == 2
+    assert sim.calls[-4:] == [("step", 5), ("reset",), ("step", 1), ("step", 1)]
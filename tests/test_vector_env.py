@@ -0,0 +1,61 @@
+"""Tests for vector env module."""
+
+import pytest
+
+gym = pytest.importorskip("gym")
+
+import beobench.experiment.vector_env  # pylint: disable=wrong-import-position
+
+
+class CountingEnv:
+    """Minimal env whose observation is the number of steps since reset."""
+
+    observation_space = gym.spaces.Box(low=0, high=100, shape=(1,))
+    action_space = gym.spaces.Discrete(2)
+
+    def __init__(self, fail_at_step=None):
+        self.fail_at_step = fail_at_step
+        self.num_steps = 0
+
+    def reset(self):
+        self.num_steps = 0
+        return [0.0]
+
+    def step(self, action):
+        self.num_steps += 1
+        if self.num_steps == self.fail_at_step:
+            raise RuntimeError("simulation failed")
+        return [float(self.num_steps)], float(action), self.num_steps >= 3, {}
+
+    def close(self):
+        pass
+
+
+def test_vector_env_steps_and_resets():
+    vector_env = beobench.experiment.vector_env.VectorEnv([CountingEnv] * 2)
+    assert vector_env.reset().tolist() == [[0.0], [0.0]]
+    for _ in range(2):
+        obs, rewards, dones, _ = vector_env.step([1, 0])
+    assert obs.tolist() == [[2.0], [2.0]]
+    assert rewards.tolist() == [1.0, 0.0]
+
+    obs, _, dones, infos = vector_env.step([1, 1])
+    assert dones.tolist() == [True, True]
+    assert obs.tolist() == [[0.0], [0.0]]  # automatically reset
+    assert infos[0]["terminal_observation"].tolist() == [3.0]
+    vector_env.close()
+
+
+def test_vector_env_close_after_worker_error():
+    vector_env = beobench.experiment.vector_env.VectorEnv(
+        [CountingEnv, lambda: CountingEnv(fail_at_step=1)]
+    )
+    vector_env.reset()
+    with pytest.raises(beobench.experiment.vector_env.VectorEnvWorkerError):
+        vector_env.step([0, 0])
+    with pytest.raises(beobench.experiment.vector_env.VectorEnvWorkerError):
+        vector_env.step([0, 0])
+
+    vector_env.close()
+    assert vector_env.closed
+    assert not any(process.is_alive() for process in vector_env._processes)
@@ -0,0 +1,172 @@
+"""Tests for wandb integration module."""
+
+import threading
+import types
+
+import numpy as np
+import pytest
+
+pytest.importorskip("wandb")
+
+# pylint: disable=wrong-import-position
+import beobench.integration.wandb
+
+
+class MockTable:
+    def __init__(self, columns, data):
+        self.columns = columns
+        self.data = data
+
+
+class MockArtifact:
+    def __init__(self, name, type):  # pylint: disable=redefined-builtin
+        self.name = name
+        self.type = type
+        self.files = []
+
+    def add_file(self, path):
+        self.files.append(path)
+
+
+@pytest.fixture
+def mock_wandb(monkeypatch, tmp_path):
+    logged = []
+    artifacts = []
+    mock = types.SimpleNamespace(
+        log=logged.append,
+        Table=MockTable,
+        Artifact=MockArtifact,
+        log_artifact=artifacts.append,
+        run=types.SimpleNamespace(dir=str(tmp_path)),
+        logged=logged,
+        artifacts=artifacts,
+    )
+    monkeypatch.setattr(beobench.integration.wandb, "wandb", mock)
+    return mock
+
+
+EPS_DICT = {"reward": np.arange(5, dtype=float), "action": [1, 0, 1, 1, 0]}
+
+
+def test_log_eps_data_steps(mock_wandb):
+    beobench.integration.wandb.log_eps_data(EPS_DICT, mode="steps", chunk_size=2)
+
+    assert mock_wandb.logged == [
+        {"env_step": i, "reward": float(i), "action": EPS_DICT["action"][i]}
+        for i in range(5)
+    ]
+
+
+def test_log_eps_data_table(mock_wandb):
+    beobench.integration.wandb.log_eps_data(
+        EPS_DICT, mode="table", chunk_size=2, name="eps"
+    )
+
+    assert [list(log.keys()) for log in mock_wandb.logged] == [["eps"]] * 3
+    tables = [log["eps"] for log in mock_wandb.logged]
+    assert all(table.columns == ["env_step", "reward", "action"] for table in tables)
+    assert [row for table in tables for row in table.data] == [
+        [i, float(i), EPS_DICT["action"][i]] for i in range(5)
+    ]
+    assert [len(table.data) for table in tables] == [2, 2, 1]
+    assert not mock_wandb.artifacts
+
+
+def test_log_eps_data_artifact(mock_wandb, tmp_path):
+    beobench.integration.wandb.log_eps_data(
+        EPS_DICT, mode="artifact", chunk_size=2, name="eps"
+    )
+
+    assert not mock_wandb.logged
+    assert len(mock_wandb.artifacts) == 1
+    artifact = mock_wandb.artifacts[0]
+    assert (artifact.name, artifact.type) == ("eps", "episode_data")
+    assert artifact.files == [
+        str(tmp_path / "eps" / f"eps_{start:09d}.npz") for start in (0, 2, 4)
+    ]
+    chunks = [np.load(path) for path in artifact.files]
+    assert all(
+        sorted(chunk.files) == ["action", "env_step", "reward"] for chunk in chunks
+    )
+    np.testing.assert_array_equal(
+        np.concatenate([chunk["env_step"] for chunk in chunks]), np.arange(5)
+    )
+    for key, values in EPS_DICT.items():
+        np.testing.assert_array_equal(
+            np.concatenate([chunk[key] for chunk in chunks]), np.asarray(values)
+        )
+
+
+def test_log_eps_data_invalid_mode(mock_wandb):
+    with pytest.raises(ValueError, match="not supported"):
+        beobench.integration.wandb.log_eps_data(EPS_DICT, mode="csv")
+
+
+def test_buffered_logger_blocks_when_full():
+    logged = []
+    release = threading.Event()
+
+    def log_many(records):
+        release.wait(timeout=10)
+        logged.extend(records)
+
+    buffered_logger = beobench.integration.wandb.BufferedLogger(
+        log_many_fn=log_many, flush_every=1, max_queued_batches=1, block_when_full=True
+    )
+    thread = threading.Thread(
+        target=lambda: [buffered_logger.log({"i": i}) for i in range(5)]
+    )
+    thread.start()
+    thread.join(timeout=0.5)
+    assert thread.is_alive()  # blocked while background thread is behind
+
+    release.set()
+    thread.join()
+    buffered_logger.close()
+    assert logged == [{"i": i} for i in range(5)]
+    assert buffered_logger.num_dropped_batches == 0
+
+
+def test_buffered_logger_drops_batches_by_default(monkeypatch):
+    warnings = []
+    monkeypatch.setattr(beobench.integration.wandb.logger, "warning", warnings.append)
+    release = threading.Event()
+    buffered_logger = beobench.integration.wandb.BufferedLogger(
+        log_many_fn=lambda records: release.wait(timeout=10),
+        flush_every=2,
+        max_queued_batches=1,
+    )
+    thread = threading.Thread(
+        target=lambda: [buffered_logger.log({"i": i}) for i in range(10)]
+    )
+    thread.start()
+    thread.join(timeout=5)
+    assert not thread.is_alive()  # never blocked by background thread
+    release.set()
+    buffered_logger.close()
+
+    # one batch is being logged and one is queued when the others arrive
+    assert buffered_logger.num_dropped_batches >= 3
+    assert (
+        buffered_logger.num_dropped_records == 2 * buffered_logger.num_dropped_batches
+    )
+    assert f"({buffered_logger.num_dropped_records} records) in total" in warnings[-1]
+
+
+def test_buffered_logger_closed_at_exit(monkeypatch):
+    exit_fns = []
+    monkeypatch.setattr(
+        beobench.integration.wandb,
+        "atexit",
+        types.SimpleNamespace(register=exit_fns.append, unregister=exit_fns.remove),
+    )
+    logged = []
+    buffered_logger = beobench.integration.wandb.BufferedLogger(
+        log_many_fn=logged.extend, flush_every=10
+    )
+    buffered_logger.log({"i": 0})
+    assert exit_fns == [buffered_logger.close]
+
+    exit_fns[0]()  # as called at interpreter exit
+    assert logged == [{"i": 0}]
+    assert not exit_fns